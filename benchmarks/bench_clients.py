@@ -0,0 +1,105 @@
+"""
+Per-bot cost of child bot objects: full TeleBot versus the slim BotClient.
+
+    python -m benchmarks.bench_clients [--bots 200] [--calls 2000] [--concurrency 8] [--json]
+
+For --bots child bots it measures construction time and the memory held by
+the instances (tracemalloc), then sends --calls sendMessage requests spread
+round-robin over the bots against a local stub Bot API and reports
+latency percentiles. Both paths share the same HTTP transport, so the
+latency columns show client-side overhead only.
+"""
+import argparse
+import gc
+import json
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from telebot import TeleBot, apihelper
+
+from benchmarks.load_webhook import start_stub_api, _percentile
+from utils.bot_client import BotClient
+
+
+def _tokens(n):
+    return [f"{100000 + i}:BENCH{i:06d}" for i in range(n)]
+
+
+def build(factory, tokens):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    bots = [factory(t) for t in tokens]
+    seconds = time.perf_counter() - start
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    held = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return bots, seconds, held
+
+
+def send(bots, calls, concurrency):
+    def one(i):
+        start = time.perf_counter()
+        bots[i % len(bots)].send_message(-100 - (i % 50), "benchmark", disable_web_page_preview=True)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one, range(calls)))
+    wall = time.perf_counter() - start
+    return {
+        "calls_per_sec": round(calls / wall, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bots", type=int, default=200)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--json", action="store_true", help="print one JSON document")
+    args = parser.parse_args()
+
+    server = start_stub_api()
+    apihelper.API_URL = f"http://127.0.0.1:{server.server_port}/bot{{0}}/{{1}}"
+    tokens = _tokens(args.bots)
+
+    clients = {
+        "telebot": lambda t: TeleBot(t, parse_mode="HTML", threaded=False),
+        "bot_client": lambda t: BotClient(t, parse_mode="HTML"),
+    }
+    results = {}
+    for name, factory in clients.items():
+        threads_before = threading.active_count()
+        bots, seconds, held = build(factory, tokens)
+        send(bots, min(200, args.calls), args.concurrency)  # warm up connections
+        results[name] = {
+            "build_ms": round(seconds * 1000, 2),
+            "held_kb": round(held / 1024, 1),
+            "bytes_per_bot": round(held / args.bots),
+            "threads_added": threading.active_count() - threads_before,
+            **send(bots, args.calls, args.concurrency),
+        }
+        del bots
+
+    report = {"config": vars(args), "results": results}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.bots} bots, {args.calls} sendMessage calls, concurrency {args.concurrency}\n")
+    print(f"{'client':<12} {'build ms':>9} {'held KB':>9} {'B/bot':>7} {'calls/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, r in results.items():
+        print(f"{name:<12} {r['build_ms']:>9} {r['held_kb']:>9} {r['bytes_per_bot']:>7} "
+              f"{r['calls_per_sec']:>9} {r['p50_ms']:>8} {r['p99_ms']:>8}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
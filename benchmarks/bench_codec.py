@@ -0,0 +1,87 @@
+"""
+Compare the legacy JSON encoding of group_messages with the compact v2 codec.
+
+    python -m benchmarks.bench_codec [--entries 1000] [--groups 1] [--redis]
+
+Reports bytes per 1,000 submissions and encode/decode throughput.
+With --redis it also writes both encodings to the Redis from REDIS_HOST/PORT/DB
+and reports MEMORY USAGE for each key.
+"""
+import argparse
+import json
+import time
+
+from utils.session_codec import encode_group_messages, decode_group_messages
+
+
+def make_group_messages(entries: int, groups: int) -> dict:
+    group_messages = {}
+    for g in range(groups):
+        gid = str(-1001000000000 - g)
+        group_messages[gid] = [
+            {
+                "number": i + 1,
+                "user_id": 5000000000 + i,
+                "username": f"tg_user_{i}",
+                "first_name": f"Name {i}",
+                "link": f"https://x.com/x_user_{i}/status/18{i:017d}",
+                "x_username": f"x_user_{i}",
+                "check": i % 3 == 0,
+            }
+            for i in range(entries)
+        ]
+    return group_messages
+
+
+def _throughput(fn, arg, min_seconds=0.5):
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        fn(arg)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return runs / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=1000, help="submissions per group")
+    parser.add_argument("--groups", type=int, default=1)
+    parser.add_argument("--redis", action="store_true", help="also measure Redis MEMORY USAGE")
+    args = parser.parse_args()
+
+    data = make_group_messages(args.entries, args.groups)
+    total = args.entries * args.groups
+
+    as_json = json.dumps(data)
+    as_v2 = encode_group_messages(data)
+    assert decode_group_messages(as_v2) == data
+    assert decode_group_messages(as_json) == data
+
+    codecs = {
+        "json": (json.dumps, json.loads, as_json.encode()),
+        "v2": (encode_group_messages, decode_group_messages, as_v2),
+    }
+
+    print(f"{total} submissions ({args.groups} group(s) x {args.entries})")
+    print(f"{'codec':<6} {'bytes/1k':>10} {'encode/s':>10} {'decode/s':>10}")
+    for name, (enc, dec, blob) in codecs.items():
+        per_1k = len(blob) * 1000 / total
+        enc_rate = _throughput(enc, data)
+        dec_rate = _throughput(dec, blob)
+        print(f"{name:<6} {per_1k:>10.0f} {enc_rate:>10.1f} {dec_rate:>10.1f}")
+
+    if args.redis:
+        from utils.redis_client import get_redis_raw
+        r = get_redis_raw()
+        for name, (_, _, blob) in codecs.items():
+            key = f"bench:codec:{name}"
+            r.hset(key, "group_messages", blob)
+            usage = r.memory_usage(key)
+            print(f"redis  {name:<6} MEMORY USAGE = {usage} bytes ({usage * 1000 / total:.0f}/1k)")
+            r.delete(key)
+
+
+if __name__ == "__main__":
+    main()
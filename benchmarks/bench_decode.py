@@ -0,0 +1,112 @@
+"""
+Webhook body decoding: telebot's full Update.de_json versus UpdateView.
+
+    python -m benchmarks.bench_decode [--updates 20000] [--handled 0.2] [--json]
+
+Decodes a mix of realistic bodies (plain chat, links with entities, replies
+with the quoted message, captioned photos, callback queries) and reads the
+routing fields manual_dispatch uses. `--handled` is the share of updates
+that get past the prefilter and need the telebot Message built; the rest
+are dropped on raw fields. Pure CPU, no Redis/Mongo needed.
+"""
+import argparse
+import json
+import sys
+import time
+
+from telebot import types
+
+from utils import update_view
+from utils.update_view import UpdateView
+
+GROUP = {"id": -1001234567890, "type": "supergroup", "title": "Likes Group", "username": "likesgroup"}
+
+
+def _user(uid):
+    return {"id": uid, "is_bot": False, "first_name": f"User{uid}", "last_name": "Example",
+            "username": f"user{uid}", "language_code": "en"}
+
+
+def _message(mid, uid, **fields):
+    return dict({"message_id": mid, "date": 1760000000, "chat": GROUP, "from": _user(uid)}, **fields)
+
+
+def sample_bodies():
+    link = "https://x.com/someone/status/1790000000000000000"
+    plain = _message(1, 11, text="gm everyone, who is up for the next session?")
+    with_link = _message(2, 12, text=link, entities=[{"type": "url", "offset": 0, "length": len(link)}])
+    reply = _message(3, 13, text="ad", reply_to_message=_message(
+        2, 12, text=link, entities=[{"type": "url", "offset": 0, "length": len(link)}]))
+    photo = _message(4, 14, caption="ad done", photo=[
+        {"file_id": f"AgAC{i}" * 8, "file_unique_id": f"AQAD{i}", "width": 90 * i, "height": 160 * i,
+         "file_size": 1500 * i} for i in range(1, 5)])
+    callback = {"id": "4382", "from": _user(15), "chat_instance": "-8", "data": "list:next:2",
+                "message": _message(5, 777, text="page 1")}
+    updates = [
+        {"update_id": 1, "message": plain},
+        {"update_id": 2, "message": with_link},
+        {"update_id": 3, "message": reply},
+        {"update_id": 4, "message": photo},
+        {"update_id": 5, "callback_query": callback},
+    ]
+    return [json.dumps(u).encode() for u in updates]
+
+
+def run_telebot(bodies, n):
+    start = time.perf_counter()
+    for i in range(n):
+        update = types.Update.de_json(bodies[i % len(bodies)].decode("utf-8"))
+        if update.message:
+            message = update.message
+            (message.chat.id, message.chat.type, message.from_user.id,
+             message.text or message.caption or "")
+    return time.perf_counter() - start
+
+
+def run_view(bodies, n, handled):
+    every = round(1 / handled) if handled else 0
+    start = time.perf_counter()
+    for i in range(n):
+        view = UpdateView.from_bytes(bodies[i % len(bodies)])
+        if view.has_message:
+            (view.chat_id, view.chat_type, view.user_id, view.content)
+            if every and i % every == 0:
+                view.message
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=20000)
+    parser.add_argument("--handled", type=float, default=0.2, help="share of updates that build the Message")
+    parser.add_argument("--json", action="store_true", help="print one JSON document")
+    args = parser.parse_args()
+
+    bodies = sample_bodies()
+    run_telebot(bodies, 1000)  # warm up
+    run_view(bodies, 1000, args.handled)
+
+    results = {
+        "telebot": run_telebot(bodies, args.updates),
+        "view": run_view(bodies, args.updates, args.handled),
+        "view_all_handled": run_view(bodies, args.updates, 1.0),
+    }
+    report = {
+        "config": vars(args),
+        "parser": update_view._loads.__module__,
+        "updates_per_sec": {name: round(args.updates / seconds) for name, seconds in results.items()},
+        "us_per_update": {name: round(seconds / args.updates * 1e6, 2) for name, seconds in results.items()},
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"parser: {report['parser']}, {args.updates} updates, {args.handled:.0%} handled\n")
+    print(f"{'path':<18} {'updates/s':>11} {'us/update':>10}")
+    for name in results:
+        print(f"{name:<18} {report['updates_per_sec'][name]:>11} {report['us_per_update'][name]:>10}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""
+Micro-benchmarks for utils/group_session.py across session sizes.
+
+    python -m benchmarks.bench_group_session [--sizes 10,100,1000,10000]
+        [--groups 1,10,50] [--repeat 20] [--out results.json] [--fake]
+        [--stores redis,memory]
+
+Runs against the Redis from REDIS_HOST/REDIS_PORT/REDIS_DB (use a scratch DB,
+keys are written under the bot id "bench") or fakeredis with --fake.
+For every (entries per group, groups per bot) it seeds a verifying session and
+times each operation on one group while the other groups sit in the same
+session. Each configuration runs once per session store (--stores, see
+utils/session_store.py); the memory store is measured without its snapshot
+thread, so its numbers are the per-operation cost only. Results are printed
+as a table and, with --out, written as JSON (one record per
+store/size/groups/operation) for comparison across builds and backends.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+BOT_ID = "bench"
+
+
+class NullBot:
+    """Accepts any Bot API call; store_group_message only needs it for warnings."""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: SimpleNamespace(message_id=0)
+
+
+def _message(group_id, user_id):
+    return SimpleNamespace(
+        message_id=0,
+        chat=SimpleNamespace(id=group_id),
+        from_user=SimpleNamespace(id=user_id, first_name="Bench", username=None),
+    )
+
+
+def _entry(number, user_id):
+    return {
+        "number": number,
+        "user_id": user_id,
+        "username": f"tg_{user_id}",
+        "first_name": f"Name {user_id}",
+        "link": f"https://x.com/x_{user_id}/status/{user_id}",
+        "x_username": f"x_{user_id}",
+        "check": False,
+    }
+
+
+def seed(gs, size: int, groups: int):
+    """Write a verifying session with `groups` groups of `size` entries each."""
+    gids = [str(-1008000000000 - g) for g in range(groups)]
+    group_messages = {
+        gid: [_entry(i + 1, 1_000_000 + i) for i in range(size)] for gid in gids
+    }
+    gs._set(BOT_ID, "active_groups", {gid: "verifying" for gid in gids})
+    gs._set(BOT_ID, "group_messages", group_messages)
+    gs._set(BOT_ID, "sr_requested_users", {gid: [] for gid in gids})
+    gs._set(BOT_ID, "unique_x_usernames",
+            {gid: [e["x_username"] for e in group_messages[gid]] for gid in gids})
+    for gid in gids:
+        gs.rebuild_session_stats(BOT_ID, gid)
+        gs.bump_session_version(BOT_ID, gid)
+    return int(gids[0])
+
+
+def _time(fn, args_list):
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_config(gs, store: str, size: int, groups: int, repeat: int):
+    bot = NullBot()
+    gid = seed(gs, size, groups)
+    existing = [1_000_000 + i for i in range(min(repeat, size))]
+    new_users = [2_000_000 + i for i in range(repeat)]
+
+    ops = [
+        ("store_group_message", gs.store_group_message, [
+            (bot, BOT_ID, _message(gid, u), gid, u, None,
+             f"https://x.com/new_{u}/status/1", None, "Bench")
+            for u in new_users]),
+        ("mark_user_verified", gs.mark_user_verified,
+         [(BOT_ID, gid, u) for u in existing]),
+        ("get_unverified_users", gs.get_unverified_users,
+         [(BOT_ID, gid)] * repeat),
+        ("get_formatted_user_link_list", gs.get_formatted_user_link_list,
+         [(BOT_ID, gid)] * repeat),
+        ("get_all_links_count", gs.get_all_links_count,
+         [(BOT_ID, gid)] * repeat),
+        ("delete_user_link", gs.delete_user_link,
+         [(BOT_ID, gid, u) for u in existing]),
+    ]
+
+    results = []
+    for name, fn, args_list in ops:
+        samples = _time(fn, args_list)
+        results.append({
+            "store": store,
+            "op": name,
+            "entries_per_group": size,
+            "groups": groups,
+            "runs": len(samples),
+            "mean_ms": round(statistics.mean(samples) * 1000, 3),
+            "p50_ms": round(statistics.median(samples) * 1000, 3),
+            "max_ms": round(max(samples) * 1000, 3),
+        })
+
+    gs.get_store().delete_session(BOT_ID)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,100,1000,10000", help="entries per group")
+    parser.add_argument("--groups", default="1,10,50", help="concurrent groups per bot")
+    parser.add_argument("--repeat", type=int, default=20, help="calls per operation")
+    parser.add_argument("--max-entries", type=int, default=100_000,
+                        help="skip combinations with more total entries than this")
+    parser.add_argument("--out", help="write JSON results to this file")
+    parser.add_argument("--fake", action="store_true", help="use fakeredis instead of REDIS_HOST")
+    parser.add_argument("--stores", default="redis,memory", help="session stores to compare")
+    args = parser.parse_args()
+
+    os.environ.setdefault("ADMIN_BOT_TOKEN", "1:BENCH")
+    if args.fake:
+        import fakeredis
+        import utils.redis_client as rc
+        server = fakeredis.FakeServer()
+        rc._redis = fakeredis.FakeRedis(server=server, decode_responses=True)
+        rc._redis_raw = fakeredis.FakeRedis(server=server, decode_responses=False)
+
+    from utils import group_session as gs
+    from utils import session_store
+
+    sizes = [int(x) for x in args.sizes.split(",")]
+    group_counts = [int(x) for x in args.groups.split(",")]
+
+    results = []
+    print(f"{'store':<7} {'op':<30} {'entries':>8} {'groups':>6} {'mean ms':>10} {'p50 ms':>10}")
+    for store in args.stores.split(","):
+        session_store._store = session_store.create_store(store)
+        for groups in group_counts:
+            for size in sizes:
+                if size * groups > args.max_entries:
+                    print(f"(skipped {size} x {groups}: over --max-entries)")
+                    continue
+                for row in bench_config(gs, store, size, groups, args.repeat):
+                    results.append(row)
+                    print(f"{store:<7} {row['op']:<30} {size:>8} {groups:>6} "
+                          f"{row['mean_ms']:>10} {row['p50_ms']:>10}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({
+                "backend": "fakeredis" if args.fake else os.getenv("REDIS_HOST", "localhost"),
+                "python": platform.python_version(),
+                "timestamp": int(time.time()),
+                "results": results,
+            }, f, indent=2)
+        print(f"wrote {len(results)} results to {args.out}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
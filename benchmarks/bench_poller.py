@@ -0,0 +1,144 @@
+"""
+Link submissions through the webhook path versus the getUpdates poller.
+
+    python -m benchmarks.bench_poller [--bots 2] [--groups 5] [--links 200] [--json]
+
+Seeds two identical sets of bots, opens a session in every group, then
+delivers --links link drops per group: once as one POST /webhook/{bot_id}
+each, once through utils.poller (batches of up to POLL_LIMIT from a stub
+getUpdates). Reports throughput and the Redis commands issued, which is
+where batched_writes() shows. Uses fakeredis/mongomock like load_webhook.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+from benchmarks.load_webhook import (
+    ADMIN_USER_ID, StubBotAPI, Traffic, _op_counts, run_phase, seed_bots, use_fake_redis, use_mongomock,
+)
+
+_queues = {}  # token -> pending updates
+_queues_lock = threading.Lock()
+
+
+class PollingStubAPI(StubBotAPI):
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # long-poll cancelled at shutdown
+
+    def _result(self, method, params):
+        if method != "getUpdates":
+            return super()._result(method, params)
+        token = self.path.split("/")[1][3:]
+        offset = int(params.get("offset", ["0"])[0])
+        limit = int(params.get("limit", ["100"])[0])
+        with _queues_lock:
+            queue = [u for u in _queues.get(token, []) if u["update_id"] >= offset]
+            _queues[token] = queue
+        if not queue:
+            time.sleep(0.05)  # a short long-poll
+        return queue[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bots", type=int, default=2)
+    parser.add_argument("--groups", type=int, default=5, help="groups per bot")
+    parser.add_argument("--links", type=int, default=200, help="link submissions per group")
+    parser.add_argument("--json", action="store_true", help="print one JSON document")
+    args = parser.parse_args()
+
+    os.environ.setdefault("ADMIN_BOT_TOKEN", "1:LOADTEST")
+    os.environ["INGEST_MODE"] = "polling"
+    use_mongomock()
+    use_fake_redis()
+
+    from http.server import ThreadingHTTPServer
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PollingStubAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    from telebot import apihelper
+    apihelper.API_URL = f"http://127.0.0.1:{server.server_port}/bot{{0}}/{{1}}"
+
+    import main as app_module
+    app_module.start_background()  # what post_fork does in a gunicorn worker
+    from utils import db, poller
+    from utils.group_session import get_group_messages
+    from utils.metrics import REDIS_LATENCY
+
+    conn = db.init_db()
+    plans = {"webhook": seed_bots(conn, args.bots, args.groups), "polling": seed_bots(conn, args.bots, args.groups)}
+    tokens = {str(doc["_id"]): doc["token"] for doc in db.list_bots()}
+    client = app_module.app.test_client()
+    traffic = Traffic()
+    users = [10_000 + i for i in range(args.links)]
+
+    def per_group(plan, make):
+        return [(bot_id, u) for bot_id, gids in plan.items() for gid in gids for u in make(gid)]
+
+    for plan in plans.values():
+        run_phase(client, "start", per_group(plan, lambda gid: [traffic.update(gid, ADMIN_USER_ID, "/start")]), 1)
+
+    def links(plan):
+        return per_group(plan, lambda gid: [
+            traffic.update(gid, u, f"https://x.com/xuser{u}/status/{u}") for u in users])
+
+    results = {}
+
+    before = _op_counts(REDIS_LATENCY)
+    phase = run_phase(client, "links", links(plans["webhook"]), 1)
+    results["webhook"] = {"seconds": phase["seconds"], "redis": _op_delta(before, _op_counts(REDIS_LATENCY))}
+
+    requests = links(plans["polling"])
+    last = {}
+    with _queues_lock:
+        for bot_id, update in requests:
+            _queues.setdefault(tokens[bot_id], []).append(update)
+            last[bot_id] = update["update_id"]
+
+    async def drain():
+        stop = asyncio.Event()
+        task = asyncio.create_task(poller.run(stop))
+        while any(poller.load_offset(bot_id) <= update_id for bot_id, update_id in last.items()):
+            await asyncio.sleep(0.02)
+        stop.set()
+        await task
+
+    before = _op_counts(REDIS_LATENCY)
+    start = time.perf_counter()
+    asyncio.run(drain())
+    results["polling"] = {"seconds": round(time.perf_counter() - start, 3),
+                          "redis": _op_delta(before, _op_counts(REDIS_LATENCY))}
+
+    stored = {mode: sum(len(get_group_messages(bot_id, gid)) for bot_id, gids in plan.items() for gid in gids)
+              for mode, plan in plans.items()}
+    total = len(requests)
+    for mode, r in results.items():
+        r.update(links=total, stored=stored[mode], throughput=round(total / r["seconds"], 1),
+                 redis_per_link=round(sum(r["redis"].values()) / total, 2))
+    report = {"config": vars(args), "results": results, "lag": json.loads(
+        (poller._r.hget(poller.STATUS_KEY, next(iter(plans["polling"]))) or "{}"))}
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{total} link drops per mode ({args.bots} bots x {args.groups} groups x {args.links})\n")
+    print(f"{'mode':<9} {'links/s':>9} {'stored':>7} {'redis/link':>11}  top commands")
+    for mode, r in results.items():
+        top = sorted(r["redis"].items(), key=lambda item: -item[1])[:5]
+        print(f"{mode:<9} {r['throughput']:>9} {r['stored']:>7} {r['redis_per_link']:>11}  {dict(top)}")
+    print(f"\npoll status (one bot): {report['lag']}")
+
+
+def _op_delta(before, after):
+    return {op: n - before.get(op, 0) for op, n in after.items() if n - before.get(op, 0)}
+
+
+if __name__ == "__main__":
+    sys.exit(main())
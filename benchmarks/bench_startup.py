@@ -0,0 +1,101 @@
+"""
+Worker boot cost: how long a fresh process takes to import main.py and serve
+its first request.
+
+    python -m benchmarks.bench_startup [--runs 10] [--migrate] [--json]
+
+Run from the repo root. Every run is a new interpreter (what a gunicorn
+worker pays on a cold start without --preload). Imports must not touch the
+network, so this works without Redis/Mongo; --migrate additionally times
+`python -m utils.migrate` (index creation, needs MONGODB_URI reachable),
+which is the cost that used to be paid by every worker at import.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROBE = r"""
+import json, os, resource, threading, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+client = main.app.test_client()
+resp = client.get("/")
+t2 = time.perf_counter()
+print("PROBE", json.dumps({
+    "import_s": t1 - t0,
+    "first_request_s": t2 - t1,
+    "status": resp.status_code,
+    "threads": threading.active_count(),
+    "maxrss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}), flush=True)
+os._exit(0)  # boot cost only, skip the shutdown drain
+"""
+
+
+def run_probe(env):
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", PROBE], env=env, capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - start
+    # background threads may print too; pick the probe's own line
+    line = next(l for l in out.stdout.splitlines() if l.startswith("PROBE "))
+    result = json.loads(line[len("PROBE "):])
+    result["process_s"] = wall
+    return result
+
+
+def _summary(values):
+    return {
+        "mean_ms": round(statistics.mean(values) * 1000, 1),
+        "p50_ms": round(statistics.median(values) * 1000, 1),
+        "max_ms": round(max(values) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--migrate", action="store_true", help="also time python -m utils.migrate")
+    parser.add_argument("--json", action="store_true", help="print one JSON document")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("ADMIN_BOT_TOKEN", "1:BENCH")
+
+    run_probe(env)  # warm the bytecode cache, like a deploy after the first boot
+    runs = [run_probe(env) for _ in range(args.runs)]
+    report = {
+        "runs": args.runs,
+        "python": sys.version.split()[0],
+        "import": _summary([r["import_s"] for r in runs]),
+        "first_request": _summary([r["first_request_s"] for r in runs]),
+        "process": _summary([r["process_s"] for r in runs]),
+        "threads_after_first_request": runs[-1]["threads"],
+        "maxrss_mb": round(statistics.mean(r["maxrss_mb"] for r in runs), 1),
+    }
+
+    if args.migrate:
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "utils.migrate"], env=env, check=True, capture_output=True)
+        report["migrate"] = {"seconds": round(time.perf_counter() - start, 3)}
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'stage':<16} {'mean ms':>9} {'p50 ms':>9} {'max ms':>9}")
+    for stage in ("import", "first_request", "process"):
+        s = report[stage]
+        print(f"{stage:<16} {s['mean_ms']:>9} {s['p50_ms']:>9} {s['max_ms']:>9}")
+    print(f"\nthreads after first request: {report['threads_after_first_request']}, "
+          f"max RSS: {report['maxrss_mb']} MB")
+    if "migrate" in report:
+        print(f"migrate (once per deploy): {report['migrate']['seconds']}s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+Throughput of real gunicorn deployments across worker/thread layouts.
+
+    python -m benchmarks.bench_workers --grid 1x8,2x4,4x2 [--requests 2000]
+        [--concurrency 32] [--no-preload] [--json]
+
+Needs a real Redis (REDIS_HOST/REDIS_PORT/REDIS_DB, use a scratch DB) and
+MongoDB (MONGODB_URI, a scratch MONGO_DB): unlike load_webhook this spawns
+separate worker processes, which cannot share fakeredis/mongomock.
+For every layout it boots `gunicorn -c gunicorn.conf.py` against
+benchmarks.stub_app (main.app with the Bot API pointed at a local stub),
+replays link-drop traffic over HTTP and reports req/s, latency percentiles,
+worker RSS and how long SIGTERM took (job drain included).
+"""
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.load_webhook import ADMIN_USER_ID, StubBotAPI, Traffic, seed_bots, start_stub_api, _percentile
+
+
+def _worker_rss_mb(master_pid: int) -> float:
+    """Sum of RSS over the master's children (Linux /proc)."""
+    total_kb = 0
+    try:
+        children = open(f"/proc/{master_pid}/task/{master_pid}/children").read().split()
+    except OSError:
+        return 0.0
+    for pid in children:
+        try:
+            for line in open(f"/proc/{pid}/status"):
+                if line.startswith("VmRSS:"):
+                    total_kb += int(line.split()[1])
+        except OSError:
+            pass
+    return round(total_kb / 1024, 1)
+
+
+def _wait_healthy(url: str, timeout: float = 30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(url, timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"gunicorn did not come up at {url}")
+
+
+def run_layout(workers, threads, port, env, plan, traffic, args):
+    env = dict(env, WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads),
+               PORT=str(port), GUNICORN_PRELOAD="0" if args.no_preload else "1")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "benchmarks.stub_app:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        boot_start = time.perf_counter()
+        _wait_healthy(base + "/")
+        boot = time.perf_counter() - boot_start
+
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency)
+        session.mount("http://", adapter)
+
+        def post(item):
+            bot_id, update = item
+            start = time.perf_counter()
+            resp = session.post(f"{base}/webhook/{bot_id}", json=update, timeout=30)
+            return time.perf_counter() - start, resp.status_code
+
+        # one session per group, then links spread round-robin over the groups
+        groups = [(bot_id, gid) for bot_id, gids in plan.items() for gid in gids]
+        for bot_id, gid in groups:
+            post((bot_id, traffic.update(gid, ADMIN_USER_ID, "/start")))
+        work = []
+        for i in range(args.requests):
+            bot_id, gid = groups[i % len(groups)]
+            uid = 100_000 + i
+            work.append((bot_id, traffic.update(gid, uid, f"https://x.com/u{uid}/status/{uid}")))
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(post, work))
+        wall = time.perf_counter() - start
+        rss = _worker_rss_mb(proc.pid)
+        for bot_id, gid in groups:
+            post((bot_id, traffic.update(gid, ADMIN_USER_ID, "/end")))
+    finally:
+        stop_start = time.perf_counter()
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=120)
+        shutdown = time.perf_counter() - stop_start
+
+    latencies = [r[0] for r in results]
+    return {
+        "layout": f"{workers}x{threads}",
+        "preload": not args.no_preload,
+        "requests": len(work),
+        "throughput": round(len(work) / wall, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "errors": sum(1 for r in results if r[1] != 200),
+        "boot_s": round(boot, 2),
+        "shutdown_s": round(shutdown, 2),
+        "workers_rss_mb": rss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--grid", default="1x8,2x4,4x2", help="comma-separated WORKERSxTHREADS")
+    parser.add_argument("--bots", type=int, default=2)
+    parser.add_argument("--groups", type=int, default=5, help="groups per bot")
+    parser.add_argument("--requests", type=int, default=2000, help="link submissions per layout")
+    parser.add_argument("--concurrency", type=int, default=32, help="parallel HTTP clients")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--no-preload", action="store_true")
+    parser.add_argument("--json", action="store_true", help="print one JSON document")
+    args = parser.parse_args()
+
+    os.environ.setdefault("ADMIN_BOT_TOKEN", "1:BENCH")
+    os.environ.setdefault("MONGO_DB", "twitter_link_store_bench")
+
+    server = start_stub_api()
+    env = dict(os.environ, TELEGRAM_API_URL=f"http://127.0.0.1:{server.server_port}/bot{{0}}/{{1}}")
+
+    from utils import db
+    plan = seed_bots(db.init_db(), args.bots, args.groups)
+    traffic = Traffic()
+
+    results = []
+    for layout in args.grid.split(","):
+        workers, threads = (int(x) for x in layout.lower().split("x"))
+        results.append(run_layout(workers, threads, args.port, env, plan, traffic, args))
+
+    report = {"config": vars(args), "results": results, "bot_api_calls": dict(StubBotAPI.calls)}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'layout':<8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'err':>5} {'boot s':>7} {'stop s':>7} {'RSS MB':>8}")
+    for r in results:
+        print(f"{r['layout']:<8} {r['throughput']:>8} {r['p50_ms']:>8} {r['p99_ms']:>8} {r['errors']:>5} "
+              f"{r['boot_s']:>7} {r['shutdown_s']:>7} {r['workers_rss_mb']:>8}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
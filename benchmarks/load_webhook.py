@@ -0,0 +1,309 @@
+"""
+Replay synthetic session traffic against webhook_child and report throughput,
+latency percentiles and Redis/Mongo/Bot API call counts.
+
+    python -m benchmarks.load_webhook --bots 2 --groups 5 --links 200 [--concurrency 8]
+    python -m benchmarks.load_webhook --redis --mongo-uri mongodb://localhost:27017
+
+Run from the repo root. Without --redis / --mongo-uri it uses fakeredis and
+mongomock, which is enough to compare builds with each other but not with
+production numbers. The Bot API is always a local stub server.
+
+Each group goes through: --chatter plain messages while idle, /start,
+N link drops, /close, /verify, an "ad" wave (--ad-ratio of the users),
+/unsafe, /clear. With --ad-digest N the "ad" acks are coalesced per group
+(AD_DIGEST_WINDOW=N); the digest timers are fired right after the wave.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import Counter as Tally
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+ADMIN_USER_ID = 1
+
+
+# === Stub Bot API ===
+class StubBotAPI(BaseHTTPRequestHandler):
+    calls = Tally()
+    _lock = threading.Lock()
+    _next_id = 1
+
+    def _message_id(self):
+        with StubBotAPI._lock:
+            StubBotAPI._next_id += 1
+            return StubBotAPI._next_id
+
+    def _result(self, method, params):
+        chat_id = int(params.get("chat_id", ["0"])[0] or 0)
+        chat = {"id": chat_id, "type": "supergroup", "title": f"Group {chat_id}"}
+        if method == "getChatAdministrators":
+            return [{"status": "creator", "is_anonymous": False,
+                     "user": {"id": ADMIN_USER_ID, "is_bot": False, "first_name": "Admin"}}]
+        if method == "getChat":
+            return chat
+        if method == "getWebhookInfo":
+            return {"url": "", "has_custom_certificate": False, "pending_update_count": 0}
+        if method == "getMe":
+            return {"id": 42, "is_bot": True, "first_name": "Stub", "username": "stub_bot"}
+        if method.startswith(("send", "edit")):
+            return {"message_id": self._message_id(), "date": int(time.time()), "chat": chat}
+        return True
+
+    def _handle(self):
+        url = urlparse(self.path)
+        method = url.path.rsplit("/", 1)[-1]
+        params = parse_qs(url.query)
+        length = int(self.headers.get("content-length") or 0)
+        body = self.rfile.read(length) if length else b""
+        if body and "multipart" not in (self.headers.get("content-type") or ""):
+            params.update(parse_qs(body.decode()))
+        with StubBotAPI._lock:
+            StubBotAPI.calls[method] += 1
+
+        payload = json.dumps({"ok": True, "result": self._result(method, params)}).encode()
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = _handle
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_api():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubBotAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# === Backends ===
+def use_fake_redis():
+    import fakeredis
+    import utils.redis_client as rc
+
+    # keep per-command metrics so op counts work with fakeredis too
+    class TimedFakeRedis(rc._TimedRedis, fakeredis.FakeRedis):
+        pass
+
+    server = fakeredis.FakeServer()
+    rc._redis = TimedFakeRedis(server=server, decode_responses=True)
+    rc._redis_raw = TimedFakeRedis(server=server, decode_responses=False)
+
+
+def use_mongomock():
+    import mongomock
+    import pymongo
+    from utils.metrics import MONGO_LATENCY
+
+    # mongomock has no command monitoring; time the collection methods we use.
+    # Some call each other (find_one -> find), so only the outermost counts.
+    local = threading.local()
+    for name in ("find", "find_one", "insert_one", "update_one", "delete_one",
+                 "find_one_and_update", "create_index"):
+        original = getattr(mongomock.collection.Collection, name)
+
+        def timed(self, *args, _original=original, _name=name, **kwargs):
+            if getattr(local, "busy", False):
+                return _original(self, *args, **kwargs)
+            local.busy = True
+            try:
+                with MONGO_LATENCY.time(_name):
+                    return _original(self, *args, **kwargs)
+            finally:
+                local.busy = False
+        setattr(mongomock.collection.Collection, name, timed)
+
+    pymongo.MongoClient = mongomock.MongoClient
+
+
+# === Traffic ===
+class Traffic:
+    def __init__(self):
+        self._update_id = 0
+        self._lock = threading.Lock()
+
+    def update(self, chat_id, user_id, text):
+        with self._lock:
+            self._update_id += 1
+            uid = self._update_id
+        return {
+            "update_id": uid,
+            "message": {
+                "message_id": uid,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "supergroup", "title": f"Group {chat_id}"},
+                "from": {"id": user_id, "is_bot": False,
+                         "first_name": f"User{user_id}", "username": f"user{user_id}"},
+                "text": text,
+            },
+        }
+
+
+def seed_bots(db, bots: int, groups: int):
+    from utils.group_manager import save_allowed_groups
+
+    plan = {}
+    for b in range(bots):
+        bot_id = str(db["bots"].insert_one({
+            "token": f"{100000 + b}:LOADTEST", "name": f"load_bot_{b}",
+            "status": "enabled", "webhook_url": None,
+        }).inserted_id)
+        gids = [-1009000000000 - b * 1000 - g for g in range(groups)]
+        save_allowed_groups(bot_id, gids)
+        plan[bot_id] = gids
+    return plan
+
+
+def run_phase(client, name, requests, concurrency):
+    """POST every (bot_id, update) and summarize throughput and latency."""
+    latencies = []
+    errors = Tally()
+
+    def post(item):
+        bot_id, update = item
+        start = time.perf_counter()
+        resp = client.post(f"/webhook/{bot_id}", data=json.dumps(update),
+                           content_type="application/json")
+        elapsed = time.perf_counter() - start
+        if resp.status_code != 200:
+            errors[resp.status_code] += 1
+        return elapsed
+
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(post, requests))
+    else:
+        latencies = [post(item) for item in requests]
+    wall = time.perf_counter() - start
+
+    return {
+        "phase": name,
+        "requests": len(requests),
+        "seconds": round(wall, 3),
+        "throughput": round(len(requests) / wall, 1) if wall else 0,
+        "p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else 0,
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2) if latencies else 0,
+        "errors": dict(errors),
+    }
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _op_counts(histogram):
+    return {labels[0]: count for labels, count in histogram.counts().items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bots", type=int, default=2)
+    parser.add_argument("--groups", type=int, default=5, help="groups per bot")
+    parser.add_argument("--links", type=int, default=100, help="link submissions per group")
+    parser.add_argument("--chatter", type=int, default=20, help="plain chat messages per group, before /start")
+    parser.add_argument("--ad-ratio", type=float, default=0.9, help="share of users that send 'ad'")
+    parser.add_argument("--concurrency", type=int, default=1, help="parallel requests (gunicorn threads)")
+    parser.add_argument("--ad-digest", type=int, default=0, help="AD_DIGEST_WINDOW seconds (0 = reply per ack)")
+    parser.add_argument("--redis", action="store_true", help="use REDIS_HOST instead of fakeredis")
+    parser.add_argument("--mongo-uri", help="use a real MongoDB instead of mongomock")
+    parser.add_argument("--json", action="store_true", help="print one JSON document")
+    args = parser.parse_args()
+
+    os.environ.setdefault("ADMIN_BOT_TOKEN", "1:LOADTEST")
+    os.environ["AD_DIGEST_WINDOW"] = str(args.ad_digest)
+    if args.mongo_uri:
+        os.environ["MONGODB_URI"] = args.mongo_uri
+        os.environ.setdefault("MONGO_DB", "twitter_link_store_loadtest")
+    else:
+        use_mongomock()
+    if not args.redis:
+        use_fake_redis()
+
+    server = start_stub_api()
+    from telebot import apihelper
+    apihelper.API_URL = f"http://127.0.0.1:{server.server_port}/bot{{0}}/{{1}}"
+
+    import main as app_module
+    app_module.start_background()  # what post_fork does in a gunicorn worker
+    from utils import db
+    from utils import scheduler
+    from utils.metrics import REDIS_LATENCY, MONGO_LATENCY, GROUP_PREFILTER, AD_DIGEST
+
+    plan = seed_bots(db.init_db(), args.bots, args.groups)
+    client = app_module.app.test_client()
+    traffic = Traffic()
+
+    users = [10_000 + i for i in range(args.links)]
+    ad_users = users[: int(len(users) * args.ad_ratio)]
+
+    def per_group(make):
+        return [(bot_id, u) for bot_id, gids in plan.items() for gid in gids for u in make(gid)]
+
+    phases = [
+        ("idle_chat", per_group(lambda gid: [
+            traffic.update(gid, u, f"gm {i}") for i, u in enumerate(users[: args.chatter])])),
+        ("start", per_group(lambda gid: [traffic.update(gid, ADMIN_USER_ID, "/start")])),
+        ("links", per_group(lambda gid: [
+            traffic.update(gid, u, f"https://x.com/xuser{u}/status/{u}") for u in users])),
+        ("close", per_group(lambda gid: [traffic.update(gid, ADMIN_USER_ID, "/close")])),
+        ("verify", per_group(lambda gid: [traffic.update(gid, ADMIN_USER_ID, "/verify")])),
+        ("ad_wave", per_group(lambda gid: [traffic.update(gid, u, "ad") for u in ad_users])),
+        ("unsafe", per_group(lambda gid: [traffic.update(gid, ADMIN_USER_ID, "/unsafe")])),
+        ("clear", per_group(lambda gid: [traffic.update(gid, ADMIN_USER_ID, "/clear")])),
+    ]
+
+    results = []
+    total_start = time.perf_counter()
+    total_requests = 0
+    for name, requests in phases:
+        results.append(run_phase(client, name, requests, args.concurrency))
+        total_requests += len(requests)
+        if name == "ad_wave" and args.ad_digest:
+            scheduler.run_due(time.time() + args.ad_digest)  # flush the digests now
+    total_wall = time.perf_counter() - total_start
+
+    report = {
+        "config": vars(args),
+        "phases": results,
+        "total": {"requests": total_requests, "seconds": round(total_wall, 3),
+                  "throughput": round(total_requests / total_wall, 1)},
+        "redis_ops": _op_counts(REDIS_LATENCY),
+        "mongo_ops": _op_counts(MONGO_LATENCY),
+        "bot_api_calls": dict(StubBotAPI.calls),
+        "prefilter_exits": {labels[0]: count for labels, count in GROUP_PREFILTER.values().items()},
+        "ad_digest": {labels[0]: count for labels, count in AD_DIGEST.values().items()},
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'phase':<10} {'reqs':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}  errors")
+    for r in results:
+        print(f"{r['phase']:<10} {r['requests']:>7} {r['throughput']:>9} "
+              f"{r['p50_ms']:>8} {r['p99_ms']:>8}  {r['errors'] or ''}")
+    t = report["total"]
+    print(f"{'total':<10} {t['requests']:>7} {t['throughput']:>9}")
+    print(f"\nredis ops: {sum(report['redis_ops'].values())} {report['redis_ops']}")
+    print(f"mongo ops: {sum(report['mongo_ops'].values())} {report['mongo_ops']}")
+    print(f"bot api:   {sum(report['bot_api_calls'].values())} {report['bot_api_calls']}")
+    print(f"prefilter: {report['prefilter_exits']}")
+    if args.ad_digest:
+        print(f"ad digest: {report['ad_digest']}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
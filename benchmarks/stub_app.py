@@ -0,0 +1,13 @@
+"""
+main.app with the Bot API redirected to TELEGRAM_API_URL (a local stub),
+for benchmarks that run the app under a real gunicorn (bench_workers).
+
+    TELEGRAM_API_URL=http://127.0.0.1:8081/bot{0}/{1} gunicorn -c gunicorn.conf.py benchmarks.stub_app:app
+"""
+import os
+
+from telebot import apihelper
+
+apihelper.API_URL = os.environ["TELEGRAM_API_URL"]
+
+from main import app  # noqa: E402
@@ -13,8 +13,87 @@ class Settings:
     BASE_URL: str = os.getenv("WEBHOOK_BASE_URL", "")
 
     ADMIN_TELEGRAM_USER_ID: int = int(os.getenv("ADMIN_TELEGRAM_USER_ID", "0"))
+    # Bearer token for /metrics, /errors, /webhooks, /telegram (unset = 403)
     INGRESS_SECRET: str = os.getenv("INGRESS_SECRET", "")
 
+    # Connection pools, per worker process (see README: worker model)
+    MONGO_MAX_POOL_SIZE: int = int(os.getenv("MONGO_MAX_POOL_SIZE", "16"))
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", "16"))
+    REDIS_POOL_TIMEOUT: int = int(os.getenv("REDIS_POOL_TIMEOUT", "5"))   # wait for a free connection
+
+    # Redis lifecycle (seconds)
+    WIZARD_TTL: int = int(os.getenv("WIZARD_TTL", "900"))                    # pending admin wizard step
+    SESSION_IDLE_TTL: int = int(os.getenv("SESSION_IDLE_TTL", str(3 * 86400)))  # idle session -> archived
+    SWEEP_INTERVAL: int = int(os.getenv("SWEEP_INTERVAL", "600"))
+
+    # Session state backend (see utils/session_store.py): "redis", or "memory"
+    # for a single process, written behind to Redis every SESSION_SNAPSHOT_INTERVAL
+    SESSION_STORE: str = os.getenv("SESSION_STORE", "redis")
+    SESSION_SNAPSHOT_INTERVAL: float = float(os.getenv("SESSION_SNAPSHOT_INTERVAL", "5"))
+
+    # Mongo copies of changed session groups, for recovery after Redis loss
+    # (see utils/session_snapshots.py); at most MONGO_SNAPSHOT_BATCH groups per pass
+    MONGO_SNAPSHOT_INTERVAL: int = int(os.getenv("MONGO_SNAPSHOT_INTERVAL", "60"))
+    MONGO_SNAPSHOT_BATCH: int = int(os.getenv("MONGO_SNAPSHOT_BATCH", "500"))
+
+    # Bot API calls (see utils/bot_api.py): 429 retries and the total seconds a
+    # call may wait for them; consecutive failures that open a bot's breaker,
+    # and how long a breaker stays open (also for blocked/kicked chats)
+    TG_MAX_RETRIES: int = int(os.getenv("TG_MAX_RETRIES", "2"))
+    TG_MAX_RETRY_WAIT: float = float(os.getenv("TG_MAX_RETRY_WAIT", "5"))
+    TG_BREAKER_THRESHOLD: int = int(os.getenv("TG_BREAKER_THRESHOLD", "5"))
+    TG_BREAKER_COOLDOWN: int = int(os.getenv("TG_BREAKER_COOLDOWN", "30"))
+
+    # Error reporting (see utils/error_reporter.py)
+    DEV_CHAT_ID: int = int(os.getenv("DEV_CHAT_ID", "1443989714"))
+    ERROR_DIGEST_INTERVAL: int = int(os.getenv("ERROR_DIGEST_INTERVAL", "60"))
+
+    # Background jobs (see utils/jobs.py)
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))                # worker threads per process
+    JOB_LEASE: int = int(os.getenv("JOB_LEASE", "120"))                  # seconds without a checkpoint -> re-queued
+    JOB_DRAIN_TIMEOUT: int = int(os.getenv("JOB_DRAIN_TIMEOUT", "20"))   # wait for running jobs on shutdown
+
+    # Session phase timers (seconds, 0 = manual /close and /verify only)
+    AUTO_CLOSE_AFTER: int = int(os.getenv("AUTO_CLOSE_AFTER", "0"))     # after /start
+    AUTO_VERIFY_AFTER: int = int(os.getenv("AUTO_VERIFY_AFTER", "0"))   # after close
+    SCHEDULER_POLL: float = float(os.getenv("SCHEDULER_POLL", "2"))
+
+    # "ad" wave digest (see utils/ad_digest.py): seconds to collect verified
+    # users into one message per group (0 = reply to each), and max users per message
+    AD_DIGEST_WINDOW: int = int(os.getenv("AD_DIGEST_WINDOW", "0"))
+    AD_DIGEST_MAX: int = int(os.getenv("AD_DIGEST_MAX", "25"))
+
+    # Bot warnings deleted after a per-kind TTL (see utils/auto_delete.py), e.g.
+    # "admin_only=30,fraud=600"; unlisted kinds keep their default, 0 = keep until /clear
+    WARNING_TTLS: dict = field(
+        default_factory=lambda: {
+            k.strip(): int(v) for k, _, v in
+            (item.partition("=") for item in os.getenv("WARNING_TTLS", "").split(","))
+            if k.strip() and v.strip().isdigit()
+        }
+    )
+
+    # Update ingestion: "webhook", or "polling" for `python -m utils.poller`
+    # (getUpdates for every enabled bot; webhooks are then removed)
+    INGEST_MODE: str = os.getenv("INGEST_MODE", "webhook")
+    POLL_TIMEOUT: int = int(os.getenv("POLL_TIMEOUT", "25"))                # long-poll seconds
+    POLL_LIMIT: int = int(os.getenv("POLL_LIMIT", "100"))                   # updates per getUpdates (max 100)
+    POLL_DISPATCH_THREADS: int = int(os.getenv("POLL_DISPATCH_THREADS", "8"))
+    POLL_REFRESH: int = int(os.getenv("POLL_REFRESH", "60"))                # re-read the bot list
+
+    # Webhook reconciliation (see utils/webhooks.py)
+    WEBHOOK_RECONCILE_INTERVAL: int = int(os.getenv("WEBHOOK_RECONCILE_INTERVAL", "900"))
+    WEBHOOK_RECONCILE_CONCURRENCY: int = int(os.getenv("WEBHOOK_RECONCILE_CONCURRENCY", "16"))
+    # parallel deliveries Telegram may open per bot; 0 = WEB_CONCURRENCY x GUNICORN_THREADS
+    WEBHOOK_MAX_CONNECTIONS: int = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "0"))
+
+    # Seconds between checks for admin edits to a bot's command table
+    COMMAND_TABLE_CHECK: float = float(os.getenv("COMMAND_TABLE_CHECK", "5"))
+
+    # Seconds between group metadata (title/username) writes per group;
+    # changes are written immediately
+    GROUP_METADATA_REFRESH: int = int(os.getenv("GROUP_METADATA_REFRESH", "3600"))
+
     # Use default_factory for mutable list
     ADMIN_IDS: list[int] = field(
         default_factory=lambda: [
@@ -25,8 +104,10 @@ class Settings:
 settings = Settings()
 
 # --- Runtime checks ---
+# Warn only: importing config must work without secrets (tests, migrations,
+# benchmarks). The admin bot raises when it is first used without a token.
 if not settings.ADMIN_BOT_TOKEN:
-    raise RuntimeError("❌ ADMIN_BOT_TOKEN missing in .env")
+    print("[config] ⚠️ Warning: ADMIN_BOT_TOKEN missing — the admin bot is disabled.")
 
 if not settings.BASE_URL:
     print("[config] ⚠️ Warning: WEBHOOK_BASE_URL missing — child webhooks won’t be auto-set.")
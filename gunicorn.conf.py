@@ -0,0 +1,39 @@
+# gunicorn.conf.py
+# gunicorn main:app -c gunicorn.conf.py
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+# Import the app once in the master and fork workers from it (shared pages,
+# faster boots). Safe because importing main opens no connections and starts
+# no threads; post_fork gives every worker its own pools and background loops.
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+# SIGTERM -> stop accepting requests -> worker_exit drains background jobs.
+# Keep this above JOB_DRAIN_TIMEOUT so the drain is not cut short by SIGKILL.
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+
+
+def when_ready(server):
+    from config import settings
+    if settings.SESSION_STORE == "memory" and server.cfg.workers > 1:
+        server.log.warning(
+            "SESSION_STORE=memory with %d workers: workers will not see each other's sessions "
+            "(use WEB_CONCURRENCY=1 or SESSION_STORE=redis)", server.cfg.workers)
+
+
+def post_fork(server, worker):
+    from utils import db, redis_client
+    redis_client.reset_clients()
+    db.reset_client()
+
+    import main
+    main.start_background()
+
+
+def worker_exit(server, worker):
+    from utils import jobs, session_store
+    jobs.drain()
+    session_store.flush()
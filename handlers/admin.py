@@ -1,6 +1,7 @@
 from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
 from utils.group_manager import get_allowed_groups
 from utils.message_tracker import track_message
+from utils import error_reporter
 from config import settings
 
 def handle_manage_groups(bot, bot_id: str, message, db):
@@ -82,23 +83,8 @@ def handle_manage_groups(bot, bot_id: str, message, db):
 
 def notify_dev(bot, error, context, message=None):
     """
-    Notify developer of errors via a fixed developer chat ID.
+    Notify developer of errors (settings.DEV_CHAT_ID).
+    Errors are deduplicated and sent as a periodic digest in the background,
+    see utils/error_reporter.py.
     """
-    dev_id = 1443989714
-    user_info = ""
-    if message:
-        user = message.from_user
-        user_info = f"👤 <b>User:</b> @{user.username or 'N/A'} ({user.id})\n"
-        user_info += f"💬 <b>Chat:</b> {message.chat.id}\n"
-
-    error_message = (
-        f"⚠️ <b>Error in:</b> {context}\n"
-        f"{user_info}"
-        f"🧵 <b>Error:</b> <code>{str(error)}</code>"
-    )
-
-    try:
-        bot.send_message(dev_id, error_message, parse_mode="HTML")
-    except Exception as e:
-        print(f"[notify_dev failed] {e}")
-    print(f"[{context} ERROR] {error}")
+    error_reporter.report(bot, error, context, message)
@@ -4,6 +4,41 @@ from utils.message_tracker import track_message
 from handlers.admin import notify_dev
 from config import settings
 from utils import wizard_state
+from utils.telegram import is_user_admin
+from utils.group_session import get_list_pages, LIST_KINDS
+from utils.list_renderer import edit_page
+from telebot.apihelper import ApiTelegramException
+
+
+def handle_list_page(bot, bot_id: str, call: CallbackQuery):
+    """
+    Flip a paginated /list, /unsafe or /srlist message to another page.
+    Callback data: lpage:{kind}:{page}
+    """
+    chat_id = call.message.chat.id
+
+    if not is_user_admin(bot, chat_id, call.from_user.id):
+        bot.answer_callback_query(call.id, "❌ Only admins can use this.")
+        return
+
+    _, kind, page = call.data.split(":")
+    if kind not in LIST_KINDS:
+        bot.answer_callback_query(call.id, "❓ Unknown list.")
+        return
+
+    pages = get_list_pages(bot_id, chat_id, kind)
+    if not pages:
+        bot.answer_callback_query(call.id, "ℹ️ This list is empty now.")
+        return
+
+    # list may have shrunk since the buttons were rendered
+    page = min(int(page), len(pages) - 1)
+    try:
+        edit_page(bot, chat_id, call.message.message_id, kind, pages, page)
+    except ApiTelegramException as e:
+        if "message is not modified" not in str(e):
+            raise
+    bot.answer_callback_query(call.id)
 
 
 def handle_callback(bot, bot_id: str, call: CallbackQuery, db=None):
@@ -11,6 +46,10 @@ def handle_callback(bot, bot_id: str, call: CallbackQuery, db=None):
     chat_id = call.message.chat.id
 
     try:
+        if call.data.startswith("lpage:"):
+            handle_list_page(bot, bot_id, call)
+            return
+
         if not user_id in settings.ADMIN_IDS:
             bot.answer_callback_query(call.id, "Not authorized.")
             return
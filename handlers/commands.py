@@ -1,30 +1,34 @@
 import handlers.start as start
 import handlers.admin as admin
 from handlers.admin import notify_dev
-from utils.telegram import is_user_admin, set_cached_admins, mute_user, parse_duration
+from utils.telegram import is_user_admin, set_cached_admins, parse_duration
 from utils.group_session import (
     handle_add_to_ad_command,
     handle_link_command,
     handle_sr_command,
     handle_srlist_command,
     get_users_with_multiple_links,
-    get_unverified_users,
     get_unverified_users_full,
-    set_verification_phase,
-    notify_unverified_users,
+    start_verification,
+    queue_unverified_notifications,
+    queue_mute_unverified,
     get_all_links_count,
     handle_close_group,
     handle_reopen_group,
     delete_user_link,
-    get_formatted_user_link_list
+    get_group_phase,
+    get_list_pages,
+    get_session_stats,
+    send_progress_status,
 )
-from utils.message_tracker import track_message, delete_tracked_messages
-from utils.message_tracker import delete_tracked_messages_with_progress
+from utils.list_renderer import send_page
+from utils.message_tracker import track_message
+from utils.auto_delete import schedule_delete
+from utils.message_tracker import queue_clear_tracked
 from datetime import timedelta
-from telebot.types import ChatPermissions
-from utils.db import is_command_enabled, get_custom_command,get_bot_verification_text
+from utils.db import resolve_command
+from utils.metrics import HANDLER_LATENCY
 from bson import ObjectId
-import threading
 
 def handle_command(bot, bot_id: str, message, db):
     chat_id = message.chat.id
@@ -68,6 +72,7 @@ def handle_command(bot, bot_id: str, message, db):
                     "/multi — Show users with multiple links\n"
                     "/list — List users who submitted required links\n"
                     "/count — Show total number of users who submitted links\n"
+                    "/progress — Pin a live session progress status\n"
                     "/unsafe — List unverified users\n"
                     "/muteunsafe [duration] — Mute all unverified users (default 3d)\n"
                     "/muteall [duration] — Alias for /muteunsafe\n"
@@ -107,315 +112,263 @@ def handle_command(bot, bot_id: str, message, db):
         notify_dev(bot, e, "handle_command", message)
 
 
-def handle_group_command(bot, bot_id: str, message, db):
-    chat_id = message.chat.id
-    user_id = message.from_user.id
-    text = message.text.strip()
+# === Group command registry ===
+# alias -> spec, so routing a message is one dict lookup no matter how many
+# commands exist. _run_group_command is the shared middleware: enabled toggle
+# (per-bot command table), admin check, error reporting and a latency series
+# per main command. Adding a command = one decorated function below.
+#
+# Commands outside COMMAND_GROUPS (/start, /reopen, /delLink, /progress)
+# have no toggle in the admin panel and are always enabled; every other
+# alias must be listed under its main command there, or its toggle is skipped.
 
-    if "@" in text:
-        text = text.split("@")[0]
-    
-    try:
-        reply = get_custom_command(bot_id, text)
-        if reply:
-            try:
-                msg = bot.send_message(chat_id, reply, parse_mode="HTML", disable_web_page_preview=True)
-                track_message(chat_id, msg.message_id, bot_id=bot_id)
-                return
-            except Exception as e:
-                notify_dev(bot, e, f"custom command {text}", message)
+ADMIN_ONLY_TEXT = "❌ Only admins can use this command."
 
-        if text in ["/start", "/starts"]:
-            try:
-                start.handle_start_group(bot,bot_id, message)
-            except Exception as e:
-                notify_dev(bot, e, "/start (group)", message)
+_GROUP_COMMANDS = {}
 
-        elif text in ["/close", "/closes", "/stop"]:
-            try:
-                handle_close_group(bot,bot_id, message)
-            except Exception as e:
-                notify_dev(bot, e, "/close", message)
-        elif text == "/reopen":
-            try:
-                handle_reopen_group(bot,bot_id, message)
-            except Exception as e:
-                notify_dev(bot, e, "/reopen", message)
-        elif text == "/end":
-            try:
-                start.handle_cancel_group(bot,bot_id, message, db)
-            except Exception as e:
-                notify_dev(bot, e, "/end", message)
-
-        elif text == "/refresh_admins":
-            if is_user_admin(bot, chat_id, user_id):
-                try:
-                    admins = bot.get_chat_administrators(chat_id)
-                    set_cached_admins(chat_id, [admin.user.id for admin in admins])
-                    msg = bot.send_message(chat_id, "✅ Admin list refreshed.")
-                    track_message(chat_id, msg.message_id, bot_id=bot_id)
-                except Exception as e:
-                    notify_dev(bot, e, "/refresh_admins", message)
-                    try:
-                        msg = bot.send_message(chat_id, "⚠️ Failed to refresh admins.")
-                        track_message(chat_id, msg.message_id, bot_id=bot_id)
-                    except:
-                        pass
-
-        elif text == "/rule":
-            try:
-                bot_data = db.bots.find_one({"_id": ObjectId(bot_id)})
-                rules_text = bot_data.get("rules") if bot_data else None
-                if not rules_text:
-                    rules_text = (
-                        "📛📛 <b>Likes Group Rules:</b>\n\n"
-                        "💜 please follow these rules during each session:\n\n"
-                        "1️⃣ <b>Link Drop Time</b>\n"
-                        "🕐 You have 1 hour to share your tweet link in the group.\n\n"
-                        "2️⃣ <b>1 Link Per Person</b>\n"
-                        "➤ Only one post per user is allowed per session. No double Link ❌.\n\n"
-                        "3️⃣ <b>TL id</b> 🆔\n"
-                        "🔁 After 1 hour, we’ll start reposting all shared tweets on our TL account\n\n"
-                        "4️⃣ <b>Like All Posts</b>\n"
-                        "❤️ You must like all shared tweets, from top to bottom, until we post “Open” under the last tweet.\n\n"
-                        "5️⃣ <b>Mark Completion</b>\n"
-                        "✅ Once done, typing \"AD\" or \"All Done\" in the group is mandatory."
-                    )
-                msg = bot.send_message(chat_id, rules_text, parse_mode="HTML", disable_web_page_preview=True)
-                track_message(chat_id, msg.message_id, bot_id=bot_id)
-            except Exception as e:
-                notify_dev(bot, e, "/rule", message)
-
-
-        elif text in ["/verify", "/track", "/check"]:
-            if is_user_admin(bot, chat_id, user_id):
-                try:
-                    set_verification_phase(bot_id,chat_id)
-                    permissions = ChatPermissions(
-                        can_send_messages=True,
-                        can_send_media_messages=True,
-                        can_send_other_messages=True,
-                        can_add_web_page_previews=True
-                    )
-                    bot.set_chat_permissions(chat_id, permissions)
-                    msg_text = get_bot_verification_text(bot_id) or "✅ Ad tracking has started! I will track 'ad', 'all done', 'all dn', 'done' messages."
-                    msg = bot.send_message(chat_id, msg_text)
-                    track_message(chat_id, msg.message_id, bot_id=bot_id)
-                except Exception as e:
-                    notify_dev(bot, e, "/verify", message)
-            else:
-                msg = bot.send_message(chat_id, "❌ Only admins can enable verification.")
-                track_message(chat_id, msg.message_id, bot_id=bot_id)
 
-        elif text == "/count":
-            if not is_user_admin(bot, chat_id, user_id):
-                msg = bot.send_message(chat_id, "❌ Only admins can use this command.")
-                track_message(chat_id, msg.message_id, bot_id=bot_id)
-                return
-            try:
-                count = get_all_links_count(bot_id,chat_id)
-                msg = bot.send_message(chat_id, f"📊 Total Users: {count}")
-                track_message(chat_id, msg.message_id, bot_id=bot_id)
-            except Exception as e:
-                notify_dev(bot, e, "/count", message)
+def group_command(*aliases, admin=True, denied=ADMIN_ONLY_TEXT):
+    """
+    Register fn(bot, bot_id, message, args, db) under every alias; the first
+    alias names it in metrics and error reports. admin=True checks the sender
+    first and answers with `denied` (None = stay silent). Handlers that do
+    their own admin check register with admin=False.
+    """
+    def wrap(fn):
+        spec = {"name": aliases[0], "fn": fn, "admin": admin, "denied": denied}
+        for alias in aliases:
+            _GROUP_COMMANDS[alias] = spec
+        return fn
+    return wrap
 
-        elif text == "/multi":
-            if not is_user_admin(bot, chat_id, user_id):
-                msg = bot.send_message(chat_id, "❌ Only admins can use this command.")
-                track_message(chat_id, msg.message_id, bot_id=bot_id)
-                return
+
+def _reply(bot, bot_id: str, chat_id, text: str, **kwargs):
+    """Send to the group and track the message for /clear."""
+    msg = bot.send_message(chat_id, text, **kwargs)
+    track_message(chat_id, msg.message_id, bot_id=bot_id)
+    return msg
+
+
+def handle_group_command(bot, bot_id: str, message, db):
+    parts = message.text.strip().split(maxsplit=1)
+    command = parts[0].split("@")[0]
+    args = parts[1] if len(parts) > 1 else ""
+
+    route = resolve_command(bot_id, command)
+    if route and route[0] == "custom":
+        with HANDLER_LATENCY.time("custom"):
             try:
-                users = get_users_with_multiple_links(bot_id,chat_id)
-                if not users:
-                    msg = bot.send_message(chat_id, "ℹ️ No users with multiple links.")
-                    track_message(chat_id, msg.message_id, bot_id=bot_id)
-                    return
-
-                response = "<b>📊 Users with Multiple Links:</b>\n\n"
-                for user in users:
-                    name_display = f"@{user['username']}" if user.get("username") else f"ID: <code>{user['user_id']}</code>"
-                    response += f"👤 <b>{name_display}</b> — {user['count']} links\n"
-                    for idx, link in enumerate(user["links"], start=1):
-                        response += f"{idx}. {link}\n"
-                    response += "\n"
-
-                msg = bot.send_message(chat_id, response, parse_mode="HTML")
-                track_message(chat_id, msg.message_id, bot_id=bot_id)
+                _reply(bot, bot_id, message.chat.id, route[1], parse_mode="HTML", disable_web_page_preview=True)
             except Exception as e:
-                notify_dev(bot, e, "/multi", message)
+                notify_dev(bot, e, f"custom command {command}", message)
+        return
 
-        elif text == "/list":
-            if not is_user_admin(bot, chat_id, user_id):
-                msg = bot.send_message(chat_id, "❌ Only admins can use this command.")
-                track_message(chat_id, msg.message_id, bot_id=bot_id)
-                return
-            try:
-                result, count = get_formatted_user_link_list(bot_id, chat_id)
-                if not result:
-                    msg = bot.send_message(chat_id, "ℹ️ No users have submitted X links yet.")
-                    track_message(chat_id, msg.message_id, bot_id=bot_id)
-                    return
-
-                header = f"<b>🚨 USERS LIST 🚨: {count}</b>\n\n"
-                chunk = header
-                for line in result.split("\n"):
-                    if len(chunk) + len(line) + 1 > 4000:  # +1 for newline
-                        msg = bot.send_message(chat_id, chunk, parse_mode="HTML", disable_web_page_preview=True)
-                        track_message(chat_id, msg.message_id, bot_id=bot_id)
-                        chunk = ""  # start new chunk
-                    chunk += line + "\n"
-
-                if chunk:
-                    msg = bot.send_message(chat_id, chunk, parse_mode="HTML", disable_web_page_preview=True)
-                    track_message(chat_id, msg.message_id, bot_id=bot_id)
+    spec = _GROUP_COMMANDS.get(command)
+    if spec is None:
+        return
+    if route and not route[2]:
+        return  # switched off for this bot in the admin panel
 
-            except Exception as e:
-                notify_dev(bot, e, "/list", message)
+    with HANDLER_LATENCY.time(spec["name"]):
+        _run_group_command(spec, bot, bot_id, message, args, db)
 
-        elif text == "/unsafe":
-            if not is_user_admin(bot, chat_id, user_id):
-                msg = bot.send_message(chat_id, "❌ Only admins can use this command.")
-                track_message(chat_id, msg.message_id, bot_id=bot_id)
-                return
-            try:
-                users = get_unverified_users(bot_id, chat_id)
-                if users == "notVerifyingphase":
-                    msg = bot.send_message(chat_id, "⚠️ This session is not in the verifying phase.")
-                    track_message(chat_id, msg.message_id, bot_id=bot_id)
-                    return
-
-                if not users:
-                    msg = bot.send_message(chat_id, "✅ All users are safe.")
-                    track_message(chat_id, msg.message_id, bot_id=bot_id)
-                    return
-
-                # Build the list text safely
-                header = "<b>⚠️ These users did not send 'ad' or 'all done':</b>\n"
-                chunk = header
-                for user in users:
-                    line = f"\n• {user}"
-                    if len(chunk) + len(line) > 4000:  # keep under Telegram’s 4096 limit
-                        msg = bot.send_message(chat_id, chunk, parse_mode="HTML")
-                        track_message(chat_id, msg.message_id, bot_id=bot_id)
-                        chunk = ""  # reset for next chunk
-                    chunk += line
-
-                # send remaining users
-                if chunk:
-                    msg = bot.send_message(chat_id, chunk, parse_mode="HTML")
-                    track_message(chat_id, msg.message_id, bot_id=bot_id)
-                try:
-    # Create a thread to run the function
-                    thread = threading.Thread(
-                        target=notify_unverified_users,
-                        args=(bot, bot_id, chat_id, msg.message_id)
-                    )
-                    thread.start()  # Start the thread
-                except Exception as e:
-                    pass
 
+def _run_group_command(spec, bot, bot_id: str, message, args: str, db):
+    try:
+        if spec["admin"] and not is_user_admin(bot, message.chat.id, message.from_user.id):
+            if spec["denied"]:
+                msg = bot.send_message(message.chat.id, spec["denied"])
+                schedule_delete(message.chat.id, msg.message_id, bot_id, "admin_only")
+            return
+        spec["fn"](bot, bot_id, message, args, db)
+    except Exception as e:
+        notify_dev(bot, e, spec["name"], message)
 
-            except Exception as e:
-                notify_dev(bot, e, "/unsafe", message)
 
-        elif text.startswith("/delLink"):
-            if not is_user_admin(bot, chat_id, user_id):
-                msg = bot.send_message(chat_id, "❌ Only admins can use this command.")
-                track_message(chat_id, msg.message_id, bot_id=bot_id)
-                return
-            try:
-                user_id = message.reply_to_message.from_user.id
-                if delete_user_link(bot_id, chat_id, user_id):
-                    msg = bot.send_message(chat_id, f"✅ Link deleted for <a href='tg://user?id={user_id}'>{message.reply_to_message.from_user.first_name}</a>")
-                else:
-                    msg = bot.send_message(chat_id, f"❌ No link found for <a href='tg://user?id={user_id}'>{message.reply_to_message.from_user.first_name}</a>")
-                track_message(chat_id, msg.message_id, bot_id=bot_id)
-            except Exception as e:
-                notify_dev(bot, e, "/delLink", message)
-        elif text.startswith("/muteunsafe") or text.startswith("/muteall"):
-            if not is_user_admin(bot, chat_id, user_id):
-                msg = bot.send_message(chat_id, "❌ Only admins can use this command.")
-                track_message(chat_id, msg.message_id, bot_id=bot_id)
-                return
+# ---------------- Session lifecycle ----------------
+@group_command("/start", "/starts", admin=False)
+def _cmd_start(bot, bot_id, message, args, db):
+    start.handle_start_group(bot, bot_id, message)
 
-            try:
-                args = text.split(maxsplit=1)
-                duration = parse_duration(args[1]) if len(args) > 1 else timedelta(days=3)
-                if duration is None:
-                    msg = bot.send_message(chat_id, "⚠️ Invalid duration format. Use formats like: 2d 10h 5m")
-                    track_message(chat_id, msg.message_id, bot_id=bot_id)
-                    return
-
-                unverified = get_unverified_users_full(bot_id, chat_id)
-                if unverified == "notVerifyingphase":
-                    msg = bot.send_message(chat_id, "⚠️ This session is not in the verifying phase.")
-                    track_message(chat_id, msg.message_id, bot_id=bot_id)
-                    return
-
-                if not unverified:
-                    msg = bot.send_message(chat_id, "✅ No unverified users to mute.")
-                    track_message(chat_id, msg.message_id, bot_id=bot_id)
-                    return
-
-                # Mute users
-                muted_count = 0
-                for user in unverified:
-                    uid = user["user_id"]
-                    if mute_user(bot, chat_id, uid, duration):
-                        muted_count += 1
-
-                # Convert duration to a readable format (e.g., "48 hours" or "3 days")
-                total_seconds = int(duration.total_seconds())
-                hours = total_seconds // 3600
-                days = hours // 24
-
-                if days >= 1:
-                    duration_str = f"{days} day{'s' if days > 1 else ''}"
-                else:
-                    duration_str = f"{hours} hour{'s' if hours != 1 else ''}"
-
-                msg_text = f"✅ Muted {muted_count} unsafe user{'s' if muted_count != 1 else ''} for {duration_str}."
-                msg = bot.send_message(chat_id, msg_text)
-                track_message(chat_id, msg.message_id, bot_id=bot_id)
 
-            except Exception as e:
-                notify_dev(bot, e, "/muteunsafe", message)
+@group_command("/close", "/closes", "/stop", admin=False)
+def _cmd_close(bot, bot_id, message, args, db):
+    handle_close_group(bot, bot_id, message)
 
-        elif text.startswith("/link"):
-            try:
-                handle_link_command(bot,bot_id,message)
-            except Exception as e:
-                notify_dev(bot, e, "/link", message)
 
-        elif text == "/add_to_ad":
-            try:
-                handle_add_to_ad_command(bot,bot_id, message)
-            except Exception as e:
-                notify_dev(bot, e, "/add_to_ad", message)
+@group_command("/reopen", admin=False)
+def _cmd_reopen(bot, bot_id, message, args, db):
+    handle_reopen_group(bot, bot_id, message)
 
-        elif text == "/sr":
-            try:
-                handle_sr_command(bot,bot_id, message)
-            except Exception as e:
-                notify_dev(bot, e, "/sr", message)
 
-        elif text == "/srlist":
-            try:
-                handle_srlist_command(bot,bot_id, message)
-            except Exception as e:
-                notify_dev(bot, e, "/srlist", message)
+@group_command("/end", admin=False)
+def _cmd_end(bot, bot_id, message, args, db):
+    start.handle_cancel_group(bot, bot_id, message, db)
 
-        elif text in ["/clear", "/clean","/delete"]:
-            try:
 
-                if not is_user_admin(bot, message.chat.id, message.from_user.id):
-                    msg = bot.reply_to(message, "❌ Only admins can use this command.")
-                    track_message(message.chat.id, msg.message_id, bot_id=bot_id)
-                    return
-                delete_tracked_messages_with_progress(bot, message.chat.id, bot_id=bot_id)
-            except Exception as e:
-                notify_dev(bot, e, "/clear", message)
+@group_command("/verify", "/track", "/check", denied="❌ Only admins can enable verification.")
+def _cmd_verify(bot, bot_id, message, args, db):
+    start_verification(bot, bot_id, message.chat.id)
+
 
+# ---------------- Info ----------------
+@group_command("/refresh_admins", denied=None)
+def _cmd_refresh_admins(bot, bot_id, message, args, db):
+    chat_id = message.chat.id
+    try:
+        admins = bot.get_chat_administrators(chat_id)
+        set_cached_admins(chat_id, [admin.user.id for admin in admins])
+        _reply(bot, bot_id, chat_id, "✅ Admin list refreshed.")
     except Exception as e:
-        notify_dev(bot, e, "handle_group_command", message)
+        notify_dev(bot, e, "/refresh_admins", message)
+        try:
+            _reply(bot, bot_id, chat_id, "⚠️ Failed to refresh admins.")
+        except:
+            pass
+
+
+@group_command("/rule", admin=False)
+def _cmd_rule(bot, bot_id, message, args, db):
+    bot_data = db.bots.find_one({"_id": ObjectId(bot_id)})
+    rules_text = bot_data.get("rules") if bot_data else None
+    if not rules_text:
+        rules_text = (
+            "📛📛 <b>Likes Group Rules:</b>\n\n"
+            "💜 please follow these rules during each session:\n\n"
+            "1️⃣ <b>Link Drop Time</b>\n"
+            "🕐 You have 1 hour to share your tweet link in the group.\n\n"
+            "2️⃣ <b>1 Link Per Person</b>\n"
+            "➤ Only one post per user is allowed per session. No double Link ❌.\n\n"
+            "3️⃣ <b>TL id</b> 🆔\n"
+            "🔁 After 1 hour, we’ll start reposting all shared tweets on our TL account\n\n"
+            "4️⃣ <b>Like All Posts</b>\n"
+            "❤️ You must like all shared tweets, from top to bottom, until we post “Open” under the last tweet.\n\n"
+            "5️⃣ <b>Mark Completion</b>\n"
+            "✅ Once done, typing \"AD\" or \"All Done\" in the group is mandatory."
+        )
+    _reply(bot, bot_id, message.chat.id, rules_text, parse_mode="HTML", disable_web_page_preview=True)
+
+
+@group_command("/count")
+def _cmd_count(bot, bot_id, message, args, db):
+    count = get_all_links_count(bot_id, message.chat.id)
+    _reply(bot, bot_id, message.chat.id, f"📊 Total Users: {count}")
+
+
+@group_command("/progress")
+def _cmd_progress(bot, bot_id, message, args, db):
+    chat_id = message.chat.id
+    if not get_group_phase(bot_id, chat_id):
+        _reply(bot, bot_id, chat_id, "ℹ️ No active session in this group.")
+        return
+    send_progress_status(bot, bot_id, chat_id)
+
+
+@group_command("/multi")
+def _cmd_multi(bot, bot_id, message, args, db):
+    chat_id = message.chat.id
+    users = get_users_with_multiple_links(bot_id, chat_id)
+    if not users:
+        _reply(bot, bot_id, chat_id, "ℹ️ No users with multiple links.")
+        return
+
+    response = "<b>📊 Users with Multiple Links:</b>\n\n"
+    for user in users:
+        name_display = f"@{user['username']}" if user.get("username") else f"ID: <code>{user['user_id']}</code>"
+        response += f"👤 <b>{name_display}</b> — {user['count']} links\n"
+        for idx, link in enumerate(user["links"], start=1):
+            response += f"{idx}. {link}\n"
+        response += "\n"
+
+    _reply(bot, bot_id, chat_id, response, parse_mode="HTML")
+
+
+@group_command("/list")
+def _cmd_list(bot, bot_id, message, args, db):
+    chat_id = message.chat.id
+    pages = get_list_pages(bot_id, chat_id, "list")
+    if not pages:
+        _reply(bot, bot_id, chat_id, "ℹ️ No users have submitted X links yet.")
+        return
+    send_page(bot, bot_id, chat_id, "list", pages)
+
+
+@group_command("/unsafe")
+def _cmd_unsafe(bot, bot_id, message, args, db):
+    chat_id = message.chat.id
+    if get_group_phase(bot_id, chat_id) != "verifying":
+        _reply(bot, bot_id, chat_id, "⚠️ This session is not in the verifying phase.")
+        return
+
+    # O(1) counter check before rendering anything
+    pages = []
+    if get_session_stats(bot_id, chat_id)["unverified"]:
+        pages = get_list_pages(bot_id, chat_id, "unsafe")
+    if not pages:
+        _reply(bot, bot_id, chat_id, "✅ All users are safe.")
+        return
+
+    # first page only, the rest is reachable via the Next button
+    msg = send_page(bot, bot_id, chat_id, "unsafe", pages)
+    queue_unverified_notifications(bot_id, chat_id, msg.message_id)
+
+
+# ---------------- Moderation ----------------
+@group_command("/delLink")
+def _cmd_del_link(bot, bot_id, message, args, db):
+    chat_id = message.chat.id
+    target = message.reply_to_message.from_user
+    mention = f"<a href='tg://user?id={target.id}'>{target.first_name}</a>"
+    if delete_user_link(bot_id, chat_id, target.id):
+        _reply(bot, bot_id, chat_id, f"✅ Link deleted for {mention}")
+    else:
+        _reply(bot, bot_id, chat_id, f"❌ No link found for {mention}")
+
+
+@group_command("/muteunsafe", "/muteall")
+def _cmd_mute_unsafe(bot, bot_id, message, args, db):
+    chat_id = message.chat.id
+    duration = parse_duration(args) if args else timedelta(days=3)
+    if duration is None:
+        _reply(bot, bot_id, chat_id, "⚠️ Invalid duration format. Use formats like: 2d 10h 5m")
+        return
+
+    unverified = get_unverified_users_full(bot_id, chat_id)
+    if unverified == "notVerifyingphase":
+        _reply(bot, bot_id, chat_id, "⚠️ This session is not in the verifying phase.")
+        return
+
+    if not unverified:
+        _reply(bot, bot_id, chat_id, "✅ No unverified users to mute.")
+        return
+
+    # runs as a background job, which posts the summary when done
+    if queue_mute_unverified(bot_id, chat_id, duration):
+        _reply(bot, bot_id, chat_id, f"⏳ Muting {len(unverified)} unsafe users...")
+    else:
+        _reply(bot, bot_id, chat_id, "⚠️ A mute is already running for this group.")
+
+
+@group_command("/link", admin=False)
+def _cmd_link(bot, bot_id, message, args, db):
+    handle_link_command(bot, bot_id, message)
+
+
+@group_command("/add_to_ad", admin=False)
+def _cmd_add_to_ad(bot, bot_id, message, args, db):
+    handle_add_to_ad_command(bot, bot_id, message)
+
+
+@group_command("/sr", admin=False)
+def _cmd_sr(bot, bot_id, message, args, db):
+    handle_sr_command(bot, bot_id, message)
+
+
+@group_command("/srlist", admin=False)
+def _cmd_srlist(bot, bot_id, message, args, db):
+    handle_srlist_command(bot, bot_id, message)
+
 
+@group_command("/clear", "/clean", "/delete")
+def _cmd_clear(bot, bot_id, message, args, db):
+    queue_clear_tracked(bot_id, message.chat.id)
@@ -1,6 +1,6 @@
 from telebot.types import Message, ChatPermissions
 from utils.telegram import is_user_admin
-from utils.group_session import start_group_session, stop_group_session, get_group_phase
+from utils.group_session import start_group_session, stop_group_session, get_group_phase, schedule_session_phases
 from utils.message_tracker import track_message
 from handlers.admin import notify_dev
 from utils import db as ddb
@@ -20,6 +20,7 @@ def handle_start_group(bot, bot_id: str, message: Message):
 
             # ✅ Start session
             start_group_session(bot_id, chat_id)
+            schedule_session_phases(bot_id, chat_id)
 
             # ✅ Update group title → {old_name} | OPEN
             try:
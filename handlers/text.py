@@ -3,16 +3,21 @@ from telebot.types import Message
 from utils.group_manager import add_group, remove_group
 from utils.group_session import (
     store_group_message,
-    get_group_phase,
+    get_cached_group_phase,
     mark_user_verified,
     get_sr_users,
     remove_sr_request,
+    refresh_progress_status,
 )
 from utils.message_tracker import track_message
+from utils.auto_delete import schedule_delete
 from utils.telegram import is_user_admin
 from handlers.admin import notify_dev
 from utils import wizard_state
 from utils import db as ddb
+from utils import ad_digest
+from config import settings
+from utils.metrics import HANDLER_LATENCY, GROUP_PREFILTER
 
 
 def handle_text(bot, bot_id: str, message: Message, db):
@@ -50,21 +55,68 @@ def handle_text(bot, bot_id: str, message: Message, db):
         notify_dev(bot, e, "handle_text outer", message)
 
 
-def handle_group_text(bot, bot_id: str, message: Message, db):
+def handle_group_text(bot, bot_id: str, message: Message, db, phase: str):
+    """Group message that passed group_text_prefilter in `phase`."""
+    with HANDLER_LATENCY.time("group_text"):
+        _handle_group_text(bot, bot_id, message, db, phase)
+
+
+DONE_KEYWORDS = ("done", "all done", "ad", "all dn")
+
+
+def _is_done_message(content: str) -> bool:
+    content = content.lower().strip()
+    return content in DONE_KEYWORDS or content.startswith("ad")
+
+
+def _is_x_link(content: str) -> bool:
+    return content.startswith("https://x.com/") or content.startswith("https://twitter.com/")
+
+
+# Staged prefilter for group messages, cheapest check first; every exit is
+# counted in group_prefilter_total. manual_dispatch runs the allowed-group
+# set and group_text_prefilter on the raw update fields, before any telebot
+# objects exist; the sender checks below need the built Message.
+
+def group_text_prefilter(bot_id: str, chat_id, content: str):
+    """
+    Cached phase, then message shape. Returns (stage, phase): stage is the
+    check the message dropped out at ("idle" / "shape"), or None to go on.
+    """
+    phase = get_cached_group_phase(bot_id, chat_id)
+    if phase not in ("collecting", "verifying"):
+        return "idle", phase
+
+    # only links (collecting) and done/links (verifying) do anything
+    if phase == "collecting" and not content.startswith("https://x.com"):
+        return "shape", phase
+    if phase == "verifying" and not (_is_done_message(content) or _is_x_link(content)):
+        return "shape", phase
+    return None, phase
+
+
+def _sender_stage(bot, message: Message):
+    chat = message.chat
+    sender = getattr(message, "sender_chat", None)
+    if sender and sender.id == chat.id:  # Anonymous Admin sends as the group itself
+        return "anonymous_admin"
+
+    # ignore admins; the only stage that may hit the Bot API
+    if is_user_admin(bot, chat.id, message.from_user.id):
+        return "admin"
+    return "handled"
+
+
+def _handle_group_text(bot, bot_id: str, message: Message, db, phase: str):
     try:
         chat = message.chat
         user = message.from_user
         group_id = chat.id
-        phase = get_group_phase(bot_id, group_id)
 
-        # ignore admins
-        if is_user_admin(bot, chat.id, user.id):
+        stage = _sender_stage(bot, message)
+        GROUP_PREFILTER.inc(stage)
+        if stage != "handled":
             return
-        
-        if message and getattr(message, "sender_chat", None):
-            sender = message.sender_chat
-            if sender.id == chat.id:  # Anonymous Admin sends as the group itself
-                return True
 
         # unify link/content extraction: prefer text, fallback to caption
         link_or_content = (getattr(message, "text", None) or getattr(message, "caption", None) or "")
@@ -85,13 +137,11 @@ def handle_group_text(bot, bot_id: str, message: Message, db):
                 )
             except Exception as e:
                 notify_dev(bot, e, "handle_group_text: collecting phase", message)
+            refresh_progress_status(bot, bot_id, group_id)
 
         elif phase == "verifying":
             try:
-                done_keywords = ["done", "all done", "ad", "all dn"]
-                content = link_or_content.lower().strip()
-
-                if content in done_keywords or content.startswith("ad"):
+                if _is_done_message(link_or_content):
                     x_username, status = mark_user_verified(bot_id, group_id, user.id)
                     if x_username:
                         # Try to get custom ad text from DB
@@ -103,8 +153,11 @@ def handle_group_text(bot, bot_id: str, message: Message, db):
                             # Replace placeholders (optional)
                             ad_text = ad_text.replace("{username}", x_username)
 
-                        msg = bot.reply_to(message, ad_text)
-                        track_message(chat.id, msg.message_id, bot_id=bot_id)
+                        if settings.AD_DIGEST_WINDOW:
+                            ad_digest.add(bot, bot_id, chat.id, user, ad_text)
+                        else:
+                            msg = bot.reply_to(message, ad_text)
+                            track_message(chat.id, msg.message_id, bot_id=bot_id)
                     else:
                         if status is None:
                             return
@@ -116,14 +169,16 @@ def handle_group_text(bot, bot_id: str, message: Message, db):
                         if user.id in sr_users:
                             remove_sr_request(bot_id, group_id, user.id)
 
-                elif link_or_content.startswith("https://x.com/") or link_or_content.startswith("https://twitter.com/"):
+                    refresh_progress_status(bot, bot_id, group_id)
+
+                elif _is_x_link(link_or_content):
                     try:
                         warn = bot.send_message(
                             chat.id,
                             f"<a href='tg://user?id={user.id}'>{message.from_user.first_name}</a>Invalid Link! Join next session.",
                             parse_mode="HTML"
                         )
-                        track_message(chat.id, warn.message_id, bot_id=bot_id)
+                        schedule_delete(chat.id, warn.message_id, bot_id, "invalid_link")
                     except Exception:
                         pass
                     try:
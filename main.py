@@ -1,22 +1,56 @@
+import hmac
+import os
 import traceback
-from flask import Flask, request, abort
+from functools import wraps
+from flask import Flask, request, abort, Response
 from telebot import types
 from config import settings
 from utils.telegram import manager, manual_dispatch
+from utils.update_view import UpdateView
 from utils import db
-from utils.db import init_db
 from handlers.admin_multi import handle_admin_update
+from utils.metrics import WEBHOOK_LATENCY, render_prometheus
+from utils import bot_api, error_reporter
 
 app = Flask(__name__)
 
-# === Initialize Mongo ===
-init_db()
-from utils.db import ensure_indexes
-ensure_indexes()
+# Nothing here touches the network at import: Mongo and Redis connect on
+# first use, indexes are created by `python -m utils.migrate` at deploy time,
+# and background threads are started by gunicorn's post_fork (see
+# gunicorn.conf.py), utils/poller.py or `python main.py`, never per request.
+from utils.lifecycle import start_sweeper
+from utils import jobs
+from utils.scheduler import start_scheduler
+from utils import webhooks
+from utils.session_store import start_snapshots
+from utils.session_snapshots import start_snapshotter
+
+
+_background_pid = None
+
+
+def start_background():
+    """Sweeper, job workers, phase timers, webhook reconciler, session snapshots; once per process."""
+    global _background_pid
+    if _background_pid == os.getpid():
+        return
+    _background_pid = os.getpid()
+    start_sweeper()              # archive idle sessions, drop stale keys
+    jobs.start_workers()         # DM fan-out, bulk mute/delete; drained on shutdown
+    start_scheduler()            # auto-close / auto-verify timers
+    webhooks.start_reconciler()  # webhook drift, allowed_updates, backlog status
+    start_snapshots()            # SESSION_STORE=memory: write-behind to Redis
+    start_snapshotter()          # Mongo copies of changed sessions, restore after Redis loss
+
 
 # === Webhook for Admin Bot ===
 @app.route("/webhook/admin", methods=["POST"])
 def webhook_admin():
+    with WEBHOOK_LATENCY.time("admin"):
+        return _webhook_admin()
+
+
+def _webhook_admin():
     try:
         update = types.Update.de_json(request.data.decode("utf-8"))
         if not update:
@@ -35,26 +69,73 @@ def webhook_admin():
 # === Webhook for Child Bots ===
 @app.route("/webhook/<string:bot_id>", methods=["POST"])
 def webhook_child(bot_id: str):
-    
+    with WEBHOOK_LATENCY.time("child"):
+        return _webhook_child(bot_id)
+
+
+def _webhook_child(bot_id: str):
     bot = manager.create_or_get_child(bot_id)
     if not bot:
         abort(404)
     try:
-        update = types.Update.de_json(request.data.decode("utf-8"))
+        # parsed once into a dict; telebot objects only for updates that get handled
+        update = UpdateView.from_bytes(request.data)
         # Child bot already uses its own bot_id
-        manual_dispatch(bot, bot_id, update, db._db)
+        manual_dispatch(bot, bot_id, update, db.init_db())
     except Exception:
         traceback.print_exc()
         abort(400)
     return "OK", 200
 
 
+# === Ops endpoints: metrics, status, errors ===
+# They expose error text and user / chat ids, so each needs
+# "Authorization: Bearer <INGRESS_SECRET>"; without INGRESS_SECRET they are off.
+def ops_only(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        expected = settings.INGRESS_SECRET
+        given = request.headers.get("Authorization", "")
+        if not expected or not hmac.compare_digest(given.encode(), f"Bearer {expected}".encode()):
+            abort(403)
+        return fn(*args, **kwargs)
+    return wrapper
+
+
 # === Health Check ===
 @app.get("/")
 def health():
     return {"ok": True}, 200
 
 
+# === Metrics (Prometheus text format, per worker) ===
+@app.get("/metrics")
+@ops_only
+def metrics():
+    return Response(render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+
+# === Webhook status per bot (last reconcile, backlog first) ===
+@app.get("/webhooks")
+@ops_only
+def webhook_status():
+    return webhooks.get_status(), 200
+
+
+# === Aggregated errors (per worker, since start) ===
+@app.get("/errors")
+@ops_only
+def errors():
+    return {"errors": error_reporter.get_aggregates()}, 200
+
+
+# === Bot API calls per method, open breakers (per worker) ===
+@app.get("/telegram")
+@ops_only
+def telegram_stats():
+    return bot_api.stats(), 200
+
+
 # === List All Bots (without tokens) ===
 @app.get("/bots")
 def list_bots():
@@ -66,4 +147,5 @@ def list_bots():
     
 
 if __name__ == "__main__":
+    start_background()
     app.run(host="0.0.0.0", port="5000")
\ No newline at end of file
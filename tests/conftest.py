@@ -0,0 +1,70 @@
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("ADMIN_BOT_TOKEN", "1:TEST")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+fakeredis = pytest.importorskip("fakeredis")
+mongomock = pytest.importorskip("mongomock")
+
+import utils.redis_client as rc  # noqa: E402
+
+_server = fakeredis.FakeServer()
+rc._redis = fakeredis.FakeRedis(server=_server, decode_responses=True)
+rc._redis_raw = fakeredis.FakeRedis(server=_server, decode_responses=False)
+
+from utils import db  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def clean_state(monkeypatch):
+    rc._redis.flushall()
+    monkeypatch.setattr(db, "MongoClient", mongomock.MongoClient)
+    db.reset_client()
+    db._command_tables.clear()
+    yield
+    db.reset_client()
+
+
+class FakeBot:
+    """Records Bot API calls; every send returns a message with a fresh id."""
+
+    def __init__(self):
+        self.calls = []
+        self._next_id = 0
+
+    def _message(self, chat_id):
+        from types import SimpleNamespace
+        self._next_id += 1
+        return SimpleNamespace(message_id=self._next_id, chat=SimpleNamespace(id=chat_id))
+
+    def send_message(self, chat_id, text, **kwargs):
+        self.calls.append(("send_message", chat_id, text))
+        return self._message(chat_id)
+
+    def reply_to(self, message, text, **kwargs):
+        self.calls.append(("reply_to", message.chat.id, text))
+        return self._message(message.chat.id)
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls.append((name,) + args)
+            return True
+        return call
+
+
+@pytest.fixture
+def bot():
+    return FakeBot()
+
+
+def make_message(chat_id, user_id, text="", first_name="U"):
+    from types import SimpleNamespace
+    return SimpleNamespace(
+        chat=SimpleNamespace(id=chat_id, type="supergroup"),
+        from_user=SimpleNamespace(id=user_id, username=f"user{user_id}", first_name=first_name),
+        message_id=user_id,
+        text=text,
+    )
@@ -0,0 +1,22 @@
+import time
+from types import SimpleNamespace
+
+from utils import ad_digest, scheduler
+from utils import group_session as gs
+
+BOT, GID = "b1", -1001
+
+
+def test_stopping_the_session_still_posts_buffered_acks(bot, monkeypatch):
+    monkeypatch.setattr("utils.telegram.manager.create_or_get_child", lambda bot_id: bot)
+    gs.start_group_session(BOT, GID)
+    scheduler.schedule("auto_close", BOT, str(GID), 60)
+    ad_digest.add(bot, BOT, GID, SimpleNamespace(id=7, first_name="Ann"), "thanks")
+
+    gs.stop_group_session(BOT, GID)
+    assert scheduler.get_due_time("auto_close", BOT, str(GID)) is None
+
+    scheduler.run_due(time.time() + 3600)
+    sent = [call for call in bot.calls if call[0] == "send_message"]
+    assert len(sent) == 1 and "Ann" in sent[0][2]
+    assert not ad_digest._r.exists(ad_digest._key(BOT, GID))
@@ -0,0 +1,65 @@
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from telebot import apihelper
+
+from utils import bot_api
+from utils.bot_client import BotClient
+
+
+class StubAPI(BaseHTTPRequestHandler):
+    responses = []  # (status, body) per request, then 200
+    bodies = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        StubAPI.bodies.append(body)
+        status, payload = StubAPI.responses.pop(0) if StubAPI.responses else (200, {
+            "ok": True, "result": {"message_id": 1, "date": 0, "chat": {"id": -1, "type": "group"}}})
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_api(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(apihelper, "API_URL", f"http://127.0.0.1:{server.server_port}/bot{{0}}/{{1}}")
+    monkeypatch.setattr(apihelper, "CUSTOM_REQUEST_SENDER", bot_api.send_request)  # as utils/telegram.py does
+    monkeypatch.setattr(bot_api, "_open", {})
+    monkeypatch.setattr(bot_api, "_failures", {})
+    StubAPI.responses, StubAPI.bodies = [], []
+    yield StubAPI
+    server.shutdown()
+
+
+def _flood(seconds):
+    return 429, {"ok": False, "error_code": 429, "description": f"Too Many Requests: retry after {seconds}",
+                 "parameters": {"retry_after": seconds}}
+
+
+def test_upload_is_resent_in_full_after_a_flood_wait(stub_api):
+    stub_api.responses = [_flood(1)]
+    video = io.BytesIO(b"\x00video-bytes" * 100)
+
+    BotClient("42:T").send_video(-1, video, caption="stop")
+
+    assert len(stub_api.bodies) == 2
+    assert all(b"\x00video-bytes" * 100 in body for body in stub_api.bodies)
+
+
+def test_permanent_errors_are_not_retried(stub_api):
+    stub_api.responses = [(400, {"ok": False, "error_code": 400, "description": "Bad Request: not enough rights"})]
+    with pytest.raises(apihelper.ApiTelegramException) as exc:
+        BotClient("42:T").delete_message(-1, 5)
+    assert bot_api.error_kind(exc.value) == "permanent"
+    assert len(stub_api.bodies) == 1
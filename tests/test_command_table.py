@@ -0,0 +1,46 @@
+from utils import db
+
+BOT = "b1"
+
+
+def test_bot_without_commands_doc_has_everything_enabled():
+    assert db.get_bot_commands(BOT) == db.ALL_MAIN_COMMANDS
+    table = db.compile_command_table(BOT)
+    assert table["enabled"] == set(db.ALL_MAIN_COMMANDS)
+    assert db.resolve_command(BOT, "/close") == ("builtin", "/close", True)
+
+
+def test_first_toggle_only_turns_off_that_command():
+    # what the admin panel's togglecmd does
+    enabled = set(db.get_bot_commands(BOT))
+    enabled.remove("/close")
+    db.set_bot_commands(BOT, list(enabled))
+
+    assert set(db.get_bot_commands(BOT)) == set(db.ALL_MAIN_COMMANDS) - {"/close"}
+    table = db.compile_command_table(BOT)
+    assert table["routes"]["/stop"] == ("builtin", "/close", False)
+    assert table["routes"]["/verify"] == ("builtin", "/verify", True)
+
+
+def test_disabled_clear_also_blocks_delete(bot, monkeypatch):
+    from conftest import make_message
+    from handlers import commands
+    cleared = []
+    monkeypatch.setattr(commands, "queue_clear_tracked", lambda bot_id, chat_id: cleared.append(chat_id))
+    monkeypatch.setattr(commands, "is_user_admin", lambda *args: True)
+
+    db.set_bot_commands(BOT, [c for c in db.ALL_MAIN_COMMANDS if c != "/clear"])
+    for alias in ("/clear", "/clean", "/delete"):
+        commands.handle_group_command(bot, BOT, make_message(-100, 1, alias), None)
+    assert cleared == []
+
+    db.set_bot_commands(BOT, db.ALL_MAIN_COMMANDS)
+    commands.handle_group_command(bot, BOT, make_message(-100, 1, "/delete"), None)
+    assert cleared == [-100]
+
+
+def test_router_aliases_match_command_groups():
+    from handlers import commands
+    for alias, spec in commands._GROUP_COMMANDS.items():
+        if spec["name"] in db.COMMAND_GROUPS:
+            assert alias in db.COMMAND_GROUPS[spec["name"]], alias
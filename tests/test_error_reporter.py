@@ -0,0 +1,48 @@
+import dataclasses
+
+import pytest
+
+from conftest import FakeBot
+from utils import error_reporter
+
+
+def _bot(token):
+    bot = FakeBot()
+    bot.token = token
+    return bot
+
+
+def test_same_error_reaches_every_bots_digest(monkeypatch):
+    monkeypatch.setattr(error_reporter, "_ensure_flusher", lambda: None)
+    monkeypatch.setattr(error_reporter, "_pending", {})
+    first, second = _bot("111:aaa"), _bot("222:bbb")
+
+    error_reporter.report(first, RuntimeError("redis down"), "handle_text")
+    error_reporter.report(second, RuntimeError("redis down"), "handle_text")
+    error_reporter.report(second, RuntimeError("redis down"), "handle_text")
+    error_reporter.flush()
+
+    assert [c[0] for c in first.calls] == ["send_message"]
+    assert [c[0] for c in second.calls] == ["send_message"]
+    assert "×1" in first.calls[0][2]
+    assert "×2" in second.calls[0][2]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    import main
+    monkeypatch.setattr(main, "settings", dataclasses.replace(main.settings, INGRESS_SECRET="s3cret"))
+    return main.app.test_client()
+
+
+@pytest.mark.parametrize("path", ["/metrics", "/errors", "/webhooks", "/telegram"])
+def test_ops_endpoints_need_the_secret(client, path):
+    assert client.get(path).status_code == 403
+    assert client.get(path, headers={"Authorization": "Bearer nope"}).status_code == 403
+    assert client.get(path, headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+
+def test_ops_endpoints_are_off_without_a_secret(client, monkeypatch):
+    import main
+    monkeypatch.setattr(main, "settings", dataclasses.replace(main.settings, INGRESS_SECRET=""))
+    assert client.get("/errors", headers={"Authorization": "Bearer "}).status_code == 403
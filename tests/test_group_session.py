@@ -0,0 +1,113 @@
+import threading
+
+from conftest import make_message
+from utils import group_session as gs
+
+BOT, GID = "b1", -1001
+
+
+def _submit(bot, user_id, x_user=None):
+    x_user = x_user or f"xuser{user_id}"
+    gs.store_group_message(bot, BOT, make_message(GID, user_id), GID, user_id, f"user{user_id}",
+                           f"https://x.com/{x_user}/status/{user_id}", first_name="U")
+
+
+def test_concurrent_submissions_are_all_stored(bot):
+    gs.start_group_session(BOT, GID)
+    threads = [
+        threading.Thread(target=lambda t=t: [_submit(bot, t * 1000 + i) for i in range(50)])
+        for t in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    messages = gs.get_group_messages(BOT, GID)
+    assert len(messages) == 400
+    assert len({m["user_id"] for m in messages}) == 400
+    assert gs.get_session_stats(BOT, GID) == {"submitted": 400, "verified": 0, "unverified": 400, "sr_pending": 0}
+
+
+def test_duplicate_user_and_fraud_write_nothing(bot):
+    gs.start_group_session(BOT, GID)
+    _submit(bot, 1, "alice")
+    version = gs.get_session_version(BOT, GID)
+
+    _submit(bot, 1, "bob")    # second link from the same user
+    _submit(bot, 2, "alice")  # someone else's X account
+
+    assert [m["x_username"] for m in gs.get_group_messages(BOT, GID)] == ["alice"]
+    assert gs.get_session_version(BOT, GID) == version
+    assert gs.get_session_stats(BOT, GID)["submitted"] == 1
+    assert any("Fraud Alert" in str(call) for call in bot.calls)
+
+
+def test_batched_submissions_match_direct_ones(bot):
+    gs.start_group_session(BOT, GID)
+    with gs.batched_writes():
+        for user_id in range(20):
+            _submit(bot, user_id)
+        _submit(bot, 0, "other")  # duplicate user inside the batch
+    assert len(gs.get_group_messages(BOT, GID)) == 20
+    assert gs.get_session_stats(BOT, GID)["submitted"] == 20
+    assert any("only send one link" in str(call) for call in bot.calls)
+
+
+def _in_other_thread(fn):
+    thread = threading.Thread(target=fn)
+    thread.start()
+    thread.join()
+
+
+def test_batch_flush_keeps_concurrent_writes(bot):
+    gs.start_group_session(BOT, GID)
+    with gs.batched_writes():
+        for user_id in range(5):
+            _submit(bot, user_id)
+        _in_other_thread(lambda: _submit(bot, 99))  # a webhook worker, mid-batch
+    assert sorted(m["user_id"] for m in gs.get_group_messages(BOT, GID)) == [0, 1, 2, 3, 4, 99]
+    assert gs.get_session_stats(BOT, GID)["submitted"] == 6
+
+
+def test_batch_flush_does_not_bring_back_a_stopped_session(bot):
+    gs.start_group_session(BOT, GID)
+    _submit(bot, 1)
+    with gs.batched_writes():
+        _submit(bot, 2)
+        _in_other_thread(lambda: gs.archive_group_session(BOT, GID))
+    assert gs.get_group_phase(BOT, GID) is None
+    assert gs.get_group_messages(BOT, GID) == []
+
+
+def test_close_settles_drifted_counters(bot):
+    gs.start_group_session(BOT, GID)
+    for user_id in range(3):
+        _submit(bot, user_id)
+    gs.mark_user_verified(BOT, GID, 0)
+    writes = gs.SessionWrites()
+    writes.incr(str(GID), {"submitted": 97, "unverified": 5})  # drift left by older code
+    gs.get_store().apply(BOT, writes)
+
+    gs.close_group(bot, BOT, GID)
+    assert gs.get_session_stats(BOT, GID) == {"submitted": 3, "verified": 1, "unverified": 2, "sr_pending": 0}
+
+
+def test_phase_cache_survives_a_lost_version_key(monkeypatch):
+    monkeypatch.setattr(gs, "_phase_cache", gs.OrderedDict())
+    gs.start_group_session(BOT, GID)
+    gs.set_verification_phase(BOT, GID)
+    assert gs.get_cached_group_phase(BOT, GID) == "verifying"
+
+    gs.r.flushall()  # Redis lost; the next session's versions start over
+    gs.start_group_session(BOT, GID)
+    gs.bump_session_version(BOT, GID)
+    assert gs.get_cached_group_phase(BOT, GID) == "collecting"
+
+
+def test_phase_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(gs, "_phase_cache", gs.OrderedDict())
+    monkeypatch.setattr(gs, "PHASE_CACHE_SIZE", 2)
+    for gid in (-1, -2, -3):
+        gs.get_cached_group_phase(BOT, gid)
+    assert list(gs._phase_cache) == [(BOT, "-2"), (BOT, "-3")]
@@ -0,0 +1,80 @@
+import dataclasses
+import threading
+import time
+
+import pytest
+
+from utils import jobs
+
+
+@pytest.fixture
+def short_lease(monkeypatch):
+    monkeypatch.setattr(jobs, "settings", dataclasses.replace(jobs.settings, JOB_LEASE=0.4))
+    monkeypatch.setattr("utils.telegram.manager.create_or_get_child", lambda bot_id: object())
+    monkeypatch.setattr(jobs, "_seen_claims", set())
+
+
+def _claim(worker="w1"):
+    """What _worker_loop does before run_job."""
+    return jobs._r.blmove(jobs.QUEUE_KEY, jobs._claimed_key(worker), 1, "RIGHT", "LEFT")
+
+
+def test_sleep_longer_than_lease_keeps_the_job(short_lease):
+    runs = []
+
+    @jobs.register("test_flood_wait")
+    def handler(bot, ctx):
+        runs.append(ctx.job_id)
+        ctx.sleep(1.0)  # e.g. a Telegram retry_after beyond the lease
+
+    job_id = jobs.submit("test_flood_wait", "b1", -1)
+    assert _claim() == job_id
+
+    worker = threading.Thread(target=jobs.run_job, args=(job_id, "w1"))
+    worker.start()
+    requeued = 0
+    while worker.is_alive():
+        time.sleep(0.1)
+        requeued += jobs.requeue_expired()
+    worker.join()
+
+    assert requeued == 0
+    assert runs == [job_id]
+    assert jobs.get_job(job_id)["status"] == "done"
+
+
+def test_job_claimed_by_a_dead_worker_is_requeued(short_lease):
+    job_id = jobs.submit("test_dead_worker", "b1", -1)
+    assert _claim("dead") == job_id  # the worker dies before taking the lease
+    assert jobs._r.llen(jobs.QUEUE_KEY) == 0
+
+    assert jobs.requeue_expired() == 0  # a live worker may be about to take it
+    assert jobs.requeue_expired() == 1
+    assert jobs._r.lrange(jobs.QUEUE_KEY, 0, -1) == [job_id]
+    assert jobs._r.llen(jobs._claimed_key("dead")) == 0
+
+
+def test_slow_worker_stops_once_its_lease_was_requeued(short_lease):
+    processed = []
+
+    @jobs.register("test_slow_worker")
+    def handler(bot, ctx):
+        for item in ctx.iterate([1, 2, 3]):
+            processed.append((threading.current_thread().name, item))
+            if item == 1 and threading.current_thread().name == "slow":
+                time.sleep(1.0)  # stuck without a heartbeat past the lease
+
+    job_id = jobs.submit("test_slow_worker", "b1", -1)
+    assert _claim("w1") == job_id
+    slow = threading.Thread(target=jobs.run_job, args=(job_id, "w1"), name="slow")
+    slow.start()
+
+    time.sleep(0.6)
+    assert jobs.requeue_expired() == 1
+    assert _claim("w2") == job_id
+    jobs.run_job(job_id, "w2")  # resumes after item 1
+    slow.join()
+
+    assert processed == [("slow", 1), ("MainThread", 2), ("MainThread", 3)]
+    job = jobs.get_job(job_id)
+    assert job["status"] == "done" and job["attempts"] == "2"
@@ -0,0 +1,31 @@
+import json
+
+from utils import group_session as gs
+from utils import lifecycle
+from utils.redis_client import get_redis
+
+BOT, GID = "b1", -1001
+
+
+def test_sweep_archives_idle_groups_and_drops_the_empty_session():
+    gs.start_group_session(BOT, GID)
+    report = lifecycle.sweep_once(idle_seconds=-60)
+    assert report["sessions_archived"] == 1
+    assert not get_redis().exists(f"sessions:{BOT}")
+
+
+def test_session_started_during_the_check_is_kept():
+    gs.start_group_session(BOT, GID)
+    gs.stop_group_session(BOT, GID)
+    calls = []
+
+    def check(raws):
+        if not calls:  # another worker's /start between the read and the delete
+            get_redis().hset(f"sessions:{BOT}", "active_groups", json.dumps({"-1002": "collecting"}))
+        calls.append(raws)
+        return not json.loads(raws[0] or "{}")
+
+    assert gs.get_store().delete_session_if(BOT, ("active_groups",), check) is False
+    assert len(calls) == 2
+    assert gs.get_active_groups(BOT) == {"-1002": "collecting"}
+    assert gs.drop_session_if_empty(BOT) is False
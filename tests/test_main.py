@@ -0,0 +1,23 @@
+import main
+
+
+def test_requests_do_not_start_background_threads(monkeypatch):
+    started = []
+    monkeypatch.setattr(main, "start_sweeper", lambda: started.append("sweeper"))
+    monkeypatch.setattr(main, "_background_pid", None)
+
+    assert main.app.test_client().get("/").status_code == 200
+    assert started == []
+
+
+def test_background_starts_once_per_process(monkeypatch):
+    started = []
+    for name in ("start_sweeper", "start_scheduler", "start_snapshots", "start_snapshotter"):
+        monkeypatch.setattr(main, name, lambda name=name: started.append(name))
+    monkeypatch.setattr(main.jobs, "start_workers", lambda: started.append("jobs"))
+    monkeypatch.setattr(main.webhooks, "start_reconciler", lambda: started.append("webhooks"))
+    monkeypatch.setattr(main, "_background_pid", None)
+
+    main.start_background()
+    main.start_background()
+    assert len(started) == 6
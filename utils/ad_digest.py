@@ -0,0 +1,88 @@
+# utils/ad_digest.py
+import html
+import json
+from config import settings
+from utils.message_tracker import track_message
+from utils.metrics import AD_DIGEST
+from utils.redis_client import lazy_redis
+from utils import scheduler
+
+# Digest mode for the "ad" wave (AD_DIGEST_WINDOW > 0): instead of one reply
+# per verified user, acknowledgements are buffered per group and posted as one
+# message listing everyone, each with the bot's ad_text applied. A group's
+# buffer is flushed AD_DIGEST_WINDOW seconds after its first entry (scheduler
+# timer "ad_digest") or as soon as it holds AD_DIGEST_MAX users.
+#
+# Redis key pattern: ad_digest:{bot_id}:{gid} (list of json entries)
+# ad_digest_total{kind}: acks buffered, messages sent; acks - messages is
+# the number of sendMessage (and track_message) calls saved.
+
+MAX_MESSAGE_CHARS = 4000  # under Telegram's 4096, leaves room for the header
+
+_r = lazy_redis()
+
+
+def _key(bot_id: str, gid) -> str:
+    return f"ad_digest:{bot_id}:{gid}"
+
+
+def add(bot, bot_id: str, chat_id, user, ad_text: str):
+    """Buffer one verified user's acknowledgement."""
+    entry = json.dumps({"user_id": user.id, "first_name": user.first_name or "", "text": ad_text})
+    key = _key(bot_id, chat_id)
+    pipe = _r.pipeline()
+    pipe.rpush(key, entry)
+    pipe.expire(key, max(60, settings.AD_DIGEST_WINDOW * 10))  # backstop if the timer is lost
+    size = pipe.execute()[0]
+    AD_DIGEST.inc("acks")
+
+    if size == 1:
+        scheduler.schedule("ad_digest", bot_id, chat_id, settings.AD_DIGEST_WINDOW)
+    if size >= settings.AD_DIGEST_MAX:
+        flush(bot, bot_id, chat_id)  # the timer still fires later, on an empty buffer
+
+
+def _render(entries) -> list:
+    """Entries -> message texts, each under MAX_MESSAGE_CHARS and AD_DIGEST_MAX users."""
+    blocks = [
+        f"<a href='tg://user?id={e['user_id']}'>{html.escape(e['first_name'])}</a>\n{e['text']}"
+        for e in entries
+    ]
+    messages, current = [], []
+    for block in blocks:
+        if current and (len(current) >= settings.AD_DIGEST_MAX
+                        or sum(len(b) + 2 for b in current) + len(block) > MAX_MESSAGE_CHARS):
+            messages.append(current)
+            current = []
+        current.append(block)
+    if current:
+        messages.append(current)
+    return [f"✅ Verified ({len(m)}):\n\n" + "\n\n".join(m) for m in messages]
+
+
+def flush(bot, bot_id: str, chat_id) -> int:
+    """Post everything buffered for a group. Returns the number of messages sent."""
+    key = _key(bot_id, chat_id)
+    pipe = _r.pipeline()  # MULTI: an add racing with us lands in a fresh buffer
+    pipe.lrange(key, 0, -1)
+    pipe.delete(key)
+    raw = pipe.execute()[0]
+    if not raw:
+        return 0
+
+    sent = 0
+    for text in _render([json.loads(e) for e in raw]):
+        try:
+            msg = bot.send_message(int(chat_id), text, parse_mode="HTML", disable_web_page_preview=True)
+            track_message(int(chat_id), msg.message_id, bot_id=bot_id)
+            sent += 1
+        except Exception as e:
+            print(f"[ad_digest] send error for {bot_id}:{chat_id}: {e}")
+    AD_DIGEST.inc("messages", amount=sent)
+    return sent
+
+
+# not a session timer: acks buffered before /end or an archive still get posted
+@scheduler.register("ad_digest", ends_with_session=False)
+def _flush_due(bot, bot_id: str, gid: str):
+    flush(bot, bot_id, gid)
@@ -0,0 +1,92 @@
+# utils/auto_delete.py
+import time
+from collections import defaultdict
+from config import settings
+from utils.message_tracker import track_message
+from utils.metrics import AUTO_DELETE
+from utils.redis_client import lazy_redis
+from utils import scheduler
+
+# Bot warnings ("You can only send one link", "Invalid Link!", fraud alerts,
+# "Only admins can use this command") are deleted on their own after a
+# per-kind TTL instead of piling up in tracked:{bot_id}:{chat_id} until /clear.
+#
+# Redis key pattern: auto_delete -> zset "{bot_id}|{chat_id}|{message_id}" -> due unix ts
+# Drained on every scheduler tick: all due members are claimed at once
+# (ZRANGEBYSCORE + ZREMRANGEBYSCORE in one MULTI, so with several workers each
+# message is deleted once), grouped per chat and removed with deleteMessages,
+# up to 100 ids per call.
+
+KEY = "auto_delete"
+MAX_IDS_PER_CALL = 100  # deleteMessages limit
+
+# seconds per warning kind; WARNING_TTLS overrides, 0 = keep until /clear
+DEFAULT_TTLS = {
+    "duplicate_link": 60,
+    "invalid_link": 60,
+    "fraud": 600,
+    "admin_only": 30,
+}
+
+_r = lazy_redis()
+
+
+def ttl_for(kind: str) -> int:
+    return settings.WARNING_TTLS.get(kind, DEFAULT_TTLS.get(kind, 0))
+
+
+def schedule_delete(chat_id, message_id: int, bot_id: str, kind: str):
+    """Delete a warning after its kind's TTL; tracked for /clear when the TTL is 0."""
+    ttl = ttl_for(kind)
+    if ttl <= 0:
+        track_message(chat_id, message_id, bot_id=bot_id)
+        return
+    try:
+        _r.zadd(KEY, {f"{bot_id}|{chat_id}|{message_id}": time.time() + ttl})
+        AUTO_DELETE.inc("scheduled")
+    except Exception as e:
+        print(f"[auto_delete] Redis error: {e}")
+        track_message(chat_id, message_id, bot_id=bot_id)  # /clear still gets it
+
+
+def _claim_due(now: float) -> list:
+    pipe = _r.pipeline()
+    pipe.zrangebyscore(KEY, 0, now)
+    pipe.zremrangebyscore(KEY, 0, now)
+    return pipe.execute()[0]
+
+
+def delete_due(now: float = None) -> int:
+    """Delete every warning that is due. Returns how many were deleted."""
+    now = time.time() if now is None else now
+    by_chat = defaultdict(list)
+    for member in _claim_due(now):
+        bot_id, chat_id, message_id = member.split("|")
+        by_chat[(bot_id, chat_id)].append(int(message_id))
+    if not by_chat:
+        return 0
+
+    from utils.telegram import manager
+    deleted = 0
+    for (bot_id, chat_id), message_ids in by_chat.items():
+        bot = manager.create_or_get_child(bot_id)
+        if not bot:
+            continue  # bot removed or disabled
+        for i in range(0, len(message_ids), MAX_IDS_PER_CALL):
+            chunk = message_ids[i:i + MAX_IDS_PER_CALL]
+            try:
+                bot.delete_messages(int(chat_id), chunk)
+                deleted += len(chunk)
+            except Exception as e:
+                # already deleted by /clear or an admin, or the bot lost its rights
+                AUTO_DELETE.inc("failed", amount=len(chunk))
+                print(f"[auto_delete] delete error for {bot_id}:{chat_id}: {e}")
+    AUTO_DELETE.inc("deleted", amount=deleted)
+    return deleted
+
+
+def pending() -> int:
+    return _r.zcard(KEY)
+
+
+scheduler.on_tick(delete_due)
@@ -0,0 +1,219 @@
+# utils/bot_api.py
+import json
+import threading
+import time
+import requests
+from telebot import apihelper
+from config import settings
+from utils.metrics import TG_API_CALLS, TG_API_ERRORS, TG_API_LATENCY, TG_API_WAIT
+
+# Every Bot API call (TeleBot and BotClient) goes through send_request, the
+# apihelper.CUSTOM_REQUEST_SENDER installed by utils/telegram.py, so handlers
+# get the same behaviour without wrapping their own calls:
+#   - 429: waits retry_after and retries, up to TG_MAX_RETRIES times and
+#     TG_MAX_RETRY_WAIT seconds per call; longer waits fail at once. Uploads
+#     are rewound first (not retried if they can't be).
+#   - circuit breakers, per chat and per bot: a 429 opens the chat (or the bot,
+#     for calls without chat_id) for retry_after; a 403 (blocked, kicked) opens
+#     the chat for TG_BREAKER_COOLDOWN; TG_BREAKER_THRESHOLD consecutive
+#     bot-level 429 / 5xx / network failures open the whole bot for
+#     TG_BREAKER_COOLDOWN.
+#     Calls into an open breaker wait if it closes within the budget, otherwise
+#     fail without a request, with the error that opened it.
+#   - other 4xx (blocked, not enough rights, chat not found, ...) are
+#     permanent: never retried and they don't count against the bot.
+#   - telegram_api_calls_total{method,outcome} and the latency histogram give
+#     per-method success and latency; stats() summarises them (GET /telegram).
+#
+# Breaker state is per worker process.
+
+_lock = threading.Lock()
+_open = {}      # scope -> (until, status, body)
+_failures = {}  # bot scope -> consecutive failures
+
+
+def _scopes(url: str, params) -> tuple:
+    """(bot scope, chat scope or None) for a request URL .../bot{token}/{method}."""
+    bot = "bot:" + url.rsplit("/", 2)[-2][3:].split(":", 1)[0]  # bot id, never the token
+    chat_id = (params or {}).get("chat_id")
+    return bot, (f"{bot}:chat:{chat_id}" if chat_id is not None else None)
+
+
+def classify(status: int) -> str:
+    """'flood', 'permanent' or 'transient' for a failed call."""
+    if status == 429:
+        return "flood"
+    if 400 <= status < 500:
+        return "permanent"
+    return "transient"
+
+
+def _body(result) -> dict:
+    try:
+        return result.json()
+    except ValueError:
+        return {}
+
+
+def _retry_after(body: dict) -> int:
+    return int((body.get("parameters") or {}).get("retry_after") or 1)
+
+
+def _rewind(files) -> bool:
+    """Seek every upload back to the start for a retry; False if one can't be."""
+    for value in (files or {}).values():
+        stream = value[1] if isinstance(value, tuple) else value
+        if isinstance(stream, (bytes, str)):
+            continue
+        try:
+            stream.seek(0)
+        except Exception:
+            return False
+    return True
+
+
+# --- breakers ---
+def _blocked(scopes) -> tuple:
+    """Seconds until every breaker in `scopes` is closed, and the longest one's entry."""
+    now = time.time()
+    wait, entry = 0, None
+    with _lock:
+        for scope in scopes:
+            state = _open.get(scope)
+            if state is None:
+                continue
+            if state[0] <= now:
+                del _open[scope]
+            elif state[0] - now > wait:
+                wait, entry = state[0] - now, state
+    return wait, entry
+
+
+def _trip(scope: str, seconds: float, status: int, body: dict):
+    with _lock:
+        until = time.time() + seconds
+        if _open.get(scope, (0,))[0] < until:
+            _open[scope] = (until, status, body)
+
+
+def _failure(bot_scope: str, status: int, body: dict):
+    with _lock:
+        count = _failures[bot_scope] = _failures.get(bot_scope, 0) + 1
+    if count >= settings.TG_BREAKER_THRESHOLD:
+        _trip(bot_scope, settings.TG_BREAKER_COOLDOWN, status, body)
+        print(f"[bot_api] {bot_scope} breaker open for {settings.TG_BREAKER_COOLDOWN}s after {count} failures")
+
+
+def _success(bot_scope: str):
+    if bot_scope in _failures:
+        with _lock:
+            _failures.pop(bot_scope, None)
+
+
+def _rejected(url: str, state: tuple, wait: float) -> requests.Response:
+    """The response a call into an open breaker gets instead of a request."""
+    _, status, body = state
+    body = dict(body, ok=False)
+    body.setdefault("error_code", status)
+    body.setdefault("description", "Circuit open")
+    if status == 429:
+        body["parameters"] = {"retry_after": max(1, int(wait + 0.999))}
+    resp = requests.Response()
+    resp.status_code = status
+    resp.url = url
+    resp._content = json.dumps(body).encode()
+    return resp
+
+
+# === Request sender ===
+def send_request(method, url, **kwargs):
+    """apihelper.CUSTOM_REQUEST_SENDER: retries, breakers and per-method stats."""
+    api_method = url.rsplit("/", 1)[-1]
+    bot_scope, chat_scope = _scopes(url, kwargs.get("params"))
+    scopes = (bot_scope, chat_scope) if chat_scope else (bot_scope,)
+    waited = 0.0
+    try:
+        for attempt in range(settings.TG_MAX_RETRIES + 1):
+            wait, state = _blocked(scopes)
+            if wait:
+                if waited + wait > settings.TG_MAX_RETRY_WAIT:
+                    TG_API_CALLS.inc(api_method, "circuit_open")
+                    return _rejected(url, state, wait)
+                time.sleep(wait)
+                waited += wait
+
+            start = time.perf_counter()
+            try:
+                result = apihelper._get_req_session().request(method, url, **kwargs)
+            except Exception:
+                TG_API_ERRORS.inc(api_method, "network")
+                TG_API_CALLS.inc(api_method, "network")
+                _failure(bot_scope, 502, {"description": "Network error"})
+                raise
+            finally:
+                TG_API_LATENCY.observe(time.perf_counter() - start, api_method)
+
+            if result.status_code == 200:
+                _success(bot_scope)
+                TG_API_CALLS.inc(api_method, "ok")
+                return result
+
+            TG_API_ERRORS.inc(api_method, str(result.status_code))
+            body = _body(result)
+            kind = classify(result.status_code)
+            if kind == "flood":
+                retry_after = _retry_after(body)
+                if chat_scope:
+                    _trip(chat_scope, retry_after, 429, body)  # chat-level limit
+                else:
+                    _trip(bot_scope, retry_after, 429, body)
+                    _failure(bot_scope, 429, body)
+                if (attempt < settings.TG_MAX_RETRIES and waited + retry_after <= settings.TG_MAX_RETRY_WAIT
+                        and _rewind(kwargs.get("files"))):
+                    continue  # the breaker wait at the top of the loop sleeps it off
+            elif kind == "permanent":
+                if result.status_code == 403 and chat_scope:
+                    _trip(chat_scope, settings.TG_BREAKER_COOLDOWN, 403, body)
+            else:
+                _failure(bot_scope, result.status_code, body)
+            TG_API_CALLS.inc(api_method, kind)
+            return result
+    finally:
+        if waited:
+            TG_API_WAIT.observe(waited, api_method)
+
+
+# === Helpers for handlers ===
+def error_kind(error) -> str:
+    """'flood', 'permanent', 'transient' for an ApiTelegramException; None for anything else."""
+    if not isinstance(error, apihelper.ApiTelegramException):
+        return None
+    return classify(error.error_code)
+
+
+def retry_after(error):
+    """Seconds Telegram asked to wait, when `error` is a flood wait; else None."""
+    if error_kind(error) != "flood":
+        return None
+    return _retry_after(error.result_json or {})
+
+
+def stats() -> dict:
+    """Per-method call outcomes and latency in this worker, plus the open breakers."""
+    methods = {}
+    for (api_method, outcome), count in TG_API_CALLS.values().items():
+        entry = methods.setdefault(api_method, {"calls": 0, "outcomes": {}})
+        entry["calls"] += count
+        entry["outcomes"][outcome] = count
+    counts, sums = TG_API_LATENCY.counts(), TG_API_LATENCY.sums()
+    for api_method, entry in methods.items():
+        entry["success_rate"] = round(entry["outcomes"].get("ok", 0) / entry["calls"], 4)
+        requests_sent = counts.get((api_method,), 0)
+        if requests_sent:
+            entry["avg_latency_ms"] = round(sums[(api_method,)] / requests_sent * 1000, 1)
+
+    now = time.time()
+    with _lock:
+        breakers = {scope: {"seconds_left": round(until - now, 1), "status": status}
+                    for scope, (until, status, _) in _open.items() if until > now}
+    return {"methods": methods, "open_breakers": breakers}
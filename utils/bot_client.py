@@ -0,0 +1,140 @@
+# utils/bot_client.py
+import json
+from datetime import datetime
+from telebot import apihelper, types
+
+# Child bots only ever call a dozen Bot API methods, and a process serves many
+# of them, so instead of one TeleBot each (handler registries, state storage,
+# middleware hooks) a child bot is just its token. Every call goes through
+# apihelper._make_request: the same per-thread HTTP session and
+# CUSTOM_REQUEST_SENDER (utils/bot_api.py) as TeleBot, the same
+# ApiTelegramException on failure, and results come back as telebot types,
+# so handlers don't care which one they got.
+
+
+def _link_preview(disable_web_page_preview):
+    if disable_web_page_preview is None:
+        return None
+    return json.dumps({"is_disabled": bool(disable_web_page_preview)})
+
+
+class BotClient:
+    __slots__ = ("token", "parse_mode")
+
+    def __init__(self, token: str, parse_mode: str = "HTML"):
+        self.token = token
+        self.parse_mode = parse_mode
+
+    def _call(self, api_method: str, params: dict = None, files: dict = None):
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        return apihelper._make_request(self.token, api_method, method="post", params=params, files=files)
+
+    def _parse_mode(self, parse_mode):
+        return self.parse_mode if parse_mode is None else parse_mode
+
+    # --- bot ---
+    def get_me(self) -> types.User:
+        return types.User.de_json(self._call("getMe"))
+
+    def set_webhook(self, url: str, allowed_updates=None, max_connections=None, drop_pending_updates=None):
+        return self._call("setWebhook", {
+            "url": url,
+            "allowed_updates": json.dumps(allowed_updates) if allowed_updates is not None else None,
+            "max_connections": max_connections,
+            "drop_pending_updates": drop_pending_updates,
+        })
+
+    def remove_webhook(self):
+        return self._call("deleteWebhook")
+
+    def get_webhook_info(self) -> types.WebhookInfo:
+        return types.WebhookInfo.de_json(self._call("getWebhookInfo"))
+
+    # --- messages ---
+    def send_message(self, chat_id, text, parse_mode=None, reply_markup=None,
+                     disable_web_page_preview=None, disable_notification=None, reply_to_message_id=None):
+        return types.Message.de_json(self._call("sendMessage", {
+            "chat_id": chat_id,
+            "text": text,
+            "parse_mode": self._parse_mode(parse_mode) or None,
+            "reply_markup": apihelper._convert_markup(reply_markup) if reply_markup else None,
+            "link_preview_options": _link_preview(disable_web_page_preview),
+            "disable_notification": disable_notification,
+            "reply_parameters": json.dumps({"message_id": reply_to_message_id}) if reply_to_message_id else None,
+        }))
+
+    def reply_to(self, message: types.Message, text, **kwargs):
+        return self.send_message(message.chat.id, text, reply_to_message_id=message.message_id, **kwargs)
+
+    def edit_message_text(self, text, chat_id, message_id, parse_mode=None, reply_markup=None,
+                          disable_web_page_preview=None):
+        result = self._call("editMessageText", {
+            "chat_id": chat_id,
+            "message_id": message_id,
+            "text": text,
+            "parse_mode": self._parse_mode(parse_mode) or None,
+            "reply_markup": apihelper._convert_markup(reply_markup) if reply_markup else None,
+            "link_preview_options": _link_preview(disable_web_page_preview),
+        })
+        return result if isinstance(result, bool) else types.Message.de_json(result)
+
+    def delete_message(self, chat_id, message_id):
+        return self._call("deleteMessage", {"chat_id": chat_id, "message_id": message_id})
+
+    def delete_messages(self, chat_id, message_ids):
+        return self._call("deleteMessages", {"chat_id": chat_id, "message_ids": json.dumps(message_ids)})
+
+    def pin_chat_message(self, chat_id, message_id, disable_notification=None):
+        return self._call("pinChatMessage", {
+            "chat_id": chat_id, "message_id": message_id, "disable_notification": disable_notification,
+        })
+
+    def answer_callback_query(self, callback_query_id, text=None, show_alert=None):
+        return self._call("answerCallbackQuery", {
+            "callback_query_id": callback_query_id, "text": text, "show_alert": show_alert,
+        })
+
+    # --- media: a file_id / URL string, or a file object / bytes to upload ---
+    def _send_media(self, api_method, field, chat_id, media, caption=None, parse_mode=None, reply_markup=None):
+        params = {
+            "chat_id": chat_id,
+            "caption": caption or None,
+            "parse_mode": self._parse_mode(parse_mode) or None,
+            "reply_markup": apihelper._convert_markup(reply_markup) if reply_markup else None,
+        }
+        files = None
+        if isinstance(media, str):
+            params[field] = media
+        else:
+            files = {field: media}
+        return types.Message.de_json(self._call(api_method, params, files))
+
+    def send_video(self, chat_id, video, caption=None, parse_mode=None, reply_markup=None):
+        return self._send_media("sendVideo", "video", chat_id, video, caption, parse_mode, reply_markup)
+
+    def send_animation(self, chat_id, animation, caption=None, parse_mode=None, reply_markup=None):
+        return self._send_media("sendAnimation", "animation", chat_id, animation, caption, parse_mode, reply_markup)
+
+    def send_photo(self, chat_id, photo, caption=None, parse_mode=None, reply_markup=None):
+        return self._send_media("sendPhoto", "photo", chat_id, photo, caption, parse_mode, reply_markup)
+
+    # --- chats ---
+    def get_chat(self, chat_id) -> types.ChatFullInfo:
+        return types.ChatFullInfo.de_json(self._call("getChat", {"chat_id": chat_id}))
+
+    def get_chat_administrators(self, chat_id):
+        return [types.ChatMember.de_json(m) for m in self._call("getChatAdministrators", {"chat_id": chat_id})]
+
+    def set_chat_title(self, chat_id, title):
+        return self._call("setChatTitle", {"chat_id": chat_id, "title": title})
+
+    def set_chat_permissions(self, chat_id, permissions: types.ChatPermissions):
+        return self._call("setChatPermissions", {"chat_id": chat_id, "permissions": permissions.to_json()})
+
+    def restrict_chat_member(self, chat_id, user_id, permissions: types.ChatPermissions, until_date=None):
+        if isinstance(until_date, datetime):
+            until_date = int(until_date.timestamp())
+        return self._call("restrictChatMember", {
+            "chat_id": chat_id, "user_id": user_id,
+            "permissions": permissions.to_json(), "until_date": until_date,
+        })
@@ -1,12 +1,30 @@
 # keep your old init_db
-from pymongo import MongoClient, ReturnDocument
+from pymongo import MongoClient, ReturnDocument, monitoring
 import os
 from bson import ObjectId
 from config import settings
-from telebot import TeleBot
+from utils.bot_client import BotClient
+from utils.metrics import MONGO_LATENCY, MONGO_ERRORS
+from utils.redis_client import lazy_redis
+import threading
+import time
 _client = None
 _db = None
 
+
+class _MongoTimer(monitoring.CommandListener):
+    """Feeds per-command Mongo latency into utils/metrics.py."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_LATENCY.observe(event.duration_micros / 1e6, event.command_name)
+
+    def failed(self, event):
+        MONGO_LATENCY.observe(event.duration_micros / 1e6, event.command_name)
+        MONGO_ERRORS.inc(event.command_name)
+
 COMMAND_GROUPS = {
     "/sr": ["/sr"],
     "/srlist": ["/srlist"],
@@ -21,13 +39,14 @@ COMMAND_GROUPS = {
     "/help": ["/help"],
     "/managegroups": ["/managegroups"],
     "/list": ["/list"],
-    "/clear": ["/clear", "/clean"],               # aliases
+    "/clear": ["/clear", "/clean", "/delete"],    # aliases
     "/muteunsafe": ["/muteunsafe", "/muteall"],   # aliases
     "/refresh_admins": ["/refresh_admins"],
     "/add_to_ad": ["/add_to_ad"],
 }
 
 ALL_MAIN_COMMANDS = list(COMMAND_GROUPS.keys())
+ALIAS_TO_MAIN = {alias: main for main, aliases in COMMAND_GROUPS.items() for alias in aliases}
 
 def init_db():
     global _client, _db
@@ -35,18 +54,32 @@ def init_db():
         uri = os.getenv("MONGODB_URI") or settings.MONGO_URI
         if not uri:
             raise Exception("MONGODB_URI is missing.")
-        _client = MongoClient(uri, serverSelectionTimeoutMS=5000)
+        _client = MongoClient(
+            uri,
+            serverSelectionTimeoutMS=5000,
+            maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+            event_listeners=[_MongoTimer()],
+        )
         _db = _client[settings.MONGO_DB]
     return _db
 
 
+def reset_client():
+    """
+    Drop a MongoClient inherited across fork (gunicorn post_fork). MongoClient
+    is not fork-safe; the worker opens its own on the next init_db().
+    """
+    global _client, _db
+    _client = None
+    _db = None
+
+
 # === New multi-bot stuff ===
 def create_bot_doc(token: str, name: str = "", description: str = "", status: str = "enabled") -> str:
     db = init_db()
 
-    # use telebot to get the bot name 
-    bot = TeleBot(token)
-    name = bot.get_me().username
+    # ask the Bot API for the bot name
+    name = BotClient(token).get_me().username
     
     res = db["bots"].insert_one({
         "token": token.strip(),
@@ -108,10 +141,16 @@ def set_bot_rules(bot_id: str, rules: str):
         return_document=ReturnDocument.AFTER
     )
 
+def _enabled_commands(commands_doc) -> list:
+    # no settings doc yet (bots added before per-bot toggles) -> everything on
+    if not commands_doc:
+        return list(ALL_MAIN_COMMANDS)
+    return commands_doc.get("enabled", [])
+
+
 def get_bot_commands(bot_id: str):
     db = init_db()
-    doc = db["settings"].find_one({"_id": f"commands:{bot_id}"})
-    return doc.get("enabled", []) if doc else []
+    return _enabled_commands(db["settings"].find_one({"_id": f"commands:{bot_id}"}))
 
 
 def set_bot_commands(bot_id: str, commands: list[str]):
@@ -121,18 +160,87 @@ def set_bot_commands(bot_id: str, commands: list[str]):
         {"$set": {"enabled": commands}},
         upsert=True
     )
+    invalidate_command_table(bot_id)
     return commands
 
 
 def is_command_enabled(bot_id: str, command: str) -> bool:
     """Check if a command or any of its aliases is enabled for a bot."""
-    enabled = set(get_bot_commands(bot_id))
+    main_cmd = ALIAS_TO_MAIN.get(command)
+    if main_cmd is None:
+        return False
+    return main_cmd in get_command_table(bot_id)["enabled"]
+
+
+# === Compiled command table ===
+# Per bot: every alias and custom command -> route, compiled from one Mongo
+# read and kept in process memory. Admin edits bump cmdtable_version:{bot_id}
+# in Redis; workers compare versions at most every COMMAND_TABLE_CHECK
+# seconds, so resolving a command is a dict lookup with no DB access.
+#
+# route = ("custom", reply) | ("builtin", main_command, enabled)
+
+_r = lazy_redis()
+_command_tables = {}  # bot_id -> {"version", "checked_at", "table"}
+_command_tables_lock = threading.Lock()
+
+
+def _command_version_key(bot_id: str):
+    return f"cmdtable_version:{bot_id}"
 
-    for main_cmd, aliases in COMMAND_GROUPS.items():
-        if command in aliases:       # match alias
-            return main_cmd in enabled
 
-    return False
+def compile_command_table(bot_id: str) -> dict:
+    db = init_db()
+    docs = {d["_id"]: d for d in db["settings"].find(
+        {"_id": {"$in": [f"commands:{bot_id}", f"customcmds:{bot_id}"]}})}
+
+    enabled = set(_enabled_commands(docs.get(f"commands:{bot_id}")))
+    custom = (docs.get(f"customcmds:{bot_id}") or {}).get("commands", {})
+
+    routes = {alias: ("builtin", main, main in enabled) for alias, main in ALIAS_TO_MAIN.items()}
+    # custom replies win over built-ins, same as before
+    routes.update({command: ("custom", reply) for command, reply in custom.items()})
+    return {"enabled": enabled, "custom": custom, "routes": routes}
+
+
+def _current_command_version(bot_id: str):
+    try:
+        return int(_r.get(_command_version_key(bot_id)) or 0)
+    except Exception as e:
+        print(f"[command_table] Redis error: {e}")
+        return None  # keep serving what we have
+
+
+def get_command_table(bot_id: str) -> dict:
+    now = time.time()
+    entry = _command_tables.get(bot_id)
+    if entry and now - entry["checked_at"] < settings.COMMAND_TABLE_CHECK:
+        return entry["table"]
+
+    version = _current_command_version(bot_id)
+    if entry and (version is None or version == entry["version"]):
+        entry["checked_at"] = now
+        return entry["table"]
+
+    table = compile_command_table(bot_id)
+    with _command_tables_lock:
+        _command_tables[bot_id] = {"version": version, "checked_at": now, "table": table}
+    return table
+
+
+def resolve_command(bot_id: str, command: str):
+    """Route for a command or alias, None if the bot doesn't know it."""
+    return get_command_table(bot_id)["routes"].get(command)
+
+
+def invalidate_command_table(bot_id: str):
+    """Call after any change to a bot's command toggles or custom commands."""
+    with _command_tables_lock:
+        _command_tables.pop(bot_id, None)
+    try:
+        _r.incr(_command_version_key(bot_id))
+    except Exception as e:
+        print(f"[command_table] Redis error: {e}")
 
 def ensure_indexes():
     db = init_db()
@@ -158,6 +266,12 @@ def ensure_indexes():
         unique=True
     )
 
+    # SessionSnapshots: restore per bot (_id is "bot_id:gid")
+    db["SessionSnapshots"].create_index(
+        [("bot_id", 1)],
+        name="session_snapshots_bot"
+    )
+
 # === Custom Commands ===
 def set_bot_custom_command(bot_id: str, command: str, reply: str):
     db = init_db()
@@ -166,6 +280,7 @@ def set_bot_custom_command(bot_id: str, command: str, reply: str):
         {"$set": {f"commands.{command}": reply}},
         upsert=True
     )
+    invalidate_command_table(bot_id)
 
 def get_custom_command(bot_id: str, command: str):
     db = init_db()
@@ -185,6 +300,7 @@ def delete_custom_command(bot_id: str, command: str):
         {"_id": f"customcmds:{bot_id}"},
         {"$unset": {f"commands.{command}": ""}}
     )
+    invalidate_command_table(bot_id)
 
 # === Custom Verification Text ===
 def set_bot_verification_text(bot_id: str, text: str):
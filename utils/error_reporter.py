@@ -0,0 +1,145 @@
+# utils/error_reporter.py
+import html
+import os
+import threading
+import time
+from config import settings
+from utils import bot_api
+
+# Errors are fingerprinted by (context, exception type) and counted in-process.
+# A background thread sends one digest per bot every ERROR_DIGEST_INTERVAL
+# seconds, so a Redis/Mongo outage costs one DM per interval instead of one
+# per failing message, and the failing request never waits on Telegram.
+# Flood waits (429, also from an open breaker in utils/bot_api.py) are only
+# logged.
+
+MAX_DIGEST_LEN = 4000
+
+_lock = threading.Lock()
+_pending = {}   # (bot key, fingerprint) -> entry, cleared on every digest
+_totals = {}    # fingerprint -> entry, since process start (GET /errors)
+_flusher = None  # (pid, thread)
+
+
+def fingerprint(error, context: str) -> str:
+    return f"{context}|{type(error).__name__}"
+
+
+def _bot_key(bot) -> str:
+    """Bot id from the token (TeleBot and BotClient both carry one)."""
+    token = getattr(bot, "token", None)
+    return token.split(":", 1)[0] if token else str(id(bot))
+
+
+def _describe(message):
+    if not message:
+        return ""
+    user = getattr(message, "from_user", None)
+    chat = getattr(message, "chat", None)
+    info = ""
+    if user:
+        info += f"@{user.username or 'N/A'} ({user.id})"
+    if chat:
+        info += f" in {chat.id}"
+    return info.strip()
+
+
+def _bump(store: dict, key, error, context: str, where: str, now: float):
+    entry = store.get(key)
+    if entry is None:
+        entry = store[key] = {
+            "context": context,
+            "type": type(error).__name__,
+            "count": 0,
+            "first_seen": now,
+        }
+    entry["count"] += 1
+    entry["last_seen"] = now
+    entry["last_error"] = str(error)[:300]
+    entry["last_where"] = where
+    return entry
+
+
+def report(bot, error, context: str, message=None):
+    """Record an error for the next digest. Never blocks on the network."""
+    if bot_api.error_kind(error) == "flood":
+        # counted in telegram_api_calls_total; a DM would only add to the flood
+        print(f"[{context}] flood wait: {error}")
+        return
+    fp = fingerprint(error, context)
+    where = _describe(message)
+    now = time.time()
+    with _lock:
+        _bump(_totals, fp, error, context, where, now)
+        # per bot: the same error on several bots reaches every bot's digest
+        entry = _bump(_pending, (_bot_key(bot), fp), error, context, where, now)
+        entry["bot"] = bot
+    print(f"[{context} ERROR] {error}")
+    _ensure_flusher()
+
+
+def get_aggregates() -> list:
+    """All fingerprints seen by this worker, most frequent first."""
+    with _lock:
+        items = [dict(entry, fingerprint=fp) for fp, entry in _totals.items()]
+    return sorted(items, key=lambda e: e["count"], reverse=True)
+
+
+def _format_digest(entries) -> str:
+    total = sum(e["count"] for e in entries)
+    text = f"⚠️ <b>Error digest</b> — {total} error(s) in the last {settings.ERROR_DIGEST_INTERVAL}s\n"
+    for e in sorted(entries, key=lambda e: e["count"], reverse=True):
+        block = (
+            f"\n<b>{html.escape(e['context'])}</b> · {e['type']} ×{e['count']}\n"
+            f"🧵 <code>{html.escape(e['last_error'])}</code>\n"
+        )
+        if e.get("last_where"):
+            block += f"👤 {e['last_where']}\n"
+        if len(text) + len(block) > MAX_DIGEST_LEN:
+            text += "\n…"
+            break
+        text += block
+    return text
+
+
+def flush():
+    """Send one digest per bot for everything recorded since the last flush."""
+    global _pending
+    with _lock:
+        pending, _pending = _pending, {}
+    if not pending:
+        return
+
+    by_bot = {}
+    for (bot_key, _), entry in pending.items():
+        by_bot.setdefault(bot_key, []).append(entry)
+
+    for entries in by_bot.values():
+        bot = entries[0]["bot"]
+        try:
+            bot.send_message(settings.DEV_CHAT_ID, _format_digest(entries), parse_mode="HTML")
+        except Exception as e:
+            print(f"[notify_dev failed] {e}")
+
+
+def _flush_loop():
+    while True:
+        time.sleep(settings.ERROR_DIGEST_INTERVAL)
+        try:
+            flush()
+        except Exception as e:
+            print(f"[error_reporter] flush error: {e}")
+
+
+def _ensure_flusher():
+    """Start the digest thread once per process (also after a fork)."""
+    global _flusher
+    pid = os.getpid()
+    if _flusher and _flusher[0] == pid:
+        return
+    with _lock:
+        if _flusher and _flusher[0] == pid:
+            return
+        thread = threading.Thread(target=_flush_loop, name="error-digest", daemon=True)
+        thread.start()
+        _flusher = (pid, thread)
@@ -1,15 +1,18 @@
 # utils/group_manager.py
 import json
+import time
 import redis
 from typing import List
 from utils.db import init_db
 from config import settings
-from utils.redis_client import get_redis
+from utils.redis_client import lazy_redis
 
 # keep a tiny in-process fallback cache (optional)
 ALLOWED_GROUPS_CACHE: dict = {}
+_ALLOWED_SETS: dict = {}     # bot_id -> frozenset, for O(1) membership per update
+_METADATA_SEEN: dict = {}    # (bot_id, group_id) -> (title, username, written_at)
 
-_r = get_redis()
+_r = lazy_redis()
 
 # Redis hash key where we store allowed groups for all bots
 _ALLOWED_GROUPS_HASH = "allowed_groups"
@@ -93,6 +96,14 @@ def save_allowed_groups(bot_id: str, groups: List[int]):
 
     # update local cache
     ALLOWED_GROUPS_CACHE[bot_id] = list(groups)
+    _ALLOWED_SETS.pop(bot_id, None)
+
+
+def is_group_allowed(bot_id: str, group_id: int) -> bool:
+    groups = _ALLOWED_SETS.get(bot_id)
+    if groups is None:
+        groups = _ALLOWED_SETS[bot_id] = frozenset(get_allowed_groups(bot_id))
+    return group_id in groups
 
 
 def add_group(bot_id: str, group_id: int):
@@ -112,9 +123,15 @@ def remove_group(bot_id: str, group_id: int):
 def save_group_metadata(db, bot_id: str, chat):
     """
     Store/update group metadata for a given bot in MongoDB.
-    (unchanged from original)
+    Called for every group update, so the write is skipped while title and
+    username are unchanged and the last write is fresher than GROUP_METADATA_REFRESH.
     """
     if chat.type in ["group", "supergroup"]:
+        key = (bot_id, chat.id)
+        seen = _METADATA_SEEN.get(key)
+        now = time.time()
+        if seen and seen[:2] == (chat.title, chat.username) and now - seen[2] < settings.GROUP_METADATA_REFRESH:
+            return
         db["groups"].update_one(
             {"bot_id": bot_id, "group_id": chat.id},
             {"$set": {
@@ -124,3 +141,4 @@ def save_group_metadata(db, bot_id: str, chat):
             }},
             upsert=True
         )
+        _METADATA_SEEN[key] = (chat.title, chat.username, now)
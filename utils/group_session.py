@@ -2,101 +2,461 @@ import json
 from telebot.types import Message, ChatPermissions
 from telebot import types
 from utils.message_tracker import track_message
+from utils.auto_delete import schedule_delete
 from handlers.admin import notify_dev
 from config import settings
-from utils.telegram import is_user_admin
-from utils.redis_client import get_redis
+from utils.telegram import is_user_admin, mute_user
+from utils.redis_client import get_redis, lazy_redis
+from utils.session_store import SessionWrites, get_store
+from utils.session_codec import encode_group_messages, decode_group_messages
 from telebot.apihelper import ApiTelegramException
 import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import timedelta
 ADMIN_IDS = settings.ADMIN_IDS
 
 from utils import db as ddb
 from utils.helper import send_media
+from utils.list_renderer import paginate, get_cached_pages, clear_cached_pages, send_page
+from utils import bot_api, jobs, scheduler
 
-# === Redis Connection ===
-r = get_redis()
+# === Storage ===
+# Session state goes through the configured SessionStore (SESSION_STORE,
+# see utils/session_store.py); `r` is for the keys around it (status message
+# ids, locks).
+r = lazy_redis()
 
 # Helper: serialize/deserialize dict safely
+# group_messages is the bulk of a session, so it is stored with the compact
+# codec in utils/session_codec.py; every other field stays JSON.
 
 
 def _get(bot_id: str, key: str, default):
-    raw = r.hget(f"sessions:{bot_id}", key)
+    if key in BATCHED_FIELDS:
+        _flush_batch()  # include this thread's queued link submissions
+    return _decode_field(key, get_store().get_fields(bot_id, (key,))[0], default)
+
+
+def _set(bot_id: str, key: str, value):
+    if key in BATCHED_FIELDS:
+        _flush_batch()
+    get_store().set_fields(bot_id, {key: _encode_field(key, value)})
+
+
+def _decode_field(key: str, raw, default):
     if raw is None:
         return default
+    if key == "group_messages":
+        return decode_group_messages(raw)
     return json.loads(raw)
 
 
-def _set(bot_id: str, key: str, value):
-    r.hset(f"sessions:{bot_id}", key, json.dumps(value))
+def _encode_field(key: str, value):
+    if key == "group_messages":
+        return encode_group_messages(value)
+    return json.dumps(value)
 
 
 def normalize_gid(group_id):
     return str(group_id)
 
+
+def _writes(bot_id: str) -> SessionWrites:
+    """The open batch's writes for this bot, or None outside batched_writes()."""
+    batch = _current_batch()
+    if batch is None:
+        return None
+    return batch["writes"].setdefault(bot_id, SessionWrites())
+
+
+# Per-group version, bumped on every change to a group's session data.
+# Derived caches (rendered list pages) are keyed on it. A bump also stamps
+# the group's activity, read by the lifecycle sweeper to archive idle sessions.
+def bump_session_version(bot_id: str, group_id):
+    writes = _writes(bot_id)
+    if writes is not None:
+        writes.bump(normalize_gid(group_id))
+        return
+    writes = SessionWrites()
+    writes.bump(normalize_gid(group_id))
+    get_store().apply(bot_id, writes)
+
+
+def get_session_version(bot_id: str, group_id) -> int:
+    return get_store().get_version(bot_id, normalize_gid(group_id))
+
+
+# ---------------- Counters ----------------
+# Materialized per-group counters, kept in step with every submission,
+# verification, SR request and deletion so /count and /progress never
+# have to deserialize group_messages. Deltas are applied in the same
+# SessionWrites (transaction) as the change they count.
+
+STAT_FIELDS = ("submitted", "verified", "unverified", "sr_pending")
+_STATS_SOURCES = ("group_messages", "sr_requested_users")
+
+
+# ---------------- Batched writes ----------------
+# For batch ingestion (utils/poller.py): inside batched_writes(), link
+# submissions are queued and applied when the buffer is flushed, all of a
+# bot's in one transaction: group_messages / unique_x_usernames (and the
+# phases) are read once under WATCH, every queued submission is replayed on
+# them in order, and the fields, version bumps and counter deltas are written
+# together. A batch of N links costs one transaction instead of N, and a
+# close, archive or restore that lands before the flush is never overwritten.
+# The duplicate / fraud warnings go out after the flush, from what the
+# transaction decided. Per thread; webhook requests never enter it.
+# Anything that reads session state (transactions, counters, rendered lists)
+# flushes the queue first.
+
+BATCHED_FIELDS = ("group_messages", "unique_x_usernames")
+_REPLAY_FIELDS = ("active_groups",) + BATCHED_FIELDS
+
+_batch_local = threading.local()
+
+
+def _current_batch():
+    return getattr(_batch_local, "batch", None)
+
+
+def _replay_submissions(bot_id: str, submissions: list) -> list:
+    """Apply queued (gid, entry, notify) in one transaction; [(outcome, offenders)] in order."""
+    result = {}
+
+    def build(raws):
+        data = {f: _decode_field(f, raw, {}) for f, raw in zip(_REPLAY_FIELDS, raws)}
+        writes = SessionWrites()
+        outcomes = result["outcomes"] = []
+        for gid, entry, _ in submissions:
+            if data["active_groups"].get(gid) != "collecting":
+                outcomes.append(("closed", []))  # closed, stopped or archived since
+                continue
+            outcome, deltas, offenders = _submit_link(data, gid, entry)
+            outcomes.append((outcome, offenders))
+            if deltas:
+                writes.bump(gid)
+                writes.incr(gid, deltas)
+        if not writes:
+            return None
+        writes.fields = {f: _encode_field(f, data[f]) for f in BATCHED_FIELDS}
+        return writes
+
+    get_store().transact(bot_id, _REPLAY_FIELDS, build)
+    return result["outcomes"]
+
+
+def _flush_batch():
+    batch = _current_batch()
+    if batch is None or not (batch["submissions"] or batch["writes"]):
+        return
+    submissions, queued = batch["submissions"], batch["writes"]
+    batch["submissions"], batch["writes"] = {}, {}
+
+    # only version bumps: increments, safe outside the transaction
+    pending = {bot_id: writes for bot_id, writes in queued.items() if writes}
+    if pending:
+        get_store().apply_many(pending)
+
+    for bot_id, queue in submissions.items():
+        outcomes = _replay_submissions(bot_id, queue)
+        for (_, _, notify), (outcome, offenders) in zip(queue, outcomes):
+            try:
+                notify(outcome, offenders)
+            except Exception as e:
+                print(f"[group_session] submission warning error: {e}")
+
+
+@contextmanager
+def batched_writes():
+    """Queue link submissions of this thread until the block ends."""
+    if _current_batch() is not None:
+        yield  # nested: the outer block flushes
+        return
+    _batch_local.batch = {"submissions": {}, "writes": {}}
+    try:
+        yield
+    finally:
+        try:
+            _flush_batch()
+        finally:
+            _batch_local.batch = None
+
+
+# ---------------- Transactions ----------------
+# A session transition (phase change, admin action) reads and writes several
+# session fields. update_session does it as one atomic read-modify-write in
+# the store: WATCH/MULTI with retries on Redis, the store lock in memory.
+# Every write (fields, version bump, counters, extra) is applied together.
+
+
+def update_session(bot_id: str, group_id, fields, mutate, extra=None):
+    """
+    mutate(data) gets {field: decoded value ({} if missing)} and changes it in
+    place. It returns the counter deltas to apply ({} for none), or None to
+    abort without writing. extra(writes), if given, adds more changes to the
+    same SessionWrites. Returns what mutate returned.
+    """
+    _flush_batch()
+    gid = normalize_gid(group_id)
+    result = {}
+
+    def build(raws):
+        data = {f: _decode_field(f, raw, {}) for f, raw in zip(fields, raws)}
+        deltas = mutate(data)
+        result["deltas"] = deltas
+        if deltas is None:
+            return None
+        writes = SessionWrites()
+        writes.fields = {f: _encode_field(f, data[f]) for f in fields}
+        writes.bump(gid)
+        writes.incr(gid, deltas)
+        if extra:
+            extra(writes)
+        return writes
+
+    get_store().transact(bot_id, fields, build)
+    return result["deltas"]
+
+
+def rebuild_session_stats(bot_id: str, group_id) -> dict:
+    """
+    Recount from group_messages / sr_requested_users, atomically with them.
+    For sessions started before counters existed, and at /close to bring
+    back in line counters written by older code.
+    """
+    _flush_batch()
+    gid = normalize_gid(group_id)
+    result = {}
+
+    def build(raws):
+        group_messages, sr_users = (_decode_field(f, raw, {}) for f, raw in zip(_STATS_SOURCES, raws))
+        checks = {}
+        for msg in group_messages.get(gid, []):
+            checks[msg["user_id"]] = checks.get(msg["user_id"], True) and msg["check"]
+        verified = sum(1 for ok in checks.values() if ok)
+        result["stats"] = {
+            "submitted": len(checks),
+            "verified": verified,
+            "unverified": len(checks) - verified,
+            "sr_pending": len(set(sr_users.get(gid, []))),
+        }
+        writes = SessionWrites()
+        writes.reset_stats[gid] = result["stats"]
+        return writes
+
+    get_store().transact(bot_id, _STATS_SOURCES, build)
+    return result["stats"]
+
+
+def get_session_stats(bot_id: str, group_id) -> dict:
+    _flush_batch()
+    gid = normalize_gid(group_id)
+    raw = get_store().get_stats(bot_id, gid)
+    if not raw:
+        if get_group_phase(bot_id, gid) is None:
+            return dict.fromkeys(STAT_FIELDS, 0)
+        return rebuild_session_stats(bot_id, gid)
+    return {field: max(0, int(raw.get(field, 0))) for field in STAT_FIELDS}
+
 # ---------------- Session Control ----------------
 
+SESSION_FIELDS = ("active_groups", "group_messages", "sr_requested_users", "unique_x_usernames")
+
 
 def start_group_session(bot_id: str, group_id):
     gid = normalize_gid(group_id)
-    active_groups = _get(bot_id, "active_groups", {})
-    group_messages = _get(bot_id, "group_messages", {})
-    sr_requested_users = _get(bot_id, "sr_requested_users", {})
-    unique_x_usernames = _get(bot_id, "unique_x_usernames", {})
 
-    active_groups[gid] = "collecting"
-    group_messages[gid] = []
-    sr_requested_users[gid] = []
-    unique_x_usernames[gid] = []
+    def mutate(data):
+        data["active_groups"][gid] = "collecting"
+        data["group_messages"][gid] = []
+        data["sr_requested_users"][gid] = []
+        data["unique_x_usernames"][gid] = []
+        return {}
+
+    def extra(writes):
+        writes.reset_stats[gid] = dict.fromkeys(STAT_FIELDS, 0)
 
-    _set(bot_id, "active_groups", active_groups)
-    _set(bot_id, "group_messages", group_messages)
-    _set(bot_id, "sr_requested_users", sr_requested_users)
-    _set(bot_id, "unique_x_usernames", unique_x_usernames)
+    update_session(bot_id, gid, SESSION_FIELDS, mutate, extra=extra)
 
 
 def stop_group_session(bot_id: str, group_id):
     gid = normalize_gid(group_id)
-    active_groups = _get(bot_id, "active_groups", {})
-    group_messages = _get(bot_id, "group_messages", {})
-    sr_requested_users = _get(bot_id, "sr_requested_users", {})
-    unique_x_usernames = _get(bot_id, "unique_x_usernames", {})
+    stopped = {}
 
-    active_groups.pop(gid, None)
-    sr_requested_users.pop(gid, None)
-    unique_x_usernames.pop(gid, None)
-    msgs = group_messages.pop(gid, [])
+    def mutate(data):
+        data["active_groups"].pop(gid, None)
+        data["sr_requested_users"].pop(gid, None)
+        data["unique_x_usernames"].pop(gid, None)
+        stopped["msgs"] = data["group_messages"].pop(gid, [])
+        return {}
 
-    _set(bot_id, "active_groups", active_groups)
-    _set(bot_id, "group_messages", group_messages)
-    _set(bot_id, "sr_requested_users", sr_requested_users)
-    _set(bot_id, "unique_x_usernames", unique_x_usernames)
+    def extra(writes):
+        writes.dropped.add(gid)  # counters and activity entry, after the bump re-added it
 
-    return msgs
+    update_session(bot_id, gid, SESSION_FIELDS, mutate, extra=extra)
+    r.delete(_status_msg_key(bot_id, gid))
+    clear_cached_pages(bot_id, gid, LIST_KINDS)
+    scheduler.cancel_all(bot_id, gid)
 
+    return stopped["msgs"]
 
-def set_verification_phase(bot_id: str, group_id):
+
+def set_group_phase(bot_id: str, group_id, phase: str, only_if_active: bool = False):
+    """Set a group's phase in one transaction. Returns False if skipped."""
     gid = normalize_gid(group_id)
-    active_groups = _get(bot_id, "active_groups", {})
-    if gid in active_groups:
-        active_groups[gid] = "verifying"
-        _set(bot_id, "active_groups", active_groups)
+
+    def mutate(data):
+        if only_if_active and gid not in data["active_groups"]:
+            return None
+        data["active_groups"][gid] = phase
+        return {}
+
+    return update_session(bot_id, gid, ("active_groups",), mutate) is not None
+
+
+def get_active_groups(bot_id: str) -> dict:
+    return _get(bot_id, "active_groups", {})
+
+
+def drop_session_if_empty(bot_id: str) -> bool:
+    """Delete the bot's session hash if no group is active, atomically with that check."""
+    _flush_batch()
+    return get_store().delete_session_if(
+        bot_id, ("active_groups",), lambda raws: not _decode_field("active_groups", raws[0], {}))
+
+
+def seed_session_activity(bot_id: str):
+    """
+    Sessions started before activity tracking have no zset entry and would
+    never look idle. Give them one now so they age out like the rest.
+    """
+    known = get_store().get_activity(bot_id)
+    missing = {gid: time.time() for gid in get_active_groups(bot_id) if gid not in known}
+    if missing:
+        get_store().touch_activity(bot_id, missing)
+
+
+def get_idle_groups(bot_id: str, idle_seconds: int):
+    """Group ids whose session has not changed for `idle_seconds`."""
+    return get_store().get_idle_groups(bot_id, time.time() - idle_seconds)
+
+
+def archive_group_session(bot_id: str, group_id):
+    """
+    Stop a session and keep its submissions in Mongo (LinksData), same as /end.
+    Returns the number of archived submissions.
+    """
+    data = stop_group_session(bot_id, group_id)
+    ddb.init_db()["LinksData"].update_one(
+        {"chat_id": int(group_id), "bot_id": bot_id},
+        {"$push": {"data": data}},
+        upsert=True
+    )
+    return len(data)
+
+
+def set_verification_phase(bot_id: str, group_id):
+    set_group_phase(bot_id, group_id, "verifying", only_if_active=True)
 
 
 def get_group_phase(bot_id: str, group_id):
     return _get(bot_id, "active_groups", {}).get(normalize_gid(group_id))
 
 
+# (bot_id, gid) -> (session version, phase), least recently used first.
+# Every phase change goes through update_session, which bumps the version,
+# and versions never repeat (a fresh counter starts at a timestamp, see
+# utils/session_store.py), so a matching version means the cached phase is
+# current: one small GET instead of fetching and decoding the bot's whole
+# active_groups field for every group message. Holds PHASE_CACHE_SIZE groups.
+PHASE_CACHE_SIZE = 10000
+_phase_cache = OrderedDict()
+_phase_cache_lock = threading.Lock()
+
+
+def get_cached_group_phase(bot_id: str, group_id):
+    key = (bot_id, normalize_gid(group_id))
+    version = get_session_version(*key)  # read first, so the phase is never older
+    with _phase_cache_lock:
+        cached = _phase_cache.get(key)
+        if cached and cached[0] == version:
+            _phase_cache.move_to_end(key)
+            return cached[1]
+    phase = get_group_phase(*key)
+    with _phase_cache_lock:
+        _phase_cache[key] = (version, phase)
+        _phase_cache.move_to_end(key)
+        if len(_phase_cache) > PHASE_CACHE_SIZE:
+            _phase_cache.popitem(last=False)
+    return phase
+
+
 def is_group_verifying(bot_id: str, group_id):
     return get_group_phase(bot_id, group_id) == "verifying"
 
+# ---------------- Snapshots ----------------
+# utils/session_snapshots.py copies changed groups to Mongo and puts back the
+# ones the store lost. A group's snapshot is its slice of every session field
+# plus its counters; None means the group has no session (stopped, archived).
+
+
+def export_group_sessions(bot_id: str, gids) -> dict:
+    """{gid: snapshot or None}, reading the bot's session fields once."""
+    _flush_batch()
+    store = get_store()
+    raws = store.get_fields(bot_id, SESSION_FIELDS)
+    data = {f: _decode_field(f, raw, {}) for f, raw in zip(SESSION_FIELDS, raws)}
+    snapshots = {}
+    for gid in gids:
+        phase = data["active_groups"].get(gid)
+        snapshots[gid] = None if phase is None else {
+            "phase": phase,
+            "group_messages": data["group_messages"].get(gid, []),
+            "sr_requested_users": data["sr_requested_users"].get(gid, []),
+            "unique_x_usernames": data["unique_x_usernames"].get(gid, []),
+            "stats": store.get_stats(bot_id, gid),
+            "version": store.get_version(bot_id, gid),
+        }
+    return snapshots
+
+
+def restore_group_session(bot_id: str, group_id, snapshot: dict) -> bool:
+    """Put a snapshot back unless the group has a live session. True if restored."""
+    gid = normalize_gid(group_id)
+
+    def mutate(data):
+        if gid in data["active_groups"]:
+            return None
+        data["active_groups"][gid] = snapshot["phase"]
+        data["group_messages"][gid] = snapshot["group_messages"]
+        data["sr_requested_users"][gid] = snapshot["sr_requested_users"]
+        data["unique_x_usernames"][gid] = snapshot["unique_x_usernames"]
+        return {}
+
+    def extra(writes):
+        if snapshot.get("stats"):  # otherwise get_session_stats rebuilds them
+            writes.reset_stats[gid] = snapshot["stats"]
+
+    if update_session(bot_id, gid, SESSION_FIELDS, mutate, extra=extra) is None:
+        return False
+    clear_cached_pages(bot_id, gid, LIST_KINDS)  # the version restarted
+    return True
+
 # ---------------- Messages ----------------
 
 
 def add_group_message(bot_id: str, group_id, message_data: dict):
     gid = normalize_gid(group_id)
-    group_messages = _get(bot_id, "group_messages", {})
-    group_messages.setdefault(gid, []).append(message_data)
-    _set(bot_id, "group_messages", group_messages)
+
+    def mutate(data):
+        data["group_messages"].setdefault(gid, []).append(message_data)
+        if message_data.get("check"):
+            return {"submitted": 1, "verified": 1}
+        return {"submitted": 1, "unverified": 1}
+
+    update_session(bot_id, gid, ("group_messages",), mutate)
 
 
 def get_group_messages(bot_id: str, group_id):
@@ -105,58 +465,122 @@ def get_group_messages(bot_id: str, group_id):
 
 def request_sr(bot_id: str, group_id, user_id):
     gid = normalize_gid(group_id)
-    sr_users = _get(bot_id, "sr_requested_users", {})
-    group_messages = _get(bot_id, "group_messages", {})
 
-    sr_users.setdefault(gid, [])
-    if user_id not in sr_users[gid]:
-        sr_users[gid].append(user_id)
+    def mutate(data):
+        sr_users = data["sr_requested_users"].setdefault(gid, [])
+        newly_requested = user_id not in sr_users
+        if newly_requested:
+            sr_users.append(user_id)
 
-    for msg in group_messages.get(gid, []):
-        if msg["user_id"] == user_id:
-            msg["check"] = False
+        was_verified = False
+        for msg in data["group_messages"].get(gid, []):
+            if msg["user_id"] == user_id:
+                was_verified = was_verified or msg["check"]
+                msg["check"] = False
+
+        return {
+            "sr_pending": int(newly_requested),
+            "verified": -int(was_verified),
+            "unverified": int(was_verified),
+        }
 
-    _set(bot_id, "sr_requested_users", sr_users)
-    _set(bot_id, "group_messages", group_messages)
+    update_session(bot_id, gid, ("sr_requested_users", "group_messages"), mutate)
 
 
 def remove_sr_request(bot_id: str, group_id, user_id):
     gid = normalize_gid(group_id)
-    sr_users = _get(bot_id, "sr_requested_users", {})
-    if gid in sr_users and user_id in sr_users[gid]:
-        sr_users[gid].remove(user_id)
-        _set(bot_id, "sr_requested_users", sr_users)
+
+    def mutate(data):
+        sr_users = data["sr_requested_users"].get(gid, [])
+        if user_id not in sr_users:
+            return None
+        sr_users.remove(user_id)
+        return {"sr_pending": -1}
+
+    update_session(bot_id, gid, ("sr_requested_users",), mutate)
 
 
 def get_sr_users(bot_id: str, group_id):
     return set(_get(bot_id, "sr_requested_users", {}).get(normalize_gid(group_id), []))
 
 
+def _submit_link(data: dict, gid: str, entry: dict):
+    """
+    Apply one link submission to data ({"group_messages", "unique_x_usernames"}).
+    Returns (outcome, counter deltas or None, offenders): "duplicate_user"
+    and "fraud" change nothing, "stored" appended the entry.
+    """
+    group_messages = data["group_messages"].setdefault(gid, [])
+    unique_x_usernames = data["unique_x_usernames"].setdefault(gid, [])
+    user_id, x_username = entry["user_id"], entry["x_username"]
+
+    # 🚫 Prevent same TG user from sending more than one link
+    if any(e["user_id"] == user_id for e in group_messages):
+        return "duplicate_user", None, []
+
+    if x_username not in unique_x_usernames:
+        # ✅ First time this X username appears
+        unique_x_usernames.append(x_username)
+    else:
+        # 🔎 Duplicate username found — collect offenders
+        offenders = [e for e in group_messages if e["x_username"] == x_username and e["user_id"] != user_id]
+        if offenders:
+            return "fraud", None, offenders
+
+    group_messages.append(dict(entry, number=len(group_messages) + 1))
+    return "stored", {"submitted": 1, "unverified": 1}, []
+
+
 def store_group_message(bot, bot_id: str, message: Message, group_id, user_id, username, link, x_username=None, first_name=None):
     gid = normalize_gid(group_id)
-    group_messages = _get(bot_id, "group_messages", {})
-    unique_x_usernames = _get(bot_id, "unique_x_usernames", {})
-
-    group_messages.setdefault(gid, [])
-    unique_x_usernames.setdefault(gid, [])
 
     # ❌ Only allow x.com links
     if not link.startswith("https://x.com"):
         return
 
     x_username = link.split("/")[3]
+    entry = {
+        "number": 0,
+        "user_id": user_id,
+        "username": username,
+        "first_name": first_name,
+        "link": link,
+        "x_username": x_username,
+        "check": False,
+    }
+
+    def warn(outcome, offenders):
+        _warn_submission(bot, bot_id, message, entry, outcome, offenders)
+
+    batch = _current_batch()
+    if batch is not None:
+        # batched_writes(): stored, and warned about, when the batch is flushed
+        batch["submissions"].setdefault(bot_id, []).append((gid, entry, warn))
+        return
 
-    # 🚫 Prevent same TG user from sending more than one link
-    already_sent = any(entry["user_id"] ==
-                       user_id for entry in group_messages[gid])
-    if already_sent:
+    # the check, the append, the version bump and the counters in one transaction
+    result = {}
+
+    def mutate(data):
+        outcome, deltas, offenders = _submit_link(data, gid, entry)
+        result.update(outcome=outcome, offenders=offenders)
+        return deltas
+
+    update_session(bot_id, gid, BATCHED_FIELDS, mutate)
+    warn(result["outcome"], result["offenders"])
+
+
+def _warn_submission(bot, bot_id: str, message: Message, entry: dict, outcome: str, offenders: list):
+    """Warning for a rejected submission: one link per user, or a shared X account."""
+    user_id, x_username = entry["user_id"], entry["x_username"]
+    if outcome == "duplicate_user":
         try:
             warn = bot.send_message(
                 message.chat.id,
                 f"❌ <a href='tg://user?id={user_id}'>{message.from_user.first_name}</a>You can only send one link.",
                 parse_mode="HTML"
             )
-            track_message(message.chat.id, warn.message_id, bot_id=bot_id)
+            schedule_delete(message.chat.id, warn.message_id, bot_id, "duplicate_link")
         except Exception:
             pass
 
@@ -164,48 +588,16 @@ def store_group_message(bot, bot_id: str, message: Message, group_id, user_id, u
             bot.delete_message(message.chat.id, message.message_id)
         except Exception:
             pass
-
-        return
-
-    # ✅ First time this X username appears
-    if x_username not in unique_x_usernames[gid]:
-        unique_x_usernames[gid].append(x_username)
-        group_messages[gid].append({
-            "number": len(group_messages[gid]) + 1,
-            "user_id": user_id,
-            "username": username,
-            "first_name": first_name,
-            "link": link,
-            "x_username": x_username,
-            "check": False,
-        })
-        _set(bot_id, "group_messages", group_messages)
-        _set(bot_id, "unique_x_usernames", unique_x_usernames)
         return
 
-    # 🔎 Duplicate username found — collect offenders
-    offenders = [
-        entry for entry in group_messages[gid]
-        if entry["x_username"] == x_username and entry["user_id"] != user_id
-    ]
-    if len(offenders) < 1:
-        group_messages[gid].append({
-            "number": len(group_messages[gid]) + 1,
-            "user_id": user_id,
-            "username": username,
-            "first_name": first_name,
-            "link": link,
-            "x_username": x_username,
-            "check": False,
-        })
-        _set(bot_id, "group_messages", group_messages)
+    if outcome != "fraud":
         return
 
-    offenders.append({
+    offenders = offenders + [{
         "user_id": user_id,
-        "username": username,
-        "first_name": first_name,
-    })
+        "username": entry["username"],
+        "first_name": entry["first_name"],
+    }]
 
     # 🏷️ Create mention links
     tags = []
@@ -227,54 +619,52 @@ def store_group_message(bot, bot_id: str, message: Message, group_id, user_id, u
         bot.delete_message(message.chat.id, message.message_id)
     except Exception:
         pass
-    track_message(message.chat.id, msg.message_id, bot_id=bot_id)
+    schedule_delete(message.chat.id, msg.message_id, bot_id, "fraud")
 
 
 # 🔹 Utility: Delete a user’s stored link from Redis
 def delete_user_link(bot_id: str, group_id, user_id):
     gid = normalize_gid(group_id)
-    group_messages = _get(bot_id, "group_messages", {})
-    unique_x_usernames = _get(bot_id, "unique_x_usernames", {})
 
-    if gid not in group_messages:
-        return False
+    def mutate(data):
+        group_messages = data["group_messages"]
+        unique_x_usernames = data["unique_x_usernames"]
+        if gid not in group_messages:
+            return None
 
-    # Find the entry for this user
-    entry = next(
-        (e for e in group_messages[gid] if e["user_id"] == user_id), None)
-    if not entry:
-        return False
+        # Find the entry for this user
+        entry = next(
+            (e for e in group_messages[gid] if e["user_id"] == user_id), None)
+        if not entry:
+            return None
 
-    x_username = entry["x_username"]
+        x_username = entry["x_username"]
 
-    # Remove from messages
-    group_messages[gid] = [
-        e for e in group_messages[gid] if e["user_id"] != user_id]
+        # Remove from messages
+        group_messages[gid] = [
+            e for e in group_messages[gid] if e["user_id"] != user_id]
 
-    # If no other user is using this x_username, remove it from unique list
-    still_used = any(e["x_username"] ==
-                     x_username for e in group_messages[gid])
-    if not still_used and gid in unique_x_usernames:
-        unique_x_usernames[gid] = [
-            x for x in unique_x_usernames[gid] if x != x_username]
+        # If no other user is using this x_username, remove it from unique list
+        still_used = any(e["x_username"] ==
+                         x_username for e in group_messages[gid])
+        if not still_used and gid in unique_x_usernames:
+            unique_x_usernames[gid] = [
+                x for x in unique_x_usernames[gid] if x != x_username]
 
-    # Save updates
-    _set(bot_id, "group_messages", group_messages)
-    _set(bot_id, "unique_x_usernames", unique_x_usernames)
+        if entry["check"]:
+            return {"submitted": -1, "verified": -1}
+        return {"submitted": -1, "unverified": -1}
 
-    return True
+    return update_session(bot_id, gid, ("group_messages", "unique_x_usernames"), mutate) is not None
 
 # ---------------- Group closing & verification ----------------
 def handle_reopen_group(bot, bot_id: str, message):
     if not is_user_admin(bot, message.chat.id, message.from_user.id):
-        msg = bot.reply_to(message, "❌ Only admins can use this command.")  
-        track_message(message.chat.id, msg.message_id, bot_id=bot_id)
+        msg = bot.reply_to(message, "❌ Only admins can use this command.")
+        schedule_delete(message.chat.id, msg.message_id, bot_id, "admin_only")
         return
 
-    gid = normalize_gid(message.chat.id)
-    active_groups = _get(bot_id, "active_groups", {})
-    active_groups[gid] = "collecting"
-    _set(bot_id, "active_groups", active_groups)
+    set_group_phase(bot_id, message.chat.id, "collecting")
 
     # ✅ Update group title → {old_name} | OPEN
     try:
@@ -321,18 +711,26 @@ def handle_reopen_group(bot, bot_id: str, message):
 def handle_close_group(bot, bot_id: str, message):
     if not is_user_admin(bot, message.chat.id, message.from_user.id):
         msg = bot.reply_to(message, "❌ Only admins can use this command.")
-        track_message(message.chat.id, msg.message_id, bot_id=bot_id)
+        schedule_delete(message.chat.id, msg.message_id, bot_id, "admin_only")
         return
-    
-    chat_id = message.chat.id
-    gid = normalize_gid(message.chat.id)
-    active_groups = _get(bot_id, "active_groups", {})
-    active_groups[gid] = "closed"
-    _set(bot_id, "active_groups", active_groups)
+    close_group(bot, bot_id, message.chat.id)
+
+
+def close_group(bot, bot_id: str, chat_id):
+    """Move a group to "closed" (title, permissions, stop video). Used by /close and the auto-close timer."""
+    chat_id = int(chat_id)
+    gid = normalize_gid(chat_id)
+    set_group_phase(bot_id, gid, "closed")
+    rebuild_session_stats(bot_id, gid)  # no more submissions: settle the counters
+
+    scheduler.cancel("auto_close", bot_id, gid)
+    verify_after = get_phase_offsets(bot_id)["verify"]
+    if verify_after:
+        scheduler.schedule("auto_verify", bot_id, gid, verify_after)
 
     # ✅ Update group title → {old_name} | CLOSED
     try:
-        chat_info = bot.get_chat(message.chat.id)
+        chat_info = bot.get_chat(chat_id)
         old_title = chat_info.title or ""
         new_title = old_title
 
@@ -344,7 +742,7 @@ def handle_close_group(bot, bot_id: str, message):
             new_title = new_title + " | CLOSED"
 
         if new_title != old_title:
-            bot.set_chat_title(message.chat.id, new_title)
+            bot.set_chat_title(chat_id, new_title)
 
     except Exception:
         pass
@@ -358,7 +756,7 @@ def handle_close_group(bot, bot_id: str, message):
             can_send_other_messages=False,
             can_add_web_page_previews=False,
         )
-        bot.set_chat_permissions(message.chat.id, restricted_permissions)
+        bot.set_chat_permissions(chat_id, restricted_permissions)
     except Exception:
         pass
 
@@ -371,31 +769,91 @@ def handle_close_group(bot, bot_id: str, message):
             msg = bot.send_video(chat_id, open("gifs/stop.mp4", "rb"))
         track_message(chat_id, msg.message_id, bot_id=bot_id)
         msg2 = bot.send_message(
-            message.chat.id, "Time line is getting updated wait few mins.")
-        track_message(message.chat.id, msg.message_id, bot_id=bot_id)
-        track_message(message.chat.id, msg2.message_id, bot_id=bot_id)
+            chat_id, "Time line is getting updated wait few mins.")
+        track_message(chat_id, msg.message_id, bot_id=bot_id)
+        track_message(chat_id, msg2.message_id, bot_id=bot_id)
     except Exception:
         pass
 
 
-def mark_user_verified(bot_id: str, group_id, user_id):
-    gid = normalize_gid(group_id)
-    group_messages = _get(bot_id, "group_messages", {})
-    x_usernames = set()
-    found_any = False
+def start_verification(bot, bot_id: str, chat_id):
+    """Switch a group to the verifying phase and reopen chat. Used by /verify and the auto-verify timer."""
+    chat_id = int(chat_id)
+    set_verification_phase(bot_id, chat_id)
+    scheduler.cancel("auto_verify", bot_id, normalize_gid(chat_id))
+    permissions = ChatPermissions(
+        can_send_messages=True,
+        can_send_media_messages=True,
+        can_send_other_messages=True,
+        can_add_web_page_previews=True
+    )
+    bot.set_chat_permissions(chat_id, permissions)
+    msg_text = ddb.get_bot_verification_text(bot_id) or "✅ Ad tracking has started! I will track 'ad', 'all done', 'all dn', 'done' messages."
+    msg = bot.send_message(chat_id, msg_text)
+    track_message(chat_id, msg.message_id, bot_id=bot_id)
 
-    if gid not in group_messages:
-        return None, "no_group"
 
-    for msg in group_messages[gid]:
-        if msg["user_id"] == user_id:
-            found_any = True
-            if not msg["check"]:
-                msg["check"] = True
-                x_usernames.add(msg["x_username"])
+# ---------------- Phase timers ----------------
+# collecting --(close offset)--> closed --(verify offset)--> verifying
+# Offsets are seconds, 0 = manual only. A bot can override the defaults with
+# {"phase_timers": {"close": ..., "verify": ...}} on its bots document.
 
-    _set(bot_id, "group_messages", group_messages)
 
+def get_phase_offsets(bot_id: str) -> dict:
+    offsets = {"close": settings.AUTO_CLOSE_AFTER, "verify": settings.AUTO_VERIFY_AFTER}
+    try:
+        bot_doc = ddb.get_bot_by_id(bot_id) or {}
+        for phase, seconds in (bot_doc.get("phase_timers") or {}).items():
+            if phase in offsets:
+                offsets[phase] = int(seconds)
+    except Exception as e:
+        print(f"[group_session] phase_timers lookup error: {e}")
+    return offsets
+
+
+def schedule_session_phases(bot_id: str, group_id):
+    """Arm the auto-close timer for a freshly started session."""
+    close_after = get_phase_offsets(bot_id)["close"]
+    if close_after:
+        scheduler.schedule("auto_close", bot_id, normalize_gid(group_id), close_after)
+
+
+@scheduler.register("auto_close")
+def _auto_close(bot, bot_id: str, gid: str):
+    # an admin may have closed, reopened or ended the session meanwhile
+    if get_group_phase(bot_id, gid) == "collecting":
+        close_group(bot, bot_id, gid)
+
+
+@scheduler.register("auto_verify")
+def _auto_verify(bot, bot_id: str, gid: str):
+    if get_group_phase(bot_id, gid) == "closed":
+        start_verification(bot, bot_id, gid)
+
+
+
+def mark_user_verified(bot_id: str, group_id, user_id):
+    gid = normalize_gid(group_id)
+    found = {}
+
+    def mutate(data):
+        group_messages = data["group_messages"]
+        found.update(group=gid in group_messages, any=False, x_usernames=set())
+        for msg in group_messages.get(gid, []):
+            if msg["user_id"] == user_id:
+                found["any"] = True
+                if not msg["check"]:
+                    msg["check"] = True
+                    found["x_usernames"].add(msg["x_username"])
+        # only write when something changed
+        return {"verified": 1, "unverified": -1} if found["x_usernames"] else None
+
+    update_session(bot_id, gid, ("group_messages",), mutate)
+    x_usernames = found["x_usernames"]
+    found_any = found["any"]
+
+    if not found["group"]:
+        return None, "no_group"
     if not found_any:
         return None, None
     elif not x_usernames:
@@ -425,107 +883,246 @@ def get_users_with_multiple_links(bot_id: str, group_id):
     return result
 
 
-def get_formatted_user_link_list(bot_id: str, group_id):
+def iter_user_link_lines(bot_id: str, group_id):
+    """Yield one formatted /list line per user who submitted a link."""
     from collections import defaultdict
-    gid = normalize_gid(group_id)
-    group_messages = _get(bot_id, "group_messages", {})
-
     grouped = defaultdict(
         lambda: {"x_username": None, "first_name": None, "links": []})
-    for msg in group_messages.get(gid, []):
+    for msg in get_group_messages(bot_id, group_id):
         uid = msg["user_id"]
         grouped[uid]["x_username"] = msg["x_username"]
         grouped[uid]["first_name"] = msg.get("first_name", "User")
         grouped[uid]["links"].append(msg["link"])
 
-    if not grouped:
-        return None, 0
-
-    result = []
     for i, (uid, data) in enumerate(grouped.items(), start=1):
         name = f'<a href="tg://user?id={uid}">{data["first_name"]}</a>'
         x_username = data["x_username"]
-        block = f"{i}. {name} ✦ (𝕏 ID <a href=\"https://x.com/{x_username}\">{x_username}</a>)"
-        result.append(block)
+        yield f"{i}. {name} ✦ (𝕏 ID <a href=\"https://x.com/{x_username}\">{x_username}</a>)"
+
 
+def get_formatted_user_link_list(bot_id: str, group_id):
+    result = list(iter_user_link_lines(bot_id, group_id))
+    if not result:
+        return None, 0
     return "\n".join(result), len(result)
 
 
-def get_unverified_users(bot_id: str, group_id):
-    gid = normalize_gid(group_id)
-    group_messages = _get(bot_id, "group_messages", {})
-    seen = set()
-    unverified_users = []
+def _format_unverified(msg):
+    user_id = msg["user_id"]
+    if msg.get("username"):
+        tg = f'@{msg["username"]}'
+    else:
+        tg = f'<a href="tg://user?id={user_id}">{msg.get("first_name", "User")}</a>'
+    return f'{msg["number"]}. 🆇 ɪᴅ {msg["x_username"]}| ᴛɢ {tg}'
 
-    phase = get_group_phase(bot_id, gid)
-    if phase != "verifying":
-        return 'notVerifyingphase'
 
-    for msg in group_messages.get(gid, []):
+def iter_unverified_lines(bot_id: str, group_id):
+    """Yield one formatted /unsafe line per user who has not sent 'ad' yet."""
+    seen = set()
+    for msg in get_group_messages(bot_id, group_id):
         user_id = msg["user_id"]
-        number = msg["number"]
         if not msg["check"] and user_id not in seen:
             seen.add(user_id)
-            unverified_users.append(
-                f'{number}. 🆇 ɪᴅ {msg["x_username"]}| ᴛɢ '
-                f'{ f'@{msg["username"]}' if msg.get("username") else f"<a href=\"tg://user?id={user_id}\">{msg.get("first_name", "User")}</a>" }'
-            )
+            yield _format_unverified(msg)
+
 
-    return unverified_users
+def get_unverified_users(bot_id: str, group_id):
+    phase = get_group_phase(bot_id, group_id)
+    if phase != "verifying":
+        return 'notVerifyingphase'
+
+    return list(iter_unverified_lines(bot_id, group_id))
 
-def notify_unverified_users(bot, bot_id: str, group_id: int, msg_id: int = None):
+
+def iter_sr_lines(bot_id: str, group_id):
+    """Yield one mention per user asked for a screen recording."""
+    sr_users = get_sr_users(bot_id, group_id)
+    seen_users = set()
+    for entry in get_group_messages(bot_id, group_id):
+        if entry["user_id"] in sr_users and entry["user_id"] not in seen_users:
+            username = entry.get("username")
+            if username:
+                yield f"@{username}"
+            else:
+                uid = entry["user_id"]
+                num = entry["number"]
+                first_name = entry.get("first_name", "User")
+                yield f"{num}. <a href=\"tg://user?id={uid}\">{first_name}</a>\n"
+            seen_users.add(entry["user_id"])
+
+    if not seen_users:
+        for uid in sr_users:
+            yield f"User ID: <code>{uid}</code>"
+
+
+# ---------------- Paginated lists ----------------
+
+LIST_KINDS = ("list", "unsafe", "sr")
+
+SR_LIST_HEADER = (
+    " ⚠️ These users need to recheck and send a screen recording video"
+    "in this group with your own X/twitter profile visible in it must ❗️\n\n"
+    "If you guys ignore sending SR, you will be marked as a"
+    "scammer and muted strictly from the group. 🚫🚫\n\n"
+)
+
+
+def _render_list_pages(bot_id: str, gid: str, kind: str):
+    if kind == "list":
+        count = get_all_links_count(bot_id, gid)
+        header = f"<b>🚨 USERS LIST 🚨: {count}</b>\n\n"
+        return paginate(iter_user_link_lines(bot_id, gid), header)
+    if kind == "unsafe":
+        if get_group_phase(bot_id, gid) != "verifying":
+            return []
+        header = "<b>⚠️ These users did not send 'ad' or 'all done':</b>\n\n"
+        lines = (f"• {line}" for line in iter_unverified_lines(bot_id, gid))
+        return paginate(lines, header)
+    if kind == "sr":
+        return paginate(iter_sr_lines(bot_id, gid), SR_LIST_HEADER)
+    raise ValueError(f"unknown list kind: {kind}")
+
+
+def get_list_pages(bot_id: str, group_id, kind: str):
     """
-    Sends personal DM to unverified users with a 'Verify Now' button linking back to the group.
-    Handles Telegram rate limits.
+    Rendered HTML pages for /list, /unsafe or /srlist ("list", "unsafe", "sr").
+    Pages are cached per session version, so repeated calls and page flips
+    only re-render after the group's data changed. Empty list = nothing to show.
     """
+    _flush_batch()
     gid = normalize_gid(group_id)
-    unverified = get_unverified_users_full(bot_id, gid)
-
-    if unverified == "notVerifyingphase":
-        return "notVerifyingphase"
-    if not unverified:
-        return "allSafe"
+    version = get_session_version(bot_id, gid)
+    return get_cached_pages(
+        bot_id, gid, kind, version,
+        lambda: _render_list_pages(bot_id, gid, kind)
+    )
 
+def _verify_keyboard(gid: str, msg_id: int = None):
     # Inline button back to group
     group_link = f"https://t.me/c/{gid[4:]}/{msg_id}"
     keyboard = types.InlineKeyboardMarkup()
-    verify_button = types.InlineKeyboardButton("✅ Verify Now", url=group_link)
-    keyboard.add(verify_button)
+    keyboard.add(types.InlineKeyboardButton("✅ Verify Now", url=group_link))
+    return keyboard
 
-    for msg in unverified:
-        user_id = msg["user_id"]
+
+def queue_unverified_notifications(bot_id: str, group_id, msg_id: int = None):
+    """
+    Queue the 'Verify Now' DM fan-out as a background job. Deduped per
+    session version, so repeating /unsafe without changes never DMs twice.
+    """
+    gid = normalize_gid(group_id)
+    version = get_session_version(bot_id, gid)
+    return jobs.submit(
+        "notify_unverified", bot_id, gid, {"msg_id": msg_id},
+        dedupe_key=f"notify_unverified:{bot_id}:{gid}:{version}",
+        dedupe_ttl=settings.SESSION_IDLE_TTL,
+    )
+
+
+@jobs.register("notify_unverified")
+def notify_unverified_users(bot, ctx):
+    """
+    Sends personal DM to unverified users with a 'Verify Now' button linking back to the group.
+    Handles Telegram rate limits. Runs as a job: the user list is snapshotted
+    once, and a resumed job continues after the last user it reached.
+    """
+    gid = normalize_gid(ctx.chat_id)
+    if "users" not in ctx.state:
+        unverified = get_unverified_users_full(ctx.bot_id, gid)
+        users = [] if unverified == "notVerifyingphase" else [u["user_id"] for u in unverified]
+        ctx.save_state(users=users)
+
+    keyboard = _verify_keyboard(gid, ctx.payload.get("msg_id"))
+    warning_text = (
+        "⚠️ You have not completed the verification in the group.\n\n"
+        "Please return to the group and send 'ad' or 'all done' to finish verification."
+    )
+
+    for user_id in ctx.iterate(ctx.state["users"]):
         try:
-            warning_text = (
-                "⚠️ You have not completed the verification in the group.\n\n"
-                "Please return to the group and send 'ad' or 'all done' to finish verification."
-            )
             bot.send_message(user_id, warning_text, reply_markup=keyboard)
-            time.sleep(1)  # ⏳ safe delay to avoid flood (1s per user)
+            ctx.sleep(1)  # ⏳ safe delay to avoid flood (1s per user)
         except ApiTelegramException as e:
-            if "Too Many Requests" in str(e):
-                # Extract retry time if provided
-                retry_after = getattr(e.result_json, "parameters", {}).get("retry_after", 5)
-                print(f"⏳ Flood wait triggered, sleeping for {retry_after} seconds")
-                time.sleep(retry_after)
-                # retry once
-                try:
-                    bot.send_message(user_id, warning_text, reply_markup=keyboard)
-                except Exception:
-                    pass
-            else:
-                # user hasn’t started bot / blocked it
+            # waits up to TG_MAX_RETRY_WAIT already happened in bot_api; a job
+            # can afford the longer ones
+            retry_after = bot_api.retry_after(e)
+            if retry_after is None:
+                continue  # user hasn’t started bot / blocked it
+            print(f"⏳ Flood wait triggered, sleeping for {retry_after} seconds")
+            ctx.sleep(retry_after)  # renews the lease: longer waits than JOB_LEASE are common
+            # retry once
+            try:
+                bot.send_message(user_id, warning_text, reply_markup=keyboard)
+            except Exception:
                 pass
+        except jobs.JobInterrupted:
+            raise
         except Exception:
             # other unexpected errors
             pass
 
-    return "done"
-
 def get_all_links_count(bot_id: str, group_id):
+    return get_session_stats(bot_id, group_id)["submitted"]
+
+
+# ---------------- Progress status ----------------
+# Redis key pattern: session_status_msg:{bot_id}:{group_id} -> pinned message id
+
+PROGRESS_REFRESH_INTERVAL = 15  # seconds between edits of the pinned status
+
+
+def _status_msg_key(bot_id: str, gid: str):
+    return f"session_status_msg:{bot_id}:{gid}"
+
+
+def format_session_progress(stats: dict) -> str:
+    submitted = stats["submitted"]
+    verified = stats["verified"]
+    bar_length = 10
+    filled = int(bar_length * verified / submitted) if submitted else 0
+    percent = int(verified * 100 / submitted) if submitted else 0
+    bar = "█" * filled + "░" * (bar_length - filled)
+    return (
+        "📊 <b>Session Progress</b>\n\n"
+        f"👥 Submitted: {submitted}\n"
+        f"✅ Verified: {verified}\n"
+        f"⚠️ Unverified: {stats['unverified']}\n"
+        f"🎥 SR pending: {stats['sr_pending']}\n\n"
+        f"Progress: {percent}% [{bar}]"
+    )
+
+
+def send_progress_status(bot, bot_id: str, group_id):
+    """Post (and pin) a live status message that later submissions keep updated."""
     gid = normalize_gid(group_id)
-    group_messages = _get(bot_id, "group_messages", {})
-    unique_users = set(msg["user_id"] for msg in group_messages.get(gid, []))
-    return len(unique_users)
+    text = format_session_progress(get_session_stats(bot_id, gid))
+    msg = bot.send_message(group_id, text, parse_mode="HTML")
+    track_message(group_id, msg.message_id, bot_id=bot_id)
+    r.set(_status_msg_key(bot_id, gid), msg.message_id)
+    try:
+        bot.pin_chat_message(group_id, msg.message_id, disable_notification=True)
+    except Exception:
+        pass
+    return msg
+
+
+def refresh_progress_status(bot, bot_id: str, group_id):
+    """
+    Edit the pinned status message, at most once per PROGRESS_REFRESH_INTERVAL
+    per group (shared across workers). Reads only the counters.
+    """
+    gid = normalize_gid(group_id)
+    msg_id = r.get(_status_msg_key(bot_id, gid))
+    if not msg_id:
+        return
+    if not r.set(f"session_status_lock:{bot_id}:{gid}", 1, nx=True, ex=PROGRESS_REFRESH_INTERVAL):
+        return
+    try:
+        text = format_session_progress(get_session_stats(bot_id, gid))
+        bot.edit_message_text(text, group_id, int(msg_id), parse_mode="HTML")
+    except ApiTelegramException as e:
+        if "message is not modified" not in str(e):
+            r.delete(_status_msg_key(bot_id, gid))
 
 
 def get_unverified_users_full(bot_id: str, group_id):
@@ -549,6 +1146,45 @@ def get_unverified_users_full(bot_id: str, group_id):
             })
     return users
 
+def _format_mute_duration(total_seconds: int) -> str:
+    # Convert duration to a readable format (e.g., "48 hours" or "3 days")
+    hours = total_seconds // 3600
+    days = hours // 24
+    if days >= 1:
+        return f"{days} day{'s' if days > 1 else ''}"
+    return f"{hours} hour{'s' if hours != 1 else ''}"
+
+
+def queue_mute_unverified(bot_id: str, group_id, duration: timedelta):
+    """Queue the bulk mute of unverified users; None if one is already running."""
+    gid = normalize_gid(group_id)
+    return jobs.submit(
+        "mute_unverified", bot_id, gid,
+        {"seconds": int(duration.total_seconds())},
+        dedupe_key=f"mute_unverified:{bot_id}:{gid}",
+    )
+
+
+@jobs.register("mute_unverified")
+def mute_unverified_users(bot, ctx):
+    gid = normalize_gid(ctx.chat_id)
+    if "users" not in ctx.state:
+        unverified = get_unverified_users_full(ctx.bot_id, gid)
+        users = [] if unverified == "notVerifyingphase" else [u["user_id"] for u in unverified]
+        ctx.save_state(users=users, muted=0)
+
+    seconds = ctx.payload["seconds"]
+    muted_count = ctx.state["muted"]
+    for uid in ctx.iterate(ctx.state["users"]):
+        if mute_user(bot, ctx.chat_id, uid, timedelta(seconds=seconds)):
+            muted_count += 1
+            ctx.save_state(muted=muted_count)
+
+    msg_text = (f"✅ Muted {muted_count} unsafe user{'s' if muted_count != 1 else ''} "
+                f"for {_format_mute_duration(seconds)}.")
+    msg = bot.send_message(ctx.chat_id, msg_text)
+    track_message(ctx.chat_id, msg.message_id, bot_id=ctx.bot_id)
+
 # ---------------- Admin Handlers ----------------
 
 
@@ -558,7 +1194,7 @@ def handle_add_to_ad_command(bot, bot_id: str, message):
 
         if not is_user_admin(bot, chat_id, message.from_user.id):
             msg = bot.reply_to(message, "❌ Only admins can use this command.")
-            track_message(chat_id, msg.message_id, bot_id=bot_id)
+            schedule_delete(chat_id, msg.message_id, bot_id, "admin_only")
             return
 
         reply_to_message = message.reply_to_message
@@ -571,20 +1207,31 @@ def handle_add_to_ad_command(bot, bot_id: str, message):
         user_id = reply_to_message.from_user.id
         display_name = f'<a href="tg://user?id={user_id}">{reply_to_message.from_user.first_name}</a>'
 
-        group_messages = _get(bot_id, "group_messages", {})
-        for entry in group_messages.get(chat_id, []):
-            if entry["user_id"] == user_id:
-                entry["check"] = True
-        _set(bot_id, "group_messages", group_messages)
+        # mark verified and drop any pending SR request in one transaction
+        def mutate(data):
+            newly_verified = False
+            for entry in data["group_messages"].get(chat_id, []):
+                if entry["user_id"] == user_id:
+                    newly_verified = newly_verified or not entry["check"]
+                    entry["check"] = True
+            sr_users = data["sr_requested_users"].get(chat_id, [])
+            sr_removed = user_id in sr_users
+            if sr_removed:
+                sr_users.remove(user_id)
+            if not newly_verified and not sr_removed:
+                return None
+            return {
+                "verified": int(newly_verified),
+                "unverified": -int(newly_verified),
+                "sr_pending": -int(sr_removed),
+            }
+
+        update_session(bot_id, chat_id, ("group_messages", "sr_requested_users"), mutate)
 
         msg = bot.reply_to(
             message, f"{display_name} has been marked as AD.", parse_mode="HTML")
         track_message(chat_id, msg.message_id, bot_id=bot_id)
 
-        users = get_sr_users(bot_id, chat_id)
-        if user_id in users:
-            remove_sr_request(bot_id, chat_id, user_id)
-
     except Exception as e:
         notify_dev(bot, e, "handle_add_to_ad_command", message)
 
@@ -596,7 +1243,7 @@ def handle_link_command(bot, bot_id: str, message: Message):
 
         if not is_user_admin(bot, chat_id, from_id):
             msg = bot.reply_to(message, "❌ Only admins can use this command.")
-            track_message(chat_id, msg.message_id, bot_id=bot_id)
+            schedule_delete(chat_id, msg.message_id, bot_id, "admin_only")
             return False
 
         if not message.reply_to_message:
@@ -636,7 +1283,7 @@ def handle_sr_command(bot, bot_id: str, message: Message):
 
         if not is_user_admin(bot, chat_id, message.from_user.id):
             msg = bot.reply_to(message, "❌ Only admins can use this command.")
-            track_message(chat_id, msg.message_id, bot_id=bot_id)
+            schedule_delete(chat_id, msg.message_id, bot_id, "admin_only")
             return
 
         if not message.reply_to_message:
@@ -663,45 +1310,17 @@ def handle_srlist_command(bot, bot_id: str, message: Message):
 
         if not is_user_admin(bot, chat_id, message.from_user.id):
             msg = bot.reply_to(message, "❌ Only admins can use this command.")
-            track_message(chat_id, msg.message_id, bot_id=bot_id)
+            schedule_delete(chat_id, msg.message_id, bot_id, "admin_only")
             return
 
-        sr_users = get_sr_users(bot_id, chat_id)
-        if not sr_users:
+        pages = get_list_pages(bot_id, chat_id, "sr")
+        if not pages:
             msg = bot.reply_to(
                 message, "✅ No users asked for screen recording.")
             track_message(chat_id, msg.message_id, bot_id=bot_id)
             return
 
-        mentions = []
-        seen_users = set()
-        for entry in get_group_messages(bot_id, chat_id):
-            if entry["user_id"] in sr_users and entry["user_id"] not in seen_users:
-                username = entry.get("username")
-                if username:
-                    mentions.append(f"@{username}")
-                else:
-                    uid = entry["user_id"]
-                    num = entry["number"]
-                    first_name = entry.get("first_name", "User")
-                    mentions.append(
-                        f"{num}. <a href=\"tg://user?id={uid}\">{first_name}</a>\n")
-                seen_users.add(entry["user_id"])
-
-        if not mentions:
-            mentions = [f"User ID: <code>{uid}</code>" for uid in sr_users]
-
-        message_text = (
-            " ⚠️ These users need to recheck and send a screen recording video"
-            "in this group with your own X/twitter profile visible in it must ❗️\n\n"
-            "If you guys ignore sending SR, you will be marked as a"
-            "scammer and muted strictly from the group. 🚫🚫\n\n"
-        )
-        message_text += "\n".join(mentions)
-
-        msg = bot.send_message(chat_id, message_text,
-                               parse_mode="HTML", disable_web_page_preview=True)
-        track_message(chat_id, msg.message_id, bot_id=bot_id)
+        send_page(bot, bot_id, chat_id, "sr", pages)
 
     except Exception as e:
         notify_dev(bot, e, "handle_srlist_command", message)
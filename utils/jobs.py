@@ -0,0 +1,370 @@
+# utils/jobs.py
+import atexit
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from redis.exceptions import WatchError
+from config import settings
+from utils.redis_client import lazy_redis
+from utils.metrics import JOBS
+
+# Long-running bulk work (DM fan-out, bulk mute, bulk delete) runs here
+# instead of in ad-hoc threads, so it survives worker restarts.
+#
+# Redis key pattern:
+#   job:{job_id}       hash: kind, bot_id, chat_id, payload, state, cursor, status, attempts, owner
+#   jobs:queue         list of job ids waiting for a worker
+#   jobs:claimed:{worker}  list: the job a worker thread popped (BLMOVE) and
+#                      has not taken the lease for yet
+#   jobs:running       zset job_id -> lease expiry (unix ts)
+#   jobkey:{dedupe}    SET NX marker, a second submit with the same key is dropped
+#
+# A job is never only in a worker's memory: BLMOVE moves it from the queue to
+# the worker's claim list, and one MULTI takes it off that list, records the
+# lease and the run's owner token. Claims still there on the next recovery
+# pass (the worker died in between) go back on the queue.
+#
+# Every write of a run (cursor, state, lease, finish) checks its owner token
+# under WATCH; once an expired lease re-queued the job, the old run stops at
+# its next checkpoint (LeaseLost) without writing, so a slow worker and the
+# one that resumed the job never both go on.
+#
+# A job's cursor is saved *before* each item is processed, so a job resumed
+# after a crash skips the item that was in flight (at-most-once per item):
+# a user missing one DM is better than getting two.
+
+QUEUE_KEY = "jobs:queue"
+RUNNING_KEY = "jobs:running"
+CLAIMED_PREFIX = "jobs:claimed:"
+JOB_TTL = 2 * 86400  # finished job records are kept this long for inspection
+
+_r = lazy_redis()
+
+_handlers = {}
+_stopping = threading.Event()
+_pool = None  # (pid, [threads])
+_pool_lock = threading.Lock()
+_seen_claims = set()  # (claim list, job id) found by the last recovery pass
+
+
+class JobInterrupted(Exception):
+    """Raised inside a job when the worker is draining; the job is re-queued."""
+
+
+class LeaseLost(JobInterrupted):
+    """Raised inside a job whose lease expired and was re-queued; this run writes nothing more."""
+
+
+def _job_key(job_id: str):
+    return f"job:{job_id}"
+
+
+def _claimed_key(worker: str):
+    return f"{CLAIMED_PREFIX}{worker}"
+
+
+def _owned_write(job_id: str, owner: str, write) -> bool:
+    """write(pipe) in one MULTI if the run `owner` still holds the job; False otherwise."""
+    key = _job_key(job_id)
+    with _r.pipeline() as pipe:
+        try:
+            pipe.watch(key)
+            if pipe.hget(key, "owner") != owner:
+                pipe.unwatch()
+                return False
+            pipe.multi()
+            write(pipe)
+            pipe.execute()
+            return True
+        except WatchError:
+            return False  # only recovery writes a running job's hash from outside
+
+
+def register(kind: str):
+    """Decorator: register `fn(bot, ctx)` as the handler for jobs of `kind`."""
+    def wrap(fn):
+        _handlers[kind] = fn
+        return fn
+    return wrap
+
+
+# ---------------- Submitting ----------------
+def submit(kind: str, bot_id: str, chat_id, payload: dict = None,
+           dedupe_key: str = None, dedupe_ttl: int = None):
+    """
+    Persist a job and queue it. Returns the job id, or None when a job with the
+    same dedupe_key was already submitted. With dedupe_ttl the key outlives the
+    job (e.g. "never DM the same session twice"); without it the key is
+    released when the job finishes, so it only blocks concurrent duplicates.
+    """
+    job_id = uuid.uuid4().hex
+    if dedupe_key:
+        ttl = dedupe_ttl or JOB_TTL
+        if not _r.set(f"jobkey:{dedupe_key}", job_id, nx=True, ex=ttl):
+            return None
+
+    job = {
+        "kind": kind,
+        "bot_id": str(bot_id),
+        "chat_id": str(chat_id),
+        "payload": json.dumps(payload or {}),
+        "state": "{}",
+        "cursor": 0,
+        "status": "queued",
+        "attempts": 0,
+        "created_at": int(time.time()),
+        "dedupe_key": dedupe_key or "",
+        "release_dedupe": 0 if dedupe_ttl else 1,
+    }
+    pipe = _r.pipeline(transaction=False)
+    pipe.hset(_job_key(job_id), mapping=job)
+    pipe.expire(_job_key(job_id), JOB_TTL)
+    pipe.lpush(QUEUE_KEY, job_id)
+    pipe.execute()
+    JOBS.inc(kind, "queued")
+    return job_id
+
+
+def get_job(job_id: str) -> dict:
+    return _r.hgetall(_job_key(job_id))
+
+
+# ---------------- Job context ----------------
+class JobContext:
+    """What a handler sees: its payload, a scratch state dict and a cursor."""
+
+    def __init__(self, job_id: str, data: dict):
+        self.job_id = job_id
+        self.owner = data["owner"]
+        self.kind = data["kind"]
+        self.bot_id = data["bot_id"]
+        self.chat_id = int(data["chat_id"])
+        self.payload = json.loads(data.get("payload") or "{}")
+        self.state = json.loads(data.get("state") or "{}")
+        self.cursor = int(data.get("cursor") or 0)
+
+    def save_state(self, **values):
+        """Persist handler scratch values (snapshots, progress message ids)."""
+        self.state.update(values)
+        state = json.dumps(self.state)
+        if not _owned_write(self.job_id, self.owner,
+                            lambda pipe: pipe.hset(_job_key(self.job_id), "state", state)):
+            raise LeaseLost()
+
+    def heartbeat(self):
+        """Save the cursor and extend the lease; JobInterrupted when draining, LeaseLost when re-queued."""
+        if _stopping.is_set():
+            raise JobInterrupted()
+
+        def write(pipe):
+            pipe.hset(_job_key(self.job_id), "cursor", self.cursor)
+            pipe.zadd(RUNNING_KEY, {self.job_id: time.time() + settings.JOB_LEASE})
+
+        if not _owned_write(self.job_id, self.owner, write):
+            raise LeaseLost()
+
+    def sleep(self, seconds: float):
+        """Wait inside a job (flood waits) without losing the lease; JobInterrupted when draining."""
+        deadline = time.time() + seconds
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return
+            _stopping.wait(min(remaining, settings.JOB_LEASE / 4))
+            self.heartbeat()
+
+    def iterate(self, items):
+        """Yield items[cursor:], checkpointing before each one."""
+        while self.cursor < len(items):
+            if _stopping.is_set():
+                raise JobInterrupted()
+            item = items[self.cursor]
+            self.cursor += 1
+            self.heartbeat()
+            yield item
+
+
+# ---------------- Running ----------------
+def _finish(job_id: str, data: dict, status: str, error: str = ""):
+    def write(pipe):
+        pipe.hset(_job_key(job_id), mapping={
+            "status": status, "finished_at": int(time.time()), "error": error[:300], "owner": ""})
+        pipe.zrem(RUNNING_KEY, job_id)
+        if data.get("dedupe_key") and data.get("release_dedupe") == "1":
+            pipe.delete(f"jobkey:{data['dedupe_key']}")
+
+    if _owned_write(job_id, data["owner"], write):
+        JOBS.inc(data["kind"], status)
+
+
+def _requeue_writes(pipe, job_id: str):
+    pipe.hset(_job_key(job_id), mapping={"status": "queued", "owner": ""})
+    pipe.zrem(RUNNING_KEY, job_id)
+    pipe.rpush(QUEUE_KEY, job_id)  # picked next (workers pop from the right)
+
+
+def _requeue(job_id: str, data: dict):
+    if _owned_write(job_id, data["owner"], lambda pipe: _requeue_writes(pipe, job_id)):
+        JOBS.inc(data["kind"], "requeued")
+
+
+def _take_lease(job_id: str, worker: str, owner: str) -> bool:
+    """Move the job from the worker's claim list to jobs:running in one MULTI; False if recovery took it back."""
+    claimed, key = _claimed_key(worker), _job_key(job_id)
+    with _r.pipeline() as pipe:
+        try:
+            pipe.watch(claimed)
+            if job_id not in pipe.lrange(claimed, 0, -1):
+                pipe.unwatch()
+                return False
+            pipe.multi()
+            pipe.lrem(claimed, 1, job_id)
+            pipe.hset(key, mapping={"status": "running", "owner": owner})
+            pipe.hincrby(key, "attempts", 1)
+            pipe.zadd(RUNNING_KEY, {job_id: time.time() + settings.JOB_LEASE})
+            pipe.execute()
+            return True
+        except WatchError:
+            return False
+
+
+def run_job(job_id: str, worker: str):
+    """Run a job `worker` moved to its claim list (see _worker_loop)."""
+    data = _r.hgetall(_job_key(job_id))
+    if not data or data.get("status") in ("done", "failed"):
+        _r.lrem(_claimed_key(worker), 1, job_id)
+        return
+
+    data["owner"] = uuid.uuid4().hex
+    if not _take_lease(job_id, worker, data["owner"]):
+        return
+
+    handler = _handlers.get(data["kind"])
+    if handler is None:
+        _finish(job_id, data, "failed", f"no handler for {data['kind']}")
+        return
+
+    from utils.telegram import manager
+    bot = manager.create_or_get_child(data["bot_id"])
+    if bot is None:
+        _finish(job_id, data, "failed", "bot not found")
+        return
+
+    ctx = JobContext(job_id, data)
+    try:
+        handler(bot, ctx)
+    except LeaseLost:
+        print(f"[jobs] {data['kind']} {job_id} lease lost at {ctx.cursor}, another worker has it")
+        return
+    except JobInterrupted:
+        _requeue(job_id, data)
+        print(f"[jobs] {data['kind']} {job_id} interrupted at {ctx.cursor}, re-queued")
+        return
+    except Exception as e:
+        _finish(job_id, data, "failed", str(e))
+        print(f"[jobs] {data['kind']} {job_id} failed: {e}")
+        return
+    _finish(job_id, data, "done")
+
+
+def _requeue_claims() -> int:
+    """Re-queue claims found on the previous pass too: their worker died before taking the lease."""
+    global _seen_claims
+    seen, count = set(), 0
+    for claimed in _r.scan_iter(match=CLAIMED_PREFIX + "*", count=100):
+        for job_id in _r.lrange(claimed, 0, -1):
+            if (claimed, job_id) not in _seen_claims:
+                seen.add((claimed, job_id))
+                continue
+            with _r.pipeline() as pipe:
+                try:
+                    pipe.watch(claimed)
+                    if job_id not in pipe.lrange(claimed, 0, -1):
+                        continue  # the worker took the lease after all
+                    pipe.multi()
+                    pipe.lrem(claimed, 1, job_id)
+                    pipe.rpush(QUEUE_KEY, job_id)
+                    pipe.execute()
+                    count += 1
+                except WatchError:
+                    continue
+    _seen_claims = seen
+    return count
+
+
+def requeue_expired() -> int:
+    """Put jobs whose worker died (lease expired, or claimed and never started) back on the queue."""
+    count = _requeue_claims()
+    for job_id in _r.zrangebyscore(RUNNING_KEY, 0, time.time()):
+        # ZREM is the claim: only one worker re-queues a given job
+        if _r.zrem(RUNNING_KEY, job_id):
+            kind = _r.hget(_job_key(job_id), "kind")
+            if kind:
+                pipe = _r.pipeline()
+                _requeue_writes(pipe, job_id)  # clears the owner: the old run stops at its next checkpoint
+                pipe.execute()
+                JOBS.inc(kind, "requeued")
+                count += 1
+    if count:
+        print(f"[jobs] re-queued {count} job(s) with expired leases")
+    return count
+
+
+def _worker_loop(index: int):
+    worker = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    last_recovery = 0
+    while not _stopping.is_set():
+        try:
+            # worker 0 also picks up jobs orphaned by dead workers
+            if index == 0 and time.time() - last_recovery > settings.JOB_LEASE:
+                last_recovery = time.time()
+                requeue_expired()
+
+            # BLMOVE: the job stays in Redis (claim list) until the lease is taken
+            job_id = _r.blmove(QUEUE_KEY, _claimed_key(worker), 1, "RIGHT", "LEFT")
+            if job_id:
+                run_job(job_id, worker)
+        except Exception as e:
+            print(f"[jobs] worker error: {e}")
+            time.sleep(1)
+
+
+def start_workers(count: int = None):
+    """Start the bounded worker pool once per process (also after a fork)."""
+    global _pool
+    pid = os.getpid()
+    if _pool and _pool[0] == pid:
+        return _pool[1]
+    with _pool_lock:
+        if _pool and _pool[0] == pid:
+            return _pool[1]
+        _stopping.clear()
+        threads = []
+        for i in range(count or settings.JOB_WORKERS):
+            thread = threading.Thread(target=_worker_loop, args=(i,), name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            threads.append(thread)
+        _pool = (pid, threads)
+    atexit.register(drain)
+    return threads
+
+
+def drain(timeout: float = None):
+    """
+    Stop taking new jobs and wait for running ones to reach a checkpoint.
+    Interrupted jobs are re-queued with their cursor, another worker resumes them.
+    """
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if not pool or pool[0] != os.getpid():
+        return
+    _stopping.set()
+    deadline = time.time() + (settings.JOB_DRAIN_TIMEOUT if timeout is None else timeout)
+    for thread in pool[1]:
+        thread.join(max(0, deadline - time.time()))
+    alive = sum(t.is_alive() for t in pool[1])
+    print(f"[jobs] drained ({alive} worker(s) still busy)" if alive else "[jobs] drained")
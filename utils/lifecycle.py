@@ -0,0 +1,105 @@
+# utils/lifecycle.py
+import os
+import threading
+import time
+from config import settings
+from utils.redis_client import lazy_redis
+from utils import wizard_state
+from utils.session_store import get_store
+from utils.group_session import (
+    drop_session_if_empty,
+    seed_session_activity,
+    get_idle_groups,
+    archive_group_session,
+)
+
+_r = lazy_redis()
+
+# Only one worker sweeps per interval: lock:sweeper is held for SWEEP_INTERVAL.
+_SWEEP_LOCK = "lock:sweeper"
+LAST_SWEEP_KEY = "lifecycle:last_sweep"  # hash with the last report
+
+_sweeper_thread = None  # (pid, thread)
+_sweeper_lock = threading.Lock()
+
+
+def _memory_usage(key: str) -> int:
+    try:
+        return _r.memory_usage(key) or 0
+    except Exception:
+        return 0  # MEMORY USAGE is not available on every Redis flavour
+
+
+def sweep_once(idle_seconds: int = None) -> dict:
+    """
+    Archive idle sessions to Mongo, evict them from Redis and drop the legacy
+    wizard hashes. Returns a report with what was reclaimed.
+    """
+    if idle_seconds is None:
+        idle_seconds = settings.SESSION_IDLE_TTL
+    report = {"sessions_archived": 0, "submissions_archived": 0,
+              "keys_deleted": 0, "bytes_reclaimed": 0}
+
+    # 1) legacy global wizard hashes (replaced by per-key TTLs)
+    for key in wizard_state.LEGACY_HASHES:
+        usage = _memory_usage(key)
+        if _r.delete(key):
+            report["keys_deleted"] += 1
+            report["bytes_reclaimed"] += usage
+
+    # 2) idle sessions, per bot
+    store = get_store()
+    for bot_id in list(store.bot_ids()):
+        key = f"sessions:{bot_id}"
+        seed_session_activity(bot_id)
+
+        idle = get_idle_groups(bot_id, idle_seconds)
+        if not idle:
+            continue
+
+        before = _memory_usage(key)
+        for gid in idle:
+            try:
+                report["submissions_archived"] += archive_group_session(bot_id, gid)
+                report["sessions_archived"] += 1
+            except Exception as e:
+                print(f"[lifecycle] Failed to archive {bot_id}:{gid}: {e}")
+
+        # nothing left for this bot -> drop the whole hash, unless a /start
+        # landed since (checked in the same transaction as the delete)
+        if drop_session_if_empty(bot_id):
+            report["keys_deleted"] += 1
+        report["bytes_reclaimed"] += max(0, before - _memory_usage(key))
+
+    report["finished_at"] = int(time.time())
+    try:
+        _r.hset(LAST_SWEEP_KEY, mapping=report)
+    except Exception as e:
+        print(f"[lifecycle] Redis error saving report: {e}")
+    print(f"[lifecycle] sweep: {report}")
+    return report
+
+
+def _sweeper_loop():
+    while True:
+        try:
+            if _r.set(_SWEEP_LOCK, 1, nx=True, ex=settings.SWEEP_INTERVAL):
+                sweep_once()
+        except Exception as e:
+            print(f"[lifecycle] sweep error: {e}")
+        time.sleep(settings.SWEEP_INTERVAL)
+
+
+def start_sweeper():
+    """Start the background sweeper once per process (also after a fork)."""
+    global _sweeper_thread
+    pid = os.getpid()
+    if _sweeper_thread and _sweeper_thread[0] == pid:
+        return _sweeper_thread[1]
+    with _sweeper_lock:
+        if _sweeper_thread and _sweeper_thread[0] == pid:
+            return _sweeper_thread[1]
+        thread = threading.Thread(target=_sweeper_loop, name="lifecycle-sweeper", daemon=True)
+        thread.start()
+        _sweeper_thread = (pid, thread)
+    return thread
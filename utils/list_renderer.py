@@ -0,0 +1,110 @@
+# utils/list_renderer.py
+import json
+from telebot.types import InlineKeyboardMarkup, InlineKeyboardButton
+from utils.message_tracker import track_message
+from utils.redis_client import lazy_redis
+
+_r = lazy_redis()
+
+# Redis key pattern: list_pages:{bot_id}:{chat_id}:{kind}
+# Stores {"v": session_version, "pages": [...]} so a page flip never re-renders
+# the whole session, and any submission change (version bump) invalidates it.
+
+PAGE_LIMIT = 4000          # keep under Telegram’s 4096 limit
+PAGE_CACHE_TTL = 6 * 3600  # rendered pages are cheap to rebuild, don't keep them long
+
+
+def paginate(lines, header: str = "", limit: int = PAGE_LIMIT):
+    """
+    Consume an iterable of lines and yield Telegram-sized HTML pages.
+    The header is only put on the first page.
+    """
+    page = header
+    has_lines = False
+    for line in lines:
+        has_lines = True
+        if len(page) + len(line) + 1 > limit and page.strip():
+            yield page
+            page = ""
+        page += line + "\n"
+
+    if has_lines and page.strip():
+        yield page
+
+
+def _cache_key(bot_id: str, chat_id, kind: str):
+    return f"list_pages:{bot_id}:{chat_id}:{kind}"
+
+
+def get_cached_pages(bot_id: str, chat_id, kind: str, version: int, build):
+    """
+    Return the rendered pages for (chat, kind) at the given session version.
+    `build` is called (and its result cached) only on a miss or stale version.
+    """
+    key = _cache_key(bot_id, chat_id, kind)
+    try:
+        raw = _r.get(key)
+        if raw:
+            data = json.loads(raw)
+            if data.get("v") == version:
+                return data["pages"]
+    except Exception as e:
+        print(f"[list_renderer] Redis read error: {e}")
+
+    pages = list(build())
+
+    try:
+        _r.setex(key, PAGE_CACHE_TTL, json.dumps({"v": version, "pages": pages}))
+    except Exception as e:
+        print(f"[list_renderer] Redis write error: {e}")
+    return pages
+
+
+def clear_cached_pages(bot_id: str, chat_id, kinds):
+    try:
+        _r.delete(*[_cache_key(bot_id, chat_id, k) for k in kinds])
+    except Exception as e:
+        print(f"[list_renderer] Redis delete error: {e}")
+
+
+def page_markup(kind: str, page: int, total: int):
+    """Inline Prev/Next buttons; None when everything fits on one page."""
+    if total <= 1:
+        return None
+
+    nav = []
+    if page > 0:
+        nav.append(InlineKeyboardButton(
+            f"⬅️ Prev ({page}/{total})", callback_data=f"lpage:{kind}:{page-1}"))
+    if page < total - 1:
+        nav.append(InlineKeyboardButton(
+            f"➡️ Next ({page+2}/{total})", callback_data=f"lpage:{kind}:{page+1}"))
+
+    kb = InlineKeyboardMarkup()
+    kb.row(*nav)
+    return kb
+
+
+def send_page(bot, bot_id: str, chat_id, kind: str, pages, page: int = 0):
+    """Send one page (the first by default) with navigation buttons."""
+    msg = bot.send_message(
+        chat_id,
+        pages[page],
+        parse_mode="HTML",
+        disable_web_page_preview=True,
+        reply_markup=page_markup(kind, page, len(pages))
+    )
+    track_message(chat_id, msg.message_id, bot_id=bot_id)
+    return msg
+
+
+def edit_page(bot, chat_id, message_id: int, kind: str, pages, page: int):
+    """Swap an already-sent list message to another page in place."""
+    bot.edit_message_text(
+        pages[page],
+        chat_id,
+        message_id,
+        parse_mode="HTML",
+        disable_web_page_preview=True,
+        reply_markup=page_markup(kind, page, len(pages))
+    )
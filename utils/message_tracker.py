@@ -1,8 +1,9 @@
 # utils/message_tracker.py
 import json
-from utils.redis_client import get_redis
+from utils.redis_client import lazy_redis
+from utils import jobs
 
-_r = get_redis()
+_r = lazy_redis()
 
 # Redis key pattern: tracked:{bot_id}:{chat_id}
 # We use a Redis set to avoid duplicates, atomic ops to prevent race conditions
@@ -46,27 +47,39 @@ def delete_tracked_messages(bot, chat_id: int, bot_id: str = None):
     except Exception as e:
         print(f"[delete_tracked_messages] Redis error: {e}")
 
-def delete_tracked_messages_with_progress(bot, chat_id: int, bot_id: str = None):
+def queue_clear_tracked(bot_id: str, chat_id: int):
+    """Queue the bulk delete as a background job; None if one is already running."""
+    if not bot_id:
+        bot_id = "default"
+    return jobs.submit("clear_tracked", bot_id, chat_id, dedupe_key=f"clear_tracked:{bot_id}:{chat_id}")
+
+
+@jobs.register("clear_tracked")
+def delete_tracked_messages_with_progress(bot, ctx):
     """
     Delete tracked messages with a live progress bar.
-    Updates one Telegram message as progress indicator.
+    Updates one Telegram message as progress indicator. SPOP is the job's
+    cursor: a resumed job just keeps popping where the last worker stopped.
     """
-    if not bot_id:
-        bot_id = "default"
-    key = f"tracked:{bot_id}:{chat_id}"
+    chat_id = ctx.chat_id
+    key = f"tracked:{ctx.bot_id}:{chat_id}"
 
     try:
-        total = _r.scard(key)
-        if total == 0:
-            bot.send_message(chat_id, "ℹ️ No tracked messages to delete.")
-            return
+        if "progress_msg" not in ctx.state:
+            total = _r.scard(key)
+            if total == 0:
+                bot.send_message(chat_id, "ℹ️ No tracked messages to delete.")
+                return
 
-        progress_msg = bot.send_message(chat_id, f"🧹 Deleting {total} messages...\nProgress: 0% [░░░░░░░░░░]")
+            progress_msg = bot.send_message(chat_id, f"🧹 Deleting {total} messages...\nProgress: 0% [░░░░░░░░░░]")
+            ctx.save_state(progress_msg=progress_msg.message_id, total=total, deleted=0)
 
-        deleted = 0
+        total = ctx.state["total"]
+        deleted = ctx.state["deleted"]
         bar_length = 10
 
         while True:
+            ctx.heartbeat()
             mid = _r.spop(key)
             if mid is None:
                 break
@@ -78,14 +91,15 @@ def delete_tracked_messages_with_progress(bot, chat_id: int, bot_id: str = None)
 
             # Update progress every ~10% or last
             if deleted == total or deleted % max(1, total // bar_length) == 0:
-                percent = int((deleted / total) * 100)
-                filled = int(bar_length * deleted / total)
+                ctx.save_state(deleted=deleted)
+                percent = min(100, int((deleted / total) * 100))
+                filled = min(bar_length, int(bar_length * deleted / total))
                 bar = "█" * filled + "░" * (bar_length - filled)
                 try:
                     bot.edit_message_text(
                         f"🧹 Deleting {total} messages...\nProgress: {percent}% [{bar}]",
                         chat_id,
-                        progress_msg.message_id
+                        ctx.state["progress_msg"]
                     )
                 except Exception:
                     pass
@@ -93,9 +107,11 @@ def delete_tracked_messages_with_progress(bot, chat_id: int, bot_id: str = None)
         bot.edit_message_text(
             f"✅ Deleted {deleted}/{total} tracked messages.",
             chat_id,
-            progress_msg.message_id
+            ctx.state["progress_msg"]
         )
 
+    except jobs.JobInterrupted:
+        raise
     except Exception as e:
         print(f"[delete_tracked_messages_with_progress] Redis error: {e}")
         bot.send_message(chat_id, "⚠️ Failed to delete tracked messages.")
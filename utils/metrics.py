@@ -0,0 +1,152 @@
+# utils/metrics.py
+import threading
+import time
+from contextlib import contextmanager
+
+# Minimal in-process Prometheus-style metrics, rendered by GET /metrics.
+# Every gunicorn worker keeps its own values; scrape each worker (or sum in
+# Prometheus) rather than expecting one global view.
+
+# seconds; covers a Redis RTT up to a slow Telegram upload
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{n}="{str(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def values(self) -> dict:
+        """Current value per label tuple."""
+        with self._lock:
+            return dict(self._values)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in self._values.items():
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, help_text: str, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def set(self, value: float, *label_values):
+        with self._lock:
+            self._values[label_values] = value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for label_values, value in self._values.items():
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}  # label_values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+                    break
+            entry[-2] += value
+            entry[-1] += 1
+
+    @contextmanager
+    def time(self, *label_values):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def counts(self) -> dict:
+        """Observation count per label tuple."""
+        with self._lock:
+            return {labels: entry[-1] for labels, entry in self._values.items()}
+
+    def sums(self) -> dict:
+        """Sum of observed values per label tuple."""
+        with self._lock:
+            return {labels: entry[-2] for labels, entry in self._values.items()}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, entry in self._values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, entry):
+                    cumulative += count
+                    le = _format_labels(self.labels, label_values, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                le = _format_labels(self.labels, label_values, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{le} {entry[-1]}")
+                labels = _format_labels(self.labels, label_values)
+                lines.append(f"{self.name}_sum{labels} {entry[-2]}")
+                lines.append(f"{self.name}_count{labels} {entry[-1]}")
+        return lines
+
+
+def render_prometheus() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# === Metrics used across the app ===
+UPDATES = Counter("tg_updates_total", "Updates dispatched per bot", ["bot_id"])
+WEBHOOK_LATENCY = Histogram("webhook_latency_seconds", "End-to-end webhook handling time", ["endpoint"])
+HANDLER_LATENCY = Histogram("handler_latency_seconds", "Handler time per command / text handler", ["handler"])
+TG_API_LATENCY = Histogram("telegram_api_latency_seconds", "Bot API call latency per method", ["method"])
+TG_API_ERRORS = Counter("telegram_api_errors_total", "Failed Bot API calls per method", ["method", "code"])
+TG_API_CALLS = Counter("telegram_api_calls_total", "Bot API calls per method and final outcome", ["method", "outcome"])
+TG_API_WAIT = Histogram("telegram_api_wait_seconds", "Time calls waited on retry_after / open breakers", ["method"])
+REDIS_LATENCY = Histogram("redis_op_latency_seconds", "Redis command latency", ["command"])
+MONGO_LATENCY = Histogram("mongo_op_latency_seconds", "MongoDB command latency", ["command"])
+MONGO_ERRORS = Counter("mongo_op_errors_total", "Failed MongoDB commands", ["command"])
+GROUP_PREFILTER = Counter("group_prefilter_total", "Group messages per prefilter exit stage", ["stage"])
+WEBHOOK_PENDING = Gauge("tg_webhook_pending_updates", "pending_update_count at the last webhook reconcile", ["bot_id"])
+AUTO_DELETE = Counter("auto_delete_messages_total", "Bot warnings scheduled / deleted / failed to delete", ["action"])
+AD_DIGEST = Counter("ad_digest_total", "Verification acks buffered / digest messages sent", ["kind"])
+SNAPSHOT_GROUPS = Counter("session_snapshot_groups_total", "Session groups saved/deleted/restored in Mongo", ["action"])
+SNAPSHOT_LATENCY = Histogram("session_snapshot_seconds", "Session snapshot pass / restore time", ["op"])
+POLL_LAG = Gauge("tg_poll_lag_seconds", "Age of the oldest update in the last getUpdates batch", ["bot_id"])
+JOBS = Counter("jobs_total", "Background job transitions per kind", ["kind", "status"])
@@ -0,0 +1,14 @@
+# utils/migrate.py
+# One-off deploy step, run before (re)starting workers:
+#     python -m utils.migrate
+# Workers never create indexes themselves, so a cold start costs no Mongo round trips.
+from utils.db import ensure_indexes
+
+
+def main():
+    ensure_indexes()
+    print("[migrate] indexes ensured")
+
+
+if __name__ == "__main__":
+    main()
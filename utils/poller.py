@@ -0,0 +1,253 @@
+# utils/poller.py
+# Long-polling ingestion, the alternative to webhooks (INGEST_MODE=polling):
+#     python -m utils.poller
+# Run exactly one poller: Telegram rejects concurrent getUpdates per bot.
+import asyncio
+import json
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+from telebot import apihelper, types
+
+from config import settings
+from utils import db
+from utils.bot_client import BotClient
+from utils.telegram import manager, manual_dispatch
+from utils.group_session import batched_writes
+from utils.metrics import POLL_LAG
+from utils.redis_client import lazy_redis
+from utils.update_view import UpdateView
+from utils.webhooks import ALLOWED_UPDATES
+
+# One asyncio loop long-polls getUpdates for every enabled bot (and the admin
+# bot), up to POLL_LIMIT updates per call. Each batch is handed to a thread
+# pool and fed through manual_dispatch inside group_session.batched_writes(),
+# so link submissions in a batch share one Redis write pipeline. A bot waits
+# for its batch before polling again, which keeps its updates in order.
+#
+# Redis key patterns:
+#   poll:offsets  hash bot_id -> next getUpdates offset, committed after the
+#                 batch was dispatched (at-least-once across restarts)
+#   poll:status   hash bot_id -> json (offset, batch size, lag, last error)
+
+OFFSETS_KEY = "poll:offsets"
+STATUS_KEY = "poll:status"
+_LOCK = "lock:poller"
+_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+_r = lazy_redis()
+
+_status = {}  # bot_id -> dict, written to poll:status on every refresh
+
+
+class PollError(Exception):
+    def __init__(self, code: int, description: str, retry_after: int = None):
+        super().__init__(f"{code} {description}")
+        self.code = code
+        self.retry_after = retry_after
+
+
+def _api_url(token: str, api_method: str) -> str:
+    return (apihelper.API_URL or "https://api.telegram.org/bot{0}/{1}").format(token, api_method)
+
+
+async def get_updates(session, token: str, offset: int):
+    data = {
+        "offset": offset,
+        "limit": min(100, settings.POLL_LIMIT),
+        "timeout": settings.POLL_TIMEOUT,
+        "allowed_updates": json.dumps(ALLOWED_UPDATES),
+    }
+    async with session.post(_api_url(token, "getUpdates"), data=data) as resp:
+        body = await resp.json(content_type=None)
+    if not body.get("ok"):
+        params = body.get("parameters") or {}
+        raise PollError(body.get("error_code", resp.status), body.get("description", ""), params.get("retry_after"))
+    return body["result"]
+
+
+# ---------------- Offsets / status ----------------
+def load_offset(bot_id: str) -> int:
+    return int(_r.hget(OFFSETS_KEY, bot_id) or 0)
+
+
+def _update_date(raw: dict):
+    msg = raw.get("message") or (raw.get("callback_query") or {}).get("message") or {}
+    return msg.get("date")
+
+
+def _process_batch(bot_id: str, updates: list):
+    """Dispatch a batch (pool thread), then commit the offset past it."""
+    if bot_id == "admin":
+        from handlers.admin_multi import handle_admin_update
+        for raw in updates:
+            try:
+                handle_admin_update(types.Update.de_json(raw))
+            except Exception:
+                traceback.print_exc()
+    else:
+        bot = manager.create_or_get_child(bot_id)
+        if bot:
+            db_conn = db.init_db()
+            with batched_writes():
+                for raw in updates:
+                    try:
+                        manual_dispatch(bot, bot_id, UpdateView(raw), db_conn)
+                    except Exception:
+                        traceback.print_exc()
+    _r.hset(OFFSETS_KEY, bot_id, updates[-1]["update_id"] + 1)
+
+
+def _hold_lock() -> bool:
+    """Take or refresh lock:poller; False while another poller holds it."""
+    ttl = settings.POLL_REFRESH * 2
+    if _r.set(_LOCK, _OWNER, nx=True, ex=ttl):
+        return True
+    if _r.get(_LOCK) == _OWNER:
+        _r.expire(_LOCK, ttl)
+        return True
+    return False
+
+
+def _targets():
+    """(bot_id, token) for every bot to poll."""
+    targets = {}
+    if settings.ADMIN_BOT_TOKEN:
+        targets["admin"] = settings.ADMIN_BOT_TOKEN
+    for doc in db.list_bots():
+        if doc.get("status") == "enabled":
+            targets[str(doc["_id"])] = doc["token"]
+    return targets
+
+
+def _report():
+    """Publish per-bot lag and status; returns a one-line summary."""
+    if not _status:
+        return "no bots"
+    for bot_id, status in _status.items():
+        POLL_LAG.set(status.get("lag_seconds", 0), bot_id)
+    try:
+        _r.hset(STATUS_KEY, mapping={bot_id: json.dumps(s) for bot_id, s in _status.items()})
+    except Exception as e:
+        print(f"[poller] Redis error saving status: {e}")
+    lagging = max(_status.items(), key=lambda item: item[1].get("lag_seconds", 0))
+    errors = sum(1 for s in _status.values() if s.get("error"))
+    return (f"{len(_status)} bots, max lag {lagging[1].get('lag_seconds', 0)}s ({lagging[0]}), "
+            f"{errors} with errors")
+
+
+# ---------------- Poll loop ----------------
+async def poll_bot(session, pool, bot_id: str, token: str):
+    loop = asyncio.get_running_loop()
+    status = _status.setdefault(bot_id, {})
+    # getUpdates fails with 409 while a webhook is set
+    client = BotClient(token)
+    try:
+        await loop.run_in_executor(pool, client.remove_webhook)
+    except Exception as e:
+        print(f"[poller] deleteWebhook error for {bot_id}: {e}")  # the 409 path retries it
+    offset = await loop.run_in_executor(pool, load_offset, bot_id)
+    backoff = 1
+
+    while True:
+        try:
+            updates = await get_updates(session, token, offset)
+            backoff = 1
+            status.pop("error", None)
+        except PollError as e:
+            status["error"] = str(e)
+            if e.code == 409:  # webhook set again meanwhile
+                try:
+                    await loop.run_in_executor(pool, client.remove_webhook)
+                except Exception as err:
+                    print(f"[poller] deleteWebhook error for {bot_id}: {err}")
+            await asyncio.sleep(e.retry_after or (settings.POLL_REFRESH if e.code in (401, 403, 404) else backoff))
+            backoff = min(backoff * 2, 30)
+            continue
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            status["error"] = f"network: {e!r}"
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+            continue
+
+        now = time.time()
+        status.update(polled_at=int(now), batch=len(updates))
+        if not updates:
+            status.update(offset=offset, lag_seconds=0)
+            continue
+
+        dates = [d for d in map(_update_date, updates) if d]
+        status["lag_seconds"] = round(now - min(dates), 1) if dates else 0
+        # shielded: once handed to the pool the batch finishes and commits, even on shutdown
+        await asyncio.shield(loop.run_in_executor(pool, _process_batch, bot_id, updates))
+        offset = updates[-1]["update_id"] + 1
+        status["offset"] = offset
+
+
+async def run(stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    pool = ThreadPoolExecutor(max_workers=settings.POLL_DISPATCH_THREADS, thread_name_prefix="poll-dispatch")
+    tasks = {}  # bot_id -> (token, task)
+    timeout = aiohttp.ClientTimeout(total=settings.POLL_TIMEOUT + 15)
+    connector = aiohttp.TCPConnector(limit=0)  # one open long-poll per bot
+
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        while not stop.is_set():
+            if not await loop.run_in_executor(pool, _hold_lock):
+                print("[poller] another poller holds the lock, waiting")
+                for bot_id in list(tasks):
+                    tasks.pop(bot_id)[1].cancel()
+                _status.clear()
+            else:
+                targets = await loop.run_in_executor(pool, _targets)
+                for bot_id in list(tasks):
+                    if targets.get(bot_id) != tasks[bot_id][0]:  # removed, disabled or new token
+                        tasks.pop(bot_id)[1].cancel()
+                        _status.pop(bot_id, None)
+                for bot_id, token in targets.items():
+                    if bot_id not in tasks:
+                        tasks[bot_id] = (token, asyncio.create_task(poll_bot(session, pool, bot_id, token)))
+                print(f"[poller] {await loop.run_in_executor(pool, _report)}")
+            try:
+                await asyncio.wait_for(stop.wait(), settings.POLL_REFRESH)
+            except asyncio.TimeoutError:
+                pass
+
+        for _, task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*(task for _, task in tasks.values()), return_exceptions=True)
+
+    pool.shutdown(wait=True)  # in-flight batches finish and commit their offsets
+    print(f"[poller] {_report()}")
+    if _r.get(_LOCK) == _OWNER:
+        _r.delete(_LOCK)
+    print("[poller] stopped")
+
+
+async def _main():
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await run(stop)
+
+
+def main():
+    if settings.INGEST_MODE != "polling":
+        print("[poller] INGEST_MODE is not 'polling': the webhook reconciler would keep re-setting "
+              "webhooks and every getUpdates would fail. Set INGEST_MODE=polling everywhere first.")
+        return 1
+    import main as app  # job workers, scheduler, sweeper, reconciler for this process
+    app.start_background()
+    asyncio.run(_main())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
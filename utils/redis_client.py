@@ -1,8 +1,52 @@
 # utils/redis_client.py
 import os
 import redis
+from redis.client import Pipeline
+from config import settings
+from utils.metrics import REDIS_LATENCY
 
 _redis = None
+_redis_raw = None
+
+
+class _TimedPipeline(Pipeline):
+    def execute(self, raise_on_error=True):
+        with REDIS_LATENCY.time("PIPELINE"):
+            return super().execute(raise_on_error)
+
+
+class _TimedRedis(redis.Redis):
+    """redis.Redis that records per-command latency (see utils/metrics.py)."""
+
+    def execute_command(self, *args, **options):
+        with REDIS_LATENCY.time(str(args[0]).upper()):
+            return super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return _TimedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+def _make_client(decode_responses: bool):
+    host = os.getenv("REDIS_HOST", "localhost")
+    port = int(os.getenv("REDIS_PORT", "6379"))
+    db   = int(os.getenv("REDIS_DB", "0"))
+    # Bounded, blocking pool: threads wait for a free connection instead of
+    # failing with "Too many connections" under a burst.
+    pool = redis.BlockingConnectionPool(
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+        host=host,
+        port=port,
+        db=db,
+        decode_responses=decode_responses,
+        # sensible defaults for network hiccups in VPS/multiprocess setups
+        socket_timeout=3,
+        socket_connect_timeout=3,
+        health_check_interval=30,
+        retry_on_timeout=True,
+    )
+    return _TimedRedis(connection_pool=pool)
+
 
 def get_redis():
     """
@@ -11,18 +55,46 @@ def get_redis():
     """
     global _redis
     if _redis is None:
-        host = os.getenv("REDIS_HOST", "localhost")
-        port = int(os.getenv("REDIS_PORT", "6379"))
-        db   = int(os.getenv("REDIS_DB", "0"))
-        # sensible defaults for network hiccups in VPS/multiprocess setups
-        _redis = redis.Redis(
-            host=host,
-            port=port,
-            db=db,
-            decode_responses=True,
-            socket_timeout=3,
-            socket_connect_timeout=3,
-            health_check_interval=30,
-            retry_on_timeout=True,
-        )
+        _redis = _make_client(decode_responses=True)
     return _redis
+
+
+def get_redis_raw():
+    """
+    Same server as get_redis(), but returns bytes.
+    Used for binary-encoded values (see utils/session_codec.py).
+    """
+    global _redis_raw
+    if _redis_raw is None:
+        _redis_raw = _make_client(decode_responses=False)
+    return _redis_raw
+
+
+def reset_clients():
+    """
+    Forget the clients inherited from the parent process (gunicorn post_fork).
+    The next get_redis() builds fresh pools owned by this worker; the parent's
+    sockets are left alone (redis-py only shuts down sockets it created).
+    """
+    global _redis, _redis_raw
+    _redis = None
+    _redis_raw = None
+
+
+class _LazyClient:
+    """
+    Stand-in for a module-level client: resolves the process-wide client on
+    every attribute access, so importing a module never builds a connection
+    pool and a reset client (tests, after fork) is picked up everywhere.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+
+    def __getattr__(self, name):
+        return getattr(self._factory(), name)
+
+
+def lazy_redis(raw: bool = False):
+    """Module-level handle for get_redis() / get_redis_raw(), resolved on first use."""
+    return _LazyClient(get_redis_raw if raw else get_redis)
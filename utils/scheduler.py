@@ -0,0 +1,124 @@
+# utils/scheduler.py
+import os
+import threading
+import time
+from config import settings
+from utils.redis_client import lazy_redis
+
+# One timer loop per process for every scheduled per-group action.
+#
+# Redis key pattern: schedule:{name} -> zset "{bot_id}|{gid}" -> due unix ts
+# The loop polls each registered zset for due members (ZRANGEBYSCORE with a
+# LIMIT, cheap for any number of groups) and claims each one with ZREM, so
+# with several gunicorn workers every timer fires exactly once.
+# Modules with their own due queue (utils/auto_delete.py) hook in with
+# on_tick(fn): fn(now) runs on every poll, after the timers.
+
+BATCH_SIZE = 100
+
+_r = lazy_redis()
+
+_handlers = {}  # name -> fn(bot, bot_id, gid)
+_session_timers = set()  # names cancel_all drops when a session ends
+_ticks = []     # fn(now)
+_loop = None    # (pid, thread)
+_loop_lock = threading.Lock()
+
+
+def _key(name: str):
+    return f"schedule:{name}"
+
+
+def _member(bot_id: str, gid) -> str:
+    return f"{bot_id}|{gid}"
+
+
+def register(name: str, ends_with_session: bool = True):
+    """
+    Decorator: register `fn(bot, bot_id, gid)` to run when a `name` timer is
+    due. ends_with_session=False keeps the timer when the group's session
+    stops (it flushes something that outlives the session).
+    """
+    def wrap(fn):
+        _handlers[name] = fn
+        if ends_with_session:
+            _session_timers.add(name)
+        return fn
+    return wrap
+
+
+def on_tick(fn):
+    """Run `fn(now)` on every scheduler poll."""
+    _ticks.append(fn)
+    return fn
+
+
+def schedule(name: str, bot_id: str, gid, delay: float):
+    """(Re)arm the `name` timer for a group, `delay` seconds from now."""
+    _r.zadd(_key(name), {_member(bot_id, gid): time.time() + delay})
+
+
+def cancel(name: str, bot_id: str, gid):
+    _r.zrem(_key(name), _member(bot_id, gid))
+
+
+def cancel_all(bot_id: str, gid):
+    """Drop every pending session timer for a group (session ended)."""
+    member = _member(bot_id, gid)
+    pipe = _r.pipeline(transaction=False)
+    for name in _session_timers:
+        pipe.zrem(_key(name), member)
+    pipe.execute()
+
+
+def get_due_time(name: str, bot_id: str, gid):
+    return _r.zscore(_key(name), _member(bot_id, gid))
+
+
+def run_due(now: float = None) -> int:
+    """Fire every timer that is due. Returns how many ran."""
+    now = time.time() if now is None else now
+    fired = 0
+    for name, handler in list(_handlers.items()):
+        for member in _r.zrangebyscore(_key(name), 0, now, start=0, num=BATCH_SIZE):
+            if not _r.zrem(_key(name), member):
+                continue  # another worker claimed it
+            bot_id, gid = member.split("|", 1)
+            try:
+                from utils.telegram import manager
+                bot = manager.create_or_get_child(bot_id)
+                if bot:
+                    handler(bot, bot_id, gid)
+                    fired += 1
+            except Exception as e:
+                print(f"[scheduler] {name} {member} error: {e}")
+    for tick in list(_ticks):
+        try:
+            tick(now)
+        except Exception as e:
+            print(f"[scheduler] {tick.__module__} tick error: {e}")
+    return fired
+
+
+def _scheduler_loop():
+    while True:
+        try:
+            run_due()
+        except Exception as e:
+            print(f"[scheduler] poll error: {e}")
+        time.sleep(settings.SCHEDULER_POLL)
+
+
+def start_scheduler():
+    """Start the timer loop once per process (also after a fork)."""
+    global _loop
+    pid = os.getpid()
+    if _loop and _loop[0] == pid:
+        return _loop[1]
+    with _loop_lock:
+        if _loop and _loop[0] == pid:
+            return _loop[1]
+        thread = threading.Thread(target=_scheduler_loop, name="scheduler", daemon=True)
+        thread.start()
+        _loop = (pid, thread)
+    return thread
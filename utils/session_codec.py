@@ -0,0 +1,59 @@
+# utils/session_codec.py
+import json
+import msgpack
+
+# Stored format of the `group_messages` session field.
+#
+# v1 (legacy): JSON  {gid: [{"number": 1, "user_id": ..., "username": ..., ...}, ...]}
+# v2:          msgpack [2, {gid: [[number, user_id, username, first_name,
+#                                  link, x_username, check], ...]}]
+#
+# v2 drops the repeated key names. Any key an entry has beyond ENTRY_FIELDS
+# is kept in an optional trailing dict, so nothing is lost on round trip.
+# Readers accept both versions; writers always emit CODEC_VERSION.
+
+CODEC_VERSION = 2
+
+ENTRY_FIELDS = ("number", "user_id", "username", "first_name", "link", "x_username", "check")
+_FIELD_SET = frozenset(ENTRY_FIELDS)
+
+
+def _pack_entry(entry: dict) -> list:
+    row = [entry.get(f) for f in ENTRY_FIELDS]
+    extra = {k: v for k, v in entry.items() if k not in _FIELD_SET}
+    if extra:
+        row.append(extra)
+    return row
+
+
+def _unpack_entry(row: list) -> dict:
+    entry = dict(zip(ENTRY_FIELDS, row))
+    if len(row) > len(ENTRY_FIELDS):
+        entry.update(row[len(ENTRY_FIELDS)])
+    return entry
+
+
+def encode_group_messages(group_messages: dict) -> bytes:
+    payload = {
+        gid: [_pack_entry(e) for e in entries]
+        for gid, entries in group_messages.items()
+    }
+    return msgpack.packb([CODEC_VERSION, payload], use_bin_type=True)
+
+
+def decode_group_messages(raw) -> dict:
+    """Decode a stored group_messages value, whichever version wrote it."""
+    if raw is None:
+        return {}
+
+    # v1: plain JSON text (str from a decoding client, bytes from a raw one)
+    if isinstance(raw, str) or raw[:1] == b"{":
+        return json.loads(raw)
+
+    version, payload = msgpack.unpackb(raw, raw=False, strict_map_key=False)
+    if version != CODEC_VERSION:
+        raise ValueError(f"unsupported group_messages codec version: {version}")
+    return {
+        gid: [_unpack_entry(row) for row in rows]
+        for gid, rows in payload.items()
+    }
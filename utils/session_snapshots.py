@@ -0,0 +1,165 @@
+# utils/session_snapshots.py
+import os
+import sys
+import threading
+import time
+from pymongo import DeleteOne, ReplaceOne
+from config import settings
+from utils import db
+from utils import group_session as gs
+from utils.metrics import SNAPSHOT_GROUPS, SNAPSHOT_LATENCY
+from utils.redis_client import lazy_redis
+from utils.session_store import get_store
+
+# Live sessions exist only in the session store (Redis). So that a Redis
+# restart without persistence does not wipe every running session, changed
+# groups are copied to Mongo:
+#   - every write marks its groups dirty (session_store.DIRTY_KEY)
+#   - every MONGO_SNAPSHOT_INTERVAL one worker takes up to
+#     MONGO_SNAPSHOT_BATCH dirty groups and upserts one document per group
+#     (deletes it when the session has ended). Unchanged groups cost nothing.
+#   - at startup (and `python -m utils.session_snapshots restore`) groups that
+#     have a snapshot but no live session are put back. Groups still marked
+#     dirty are skipped: the store has newer state than their snapshot.
+#
+# Mongo collection SessionSnapshots, _id "bot_id:gid":
+#   bot_id, group_id, phase, group_messages, sr_requested_users,
+#   unique_x_usernames, stats, version, saved_at
+# Redis: session_snapshots:last  hash with the last pass report
+
+COLLECTION = "SessionSnapshots"
+LAST_PASS_KEY = "session_snapshots:last"
+_LOCK = "lock:session_snapshots"
+_RESTORE_LOCK = "lock:session_restore"
+
+_r = lazy_redis()
+
+_snapshot_thread = None  # (pid, thread)
+_snapshot_lock = threading.Lock()
+
+
+def snapshot_once(limit: int = None) -> dict:
+    """Save up to `limit` dirty groups to Mongo. Returns a report."""
+    store = get_store()
+    start = time.perf_counter()
+    groups = store.pop_dirty_groups(limit or settings.MONGO_SNAPSHOT_BATCH)
+    report = {"groups": len(groups), "saved": 0, "deleted": 0}
+
+    by_bot = {}
+    for bot_id, gid in groups:
+        by_bot.setdefault(bot_id, []).append(gid)
+    try:
+        ops = []
+        now = int(time.time())
+        for bot_id, gids in by_bot.items():
+            for gid, snapshot in gs.export_group_sessions(bot_id, gids).items():
+                _id = f"{bot_id}:{gid}"
+                if snapshot is None:
+                    ops.append(DeleteOne({"_id": _id}))
+                    report["deleted"] += 1
+                else:
+                    ops.append(ReplaceOne({"_id": _id}, dict(
+                        snapshot, bot_id=bot_id, group_id=gid, saved_at=now), upsert=True))
+                    report["saved"] += 1
+        if ops:
+            db.init_db()[COLLECTION].bulk_write(ops, ordered=False)
+    except Exception:
+        store.mark_dirty_groups(groups)  # retried on the next pass
+        raise
+
+    SNAPSHOT_GROUPS.inc("saved", amount=report["saved"])
+    SNAPSHOT_GROUPS.inc("deleted", amount=report["deleted"])
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    SNAPSHOT_LATENCY.observe(report["seconds"], "snapshot")
+    report["pending"] = len(store.dirty_groups())
+    report["finished_at"] = int(time.time())
+    return report
+
+
+def restore_missing(bot_id: str = None) -> dict:
+    """Put back every snapshot group (of one bot, or all) without a live session."""
+    start = time.perf_counter()
+    coll = db.init_db()[COLLECTION]
+    dirty = get_store().dirty_groups()
+    report = {"snapshots": 0, "restored": 0, "skipped_dirty": 0}
+
+    by_bot = {}
+    for doc in coll.find({"bot_id": bot_id} if bot_id else {}, {"bot_id": 1, "group_id": 1}):
+        by_bot.setdefault(doc["bot_id"], []).append(doc["group_id"])
+        report["snapshots"] += 1
+
+    for bid, gids in by_bot.items():
+        active = gs.get_active_groups(bid)
+        missing = []
+        for gid in gids:
+            if (bid, gid) in dirty:
+                report["skipped_dirty"] += 1
+            elif gid not in active:
+                missing.append(f"{bid}:{gid}")
+        if not missing:
+            continue
+        # full documents only for the groups that need them
+        for doc in coll.find({"_id": {"$in": missing}}):
+            try:
+                if gs.restore_group_session(bid, doc["group_id"], doc):
+                    report["restored"] += 1
+            except Exception as e:
+                print(f"[session_snapshots] Failed to restore {doc['_id']}: {e}")
+
+    SNAPSHOT_GROUPS.inc("restored", amount=report["restored"])
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    SNAPSHOT_LATENCY.observe(report["seconds"], "restore")
+    print(f"[session_snapshots] restore: {report}")
+    return report
+
+
+def _snapshot_loop():
+    try:
+        if _r.set(_RESTORE_LOCK, 1, nx=True, ex=settings.MONGO_SNAPSHOT_INTERVAL):
+            restore_missing()
+    except Exception as e:
+        print(f"[session_snapshots] restore error: {e}")
+    while True:
+        time.sleep(settings.MONGO_SNAPSHOT_INTERVAL)
+        try:
+            if _r.set(_LOCK, 1, nx=True, ex=settings.MONGO_SNAPSHOT_INTERVAL):
+                report = snapshot_once()
+                _r.hset(LAST_PASS_KEY, mapping=report)
+                if report["groups"]:
+                    print(f"[session_snapshots] pass: {report}")
+        except Exception as e:
+            print(f"[session_snapshots] snapshot error: {e}")
+
+
+def start_snapshotter():
+    """Restore missing groups, then snapshot periodically; once per process (also after a fork)."""
+    global _snapshot_thread
+    pid = os.getpid()
+    if _snapshot_thread and _snapshot_thread[0] == pid:
+        return _snapshot_thread[1]
+    with _snapshot_lock:
+        if _snapshot_thread and _snapshot_thread[0] == pid:
+            return _snapshot_thread[1]
+        thread = threading.Thread(target=_snapshot_loop, name="session-snapshotter", daemon=True)
+        thread.start()
+        _snapshot_thread = (pid, thread)
+    return thread
+
+
+# Manual snapshot / recovery:
+#     python -m utils.session_snapshots snapshot
+#     python -m utils.session_snapshots restore [bot_id]
+def main():
+    args = sys.argv[1:] or ["snapshot"]
+    if args[0] == "restore":
+        restore_missing(args[1] if len(args) > 1 else None)
+        return 0
+    while True:  # drain the whole backlog, batch by batch
+        report = snapshot_once()
+        print(f"[session_snapshots] pass: {report}")
+        if not report["groups"] or not report["pending"]:
+            return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,526 @@
+# utils/session_store.py
+import atexit
+import os
+import random
+import threading
+import time
+from redis.exceptions import WatchError
+from config import settings
+from utils.redis_client import lazy_redis
+
+# Where live session state lives. group_session owns the logic and the field
+# encoding; a store only keeps, per bot:
+#   - the session fields (encoded values, see group_session._encode_field)
+#   - per-group version, bumped on every change (caches are keyed on it)
+#   - per-group last-activity timestamps (read by the lifecycle sweeper)
+#   - per-group counters (session_stats)
+#
+# SESSION_STORE selects the backend:
+#   redis   every operation is a Redis round trip; any number of workers
+#   memory  dicts in this process, written behind to the same Redis keys every
+#           SESSION_SNAPSHOT_INTERVAL seconds and loaded from them on first
+#           use. Single process only (WEB_CONCURRENCY=1, no separate poller):
+#           other processes would neither see nor respect its state.
+#
+# Redis key patterns (both backends):
+#   sessions:{bot_id}                hash field -> encoded value
+#   session_version:{bot_id}:{gid}   int; a fresh counter starts at a
+#                                    timestamp (ms * 1000), so versions never
+#                                    repeat after the key expired or was lost
+#   session_activity:{bot_id}        zset gid -> last change ts
+#   session_stats:{bot_id}:{gid}     hash counter -> int
+#   session_dirty                    set "bot_id:gid" changed since the last
+#                                    Mongo snapshot (utils/session_snapshots.py)
+
+TXN_RETRIES = 10
+DIRTY_KEY = "session_dirty"
+
+
+class SessionWrites:
+    """Changes to one bot's session state, applied together."""
+    __slots__ = ("fields", "bumps", "stats", "reset_stats", "dropped")
+
+    def __init__(self):
+        self.fields = {}       # field -> encoded value
+        self.bumps = set()     # gids: version + 1, activity = now
+        self.stats = {}        # gid -> {counter: delta}
+        self.reset_stats = {}  # gid -> {counter: value}, replaces the counters
+        self.dropped = set()   # gids: counters and activity entry removed (after the bumps)
+
+    def bump(self, gid: str):
+        self.bumps.add(gid)
+
+    def incr(self, gid: str, deltas: dict):
+        pending = self.stats.setdefault(gid, {})
+        for field, delta in deltas.items():
+            if delta:
+                pending[field] = pending.get(field, 0) + delta
+
+    def groups(self) -> set:
+        return self.bumps | self.stats.keys() | self.reset_stats.keys() | self.dropped
+
+    def __bool__(self):
+        return bool(self.fields or self.bumps or self.stats or self.reset_stats or self.dropped)
+
+
+class SessionStore:
+    """Backend interface; see the module comment."""
+
+    def get_fields(self, bot_id: str, fields) -> list:
+        """Encoded values (None if missing), in the order of `fields`."""
+        raise NotImplementedError
+
+    def set_fields(self, bot_id: str, mapping: dict):
+        raise NotImplementedError
+
+    def apply(self, bot_id: str, writes: SessionWrites):
+        raise NotImplementedError
+
+    def apply_many(self, writes_by_bot: dict):
+        for bot_id, writes in writes_by_bot.items():
+            self.apply(bot_id, writes)
+
+    def transact(self, bot_id: str, fields, build):
+        """
+        Atomic read-modify-write: build(raws) gets the encoded values of
+        `fields` and returns the SessionWrites to apply, or None to write
+        nothing. Returns what build returned.
+        """
+        raise NotImplementedError
+
+    def get_version(self, bot_id: str, gid: str) -> int:
+        raise NotImplementedError
+
+    def get_stats(self, bot_id: str, gid: str) -> dict:
+        """{counter: int}, {} if the group has none."""
+        raise NotImplementedError
+
+    def get_activity(self, bot_id: str) -> dict:
+        """{gid: last change ts}."""
+        raise NotImplementedError
+
+    def touch_activity(self, bot_id: str, stamps: dict):
+        raise NotImplementedError
+
+    def get_idle_groups(self, bot_id: str, before: float) -> list:
+        raise NotImplementedError
+
+    def bot_ids(self):
+        """Bots that have session fields."""
+        raise NotImplementedError
+
+    def delete_session(self, bot_id: str) -> bool:
+        """Drop a bot's session fields. True if there were any."""
+        raise NotImplementedError
+
+    def delete_session_if(self, bot_id: str, fields, check) -> bool:
+        """
+        Drop a bot's session fields if check(encoded values of `fields`) is
+        true, atomically with that read. True if dropped.
+        """
+        raise NotImplementedError
+
+    # every apply/transact marks the groups it touched dirty
+    def pop_dirty_groups(self, count: int) -> list:
+        """Take up to `count` dirty (bot_id, gid)."""
+        raise NotImplementedError
+
+    def mark_dirty_groups(self, groups):
+        raise NotImplementedError
+
+    def dirty_groups(self) -> set:
+        raise NotImplementedError
+
+
+# === Redis ===
+def _session_key(bot_id: str):
+    return f"sessions:{bot_id}"
+
+
+def _version_key(bot_id: str, gid: str):
+    return f"session_version:{bot_id}:{gid}"
+
+
+def _version_base() -> int:
+    """Where a fresh version counter starts: above any version it had before."""
+    return int(time.time() * 1000) * 1000
+
+
+def _activity_key(bot_id: str):
+    return f"session_activity:{bot_id}"
+
+
+def _stats_key(bot_id: str, gid: str):
+    return f"session_stats:{bot_id}:{gid}"
+
+
+class RedisStore(SessionStore):
+    def __init__(self):
+        self.r = lazy_redis()
+        self.r_raw = lazy_redis(raw=True)  # group_messages is binary
+        self._txn_locks = {}  # bot_id -> Lock: one transaction per bot per process
+        self._txn_locks_guard = threading.Lock()
+
+    def get_fields(self, bot_id, fields):
+        return self.r_raw.hmget(_session_key(bot_id), list(fields))
+
+    def set_fields(self, bot_id, mapping):
+        self.r_raw.hset(_session_key(bot_id), mapping=mapping)
+
+    def _queue(self, pipe, bot_id: str, writes: SessionWrites):
+        # backstop TTLs in case the sweeper never runs; activity pushes them forward
+        backstop = settings.SESSION_IDLE_TTL * 2
+        if writes.fields:
+            pipe.hset(_session_key(bot_id), mapping=writes.fields)
+        now = time.time()
+        for gid in writes.bumps:
+            pipe.set(_version_key(bot_id, gid), _version_base(), nx=True)
+            pipe.incr(_version_key(bot_id, gid))
+            pipe.expire(_version_key(bot_id, gid), backstop)
+            pipe.zadd(_activity_key(bot_id), {gid: now})
+        if writes.bumps:
+            pipe.expire(_activity_key(bot_id), backstop)
+            pipe.expire(_session_key(bot_id), backstop)
+        for gid, stats in writes.reset_stats.items():
+            pipe.delete(_stats_key(bot_id, gid))
+            pipe.hset(_stats_key(bot_id, gid), mapping=stats)
+            pipe.expire(_stats_key(bot_id, gid), backstop)
+        for gid, deltas in writes.stats.items():
+            for field, delta in deltas.items():
+                pipe.hincrby(_stats_key(bot_id, gid), field, delta)
+        for gid in writes.dropped:
+            pipe.delete(_stats_key(bot_id, gid))
+            pipe.zrem(_activity_key(bot_id), gid)
+        touched = writes.groups()
+        if touched:
+            pipe.sadd(DIRTY_KEY, *(f"{bot_id}:{gid}" for gid in touched))
+
+    def apply(self, bot_id, writes):
+        self.apply_many({bot_id: writes})
+
+    def apply_many(self, writes_by_bot):
+        pipe = self.r_raw.pipeline(transaction=False)
+        for bot_id, writes in writes_by_bot.items():
+            self._queue(pipe, bot_id, writes)
+        pipe.execute()
+
+    def transact(self, bot_id, fields, build):
+        # WATCH + HMGET, build in Python, then every write in one MULTI/EXEC;
+        # if another worker touched the session meanwhile, EXEC fails and we retry
+        key = _session_key(bot_id)
+        with self._txn_locks_guard:
+            lock = self._txn_locks.setdefault(bot_id, threading.Lock())
+        # threads of this worker queue up; WATCH only arbitrates between workers
+        with lock, self.r_raw.pipeline() as pipe:
+            for attempt in range(TXN_RETRIES):
+                try:
+                    pipe.watch(key)
+                    writes = build(pipe.hmget(key, list(fields)))
+                    if writes is None:
+                        pipe.unwatch()
+                        return None
+                    pipe.multi()
+                    self._queue(pipe, bot_id, writes)
+                    pipe.execute()
+                    return writes
+                except WatchError:
+                    # every link submission is a transaction: spread out the retries
+                    time.sleep(random.uniform(0, 0.001 * 2 ** attempt))
+                    continue
+        raise RuntimeError(f"update_session: too much contention on {key}")
+
+    def get_version(self, bot_id, gid):
+        return int(self.r.get(_version_key(bot_id, gid)) or 0)
+
+    def get_stats(self, bot_id, gid):
+        return {field: int(value) for field, value in self.r.hgetall(_stats_key(bot_id, gid)).items()}
+
+    def get_activity(self, bot_id):
+        return dict(self.r.zrange(_activity_key(bot_id), 0, -1, withscores=True))
+
+    def touch_activity(self, bot_id, stamps):
+        if stamps:
+            self.r.zadd(_activity_key(bot_id), stamps)
+
+    def get_idle_groups(self, bot_id, before):
+        return self.r.zrangebyscore(_activity_key(bot_id), 0, before)
+
+    def bot_ids(self):
+        for key in self.r.scan_iter(match="sessions:*", count=100):
+            yield key.split(":", 1)[1]
+
+    def delete_session(self, bot_id):
+        return bool(self.r.delete(_session_key(bot_id)))
+
+    def delete_session_if(self, bot_id, fields, check):
+        key = _session_key(bot_id)
+        with self._txn_locks_guard:
+            lock = self._txn_locks.setdefault(bot_id, threading.Lock())
+        with lock, self.r_raw.pipeline() as pipe:
+            for attempt in range(TXN_RETRIES):
+                try:
+                    pipe.watch(key)
+                    if not check(pipe.hmget(key, list(fields))):
+                        pipe.unwatch()
+                        return False
+                    pipe.multi()
+                    pipe.delete(key)
+                    return bool(pipe.execute()[0])
+                except WatchError:
+                    time.sleep(random.uniform(0, 0.001 * 2 ** attempt))
+        return False  # busy session: certainly not idle, the next sweep looks again
+
+    def pop_dirty_groups(self, count):
+        return [tuple(member.split(":", 1)) for member in self.r.spop(DIRTY_KEY, count) or []]
+
+    def mark_dirty_groups(self, groups):
+        if groups:
+            self.r.sadd(DIRTY_KEY, *(f"{bot_id}:{gid}" for bot_id, gid in groups))
+
+    def dirty_groups(self):
+        return {tuple(member.split(":", 1)) for member in self.r.smembers(DIRTY_KEY)}
+
+    def save_snapshot(self, sessions: dict, groups: dict):
+        """
+        Write state kept elsewhere (MemoryStore) to the Redis keys.
+        sessions: bot_id -> (fields, activity) or None (deleted);
+        groups: (bot_id, gid) -> (version, stats).
+        """
+        backstop = settings.SESSION_IDLE_TTL * 2
+        pipe = self.r_raw.pipeline(transaction=False)
+        for bot_id, state in sessions.items():
+            pipe.delete(_session_key(bot_id), _activity_key(bot_id))
+            if state is None:
+                continue
+            fields, activity = state
+            if fields:
+                pipe.hset(_session_key(bot_id), mapping=fields)
+                pipe.expire(_session_key(bot_id), backstop)
+            if activity:
+                pipe.zadd(_activity_key(bot_id), activity)
+                pipe.expire(_activity_key(bot_id), backstop)
+        for (bot_id, gid), (version, stats) in groups.items():
+            pipe.set(_version_key(bot_id, gid), version, ex=backstop)
+            pipe.delete(_stats_key(bot_id, gid))
+            if stats:
+                pipe.hset(_stats_key(bot_id, gid), mapping=stats)
+                pipe.expire(_stats_key(bot_id, gid), backstop)
+        pipe.execute()
+
+    def load_session(self, bot_id: str):
+        """(fields, activity) as stored, for MemoryStore."""
+        fields = {k.decode(): v for k, v in self.r_raw.hgetall(_session_key(bot_id)).items()}
+        return fields, self.get_activity(bot_id)
+
+
+# === In-process ===
+class MemoryStore(SessionStore):
+    """
+    Session state in dicts behind one lock: no round trips, transactions are
+    just the lock. Bots are loaded from Redis on first use, groups' versions
+    and counters on first read. Changed bots/groups are marked dirty and
+    snapshot() writes them back.
+    """
+
+    def __init__(self, backing: RedisStore = None):
+        self._backing = backing
+        self._lock = threading.RLock()
+        self._sessions = {}   # bot_id -> {field: encoded}
+        self._activity = {}   # bot_id -> {gid: ts}
+        self._versions = {}   # (bot_id, gid) -> int
+        self._stats = {}      # (bot_id, gid) -> {counter: int}
+        self._dirty_bots = set()
+        self._dirty_groups = set()
+        self._changed = set()  # (bot_id, gid) for pop_dirty_groups
+
+    def _session(self, bot_id):
+        fields = self._sessions.get(bot_id)
+        if fields is None:
+            fields, activity = self._backing.load_session(bot_id) if self._backing else ({}, {})
+            self._sessions[bot_id] = fields
+            self._activity[bot_id] = activity
+        return fields
+
+    def _group(self, bot_id, gid):
+        key = (bot_id, gid)
+        if key not in self._versions:
+            if self._backing:
+                self._versions[key] = self._backing.get_version(bot_id, gid)
+                self._stats[key] = self._backing.get_stats(bot_id, gid)
+            else:
+                self._versions[key], self._stats[key] = 0, {}
+        return key
+
+    def get_fields(self, bot_id, fields):
+        with self._lock:
+            session = self._session(bot_id)
+            return [session.get(f) for f in fields]
+
+    def set_fields(self, bot_id, mapping):
+        with self._lock:
+            self._session(bot_id).update(mapping)
+            self._dirty_bots.add(bot_id)
+
+    def _apply(self, bot_id, writes):
+        self._session(bot_id).update(writes.fields)
+        activity = self._activity[bot_id]
+        now = time.time()
+        for gid in writes.bumps:
+            key = self._group(bot_id, gid)
+            self._versions[key] = (self._versions[key] or _version_base()) + 1
+            activity[gid] = now
+        for gid, stats in writes.reset_stats.items():
+            self._stats[self._group(bot_id, gid)] = dict(stats)
+        for gid, deltas in writes.stats.items():
+            stats = self._stats[self._group(bot_id, gid)]
+            for field, delta in deltas.items():
+                stats[field] = stats.get(field, 0) + delta
+        for gid in writes.dropped:
+            self._stats[self._group(bot_id, gid)] = {}
+            activity.pop(gid, None)
+        touched = [(bot_id, gid) for gid in writes.groups()]
+        self._dirty_bots.add(bot_id)
+        self._dirty_groups.update(touched)
+        self._changed.update(touched)
+
+    def apply(self, bot_id, writes):
+        with self._lock:
+            self._apply(bot_id, writes)
+
+    def transact(self, bot_id, fields, build):
+        with self._lock:
+            writes = build(self.get_fields(bot_id, fields))
+            if writes is not None:
+                self._apply(bot_id, writes)
+            return writes
+
+    def get_version(self, bot_id, gid):
+        with self._lock:
+            return self._versions[self._group(bot_id, gid)]
+
+    def get_stats(self, bot_id, gid):
+        with self._lock:
+            return dict(self._stats[self._group(bot_id, gid)])
+
+    def get_activity(self, bot_id):
+        with self._lock:
+            self._session(bot_id)
+            return dict(self._activity[bot_id])
+
+    def touch_activity(self, bot_id, stamps):
+        with self._lock:
+            self._session(bot_id)
+            self._activity[bot_id].update(stamps)
+            self._dirty_bots.add(bot_id)
+
+    def get_idle_groups(self, bot_id, before):
+        return [gid for gid, ts in self.get_activity(bot_id).items() if ts <= before]
+
+    def bot_ids(self):
+        with self._lock:
+            known = [bot_id for bot_id, fields in self._sessions.items() if fields]
+        # and bots whose state is still only in Redis (not used since start)
+        stored = list(self._backing.bot_ids()) if self._backing else []
+        return list(dict.fromkeys(known + [b for b in stored if b not in self._sessions]))
+
+    def delete_session(self, bot_id):
+        with self._lock:
+            existed = bool(self._session(bot_id))
+            self._sessions[bot_id] = {}
+            self._dirty_bots.add(bot_id)
+            return existed
+
+    def delete_session_if(self, bot_id, fields, check):
+        with self._lock:
+            if not check(self.get_fields(bot_id, fields)):
+                return False
+            return self.delete_session(bot_id)
+
+    def pop_dirty_groups(self, count):
+        with self._lock:
+            return [self._changed.pop() for _ in range(min(count, len(self._changed)))]
+
+    def mark_dirty_groups(self, groups):
+        with self._lock:
+            self._changed.update(groups)
+
+    def dirty_groups(self):
+        with self._lock:
+            return set(self._changed)
+
+    def snapshot(self) -> int:
+        """Write dirty bots/groups to Redis. Returns how many were written."""
+        if not self._backing:
+            return 0
+        with self._lock:
+            sessions = {bot_id: (dict(self._sessions[bot_id]), dict(self._activity[bot_id]))
+                        if self._sessions[bot_id] else None for bot_id in self._dirty_bots}
+            groups = {key: (self._versions[key], dict(self._stats[key])) for key in self._dirty_groups}
+            self._dirty_bots.clear()
+            self._dirty_groups.clear()
+        if not (sessions or groups):
+            return 0
+        try:
+            self._backing.save_snapshot(sessions, groups)
+        except Exception as e:
+            print(f"[session_store] snapshot error: {e}")
+            with self._lock:  # retry next time, unless changed again meanwhile (still dirty then)
+                self._dirty_bots.update(sessions)
+                self._dirty_groups.update(groups)
+            return 0
+        return len(sessions) + len(groups)
+
+
+# === Selection ===
+_store = None
+_store_lock = threading.Lock()
+_snapshot_thread = None  # (pid, thread)
+
+
+def create_store(kind: str) -> SessionStore:
+    if kind == "redis":
+        return RedisStore()
+    if kind == "memory":
+        # gunicorn.conf.py warns when it forks more than one worker with this store
+        return MemoryStore(backing=RedisStore())
+    raise ValueError(f"unknown SESSION_STORE {kind!r} (redis, memory)")
+
+
+def get_store() -> SessionStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_store(settings.SESSION_STORE)
+                atexit.register(flush)
+    return _store
+
+
+def flush():
+    """Write pending memory-store changes now (shutdown); no-op for redis."""
+    if isinstance(_store, MemoryStore):
+        _store.snapshot()
+
+
+def _snapshot_loop(store: MemoryStore):
+    while True:
+        time.sleep(settings.SESSION_SNAPSHOT_INTERVAL)
+        store.snapshot()
+
+
+def start_snapshots():
+    """Write-behind loop for the memory store, once per process; no-op for redis."""
+    global _snapshot_thread
+    store = get_store()
+    if not isinstance(store, MemoryStore):
+        return None
+    pid = os.getpid()
+    if _snapshot_thread and _snapshot_thread[0] == pid:
+        return _snapshot_thread[1]
+    with _store_lock:
+        if _snapshot_thread and _snapshot_thread[0] == pid:
+            return _snapshot_thread[1]
+        thread = threading.Thread(target=_snapshot_loop, args=(store,), name="session-snapshots", daemon=True)
+        thread.start()
+        _snapshot_thread = (pid, thread)
+    return thread
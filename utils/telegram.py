@@ -6,6 +6,8 @@ import re
 from handlers.admin import notify_dev
 import json
 from utils.redis_client import get_redis
+from utils.metrics import UPDATES
+from utils import bot_api
 
 _admins_cache = {}
 _lock = Lock()
@@ -14,6 +16,10 @@ _CACHE_TTL = 300  # 5 minutes
 def normalize_gid(chat_id):
     return str(chat_id)
 
+
+# === Bot API calls: retries, breakers, stats (utils/bot_api.py) ===
+apihelper.CUSTOM_REQUEST_SENDER = bot_api.send_request
+
 def _redis_key(chat_id):
     return f"admins_cache:{normalize_gid(chat_id)}"
 
@@ -143,71 +149,106 @@ from telebot import TeleBot
 from config import settings
 from utils import db
 
-# Import your existing handlers (child bots reuse these)
-from handlers import commands, start, text as text_handler, callbacks
 from utils.message_tracker import track_message
-from utils.group_manager import get_allowed_groups, save_group_metadata
+from utils.group_manager import is_group_allowed, save_group_metadata
+from utils.metrics import GROUP_PREFILTER
 
-def manual_dispatch(bot, bot_id: str, update, db_conn):
-    if update.callback_query:
-        callbacks.handle_callback(bot, bot_id, update.callback_query)
-        return
+def manual_dispatch(bot, bot_id: str, view, db_conn):
+    """
+    Route one update. `view` is a utils.update_view.UpdateView: routing reads
+    its raw fields, and the telebot Message is only built (view.message) for
+    updates that reach a handler.
+    """
+    # child bots reuse the handlers; imported here because they import
+    # group_session, which imports this module
+    from handlers import commands, text as text_handler, callbacks
 
-    if not update.message:
+    UPDATES.inc(bot_id)
+    if view.has_callback_query:
+        callbacks.handle_callback(bot, bot_id, view.update.callback_query)
         return
 
-    message = update.message
-    track_message(message.chat.id, message.message_id, bot_id=bot_id)
+    if not view.has_message:
+        return
 
-    chat = message.chat
+    chat_id = view.chat_id
+    chat_type = view.chat_type
 
     # safe access to text/caption
-    incoming_text = (getattr(message, "text", None) or "")  # prefer direct text
-    caption_text = (getattr(message, "caption", None) or "")
+    incoming_text = view.text  # prefer direct text
 
     # PRIVATE: commands come from textual messages (most common). If no text, still pass to handler
-    if chat.type == "private":
+    if chat_type == "private":
+        track_message(chat_id, view.message_id, bot_id=bot_id)
         if incoming_text.startswith("/"):
-            commands.handle_command(bot, bot_id, message, db_conn)
+            commands.handle_command(bot, bot_id, view.message, db_conn)
         else:
-            text_handler.handle_text(bot, bot_id, message, db_conn)
+            text_handler.handle_text(bot, bot_id, view.message, db_conn)
         return
 
     # GROUP / SUPERGROUP
-    if chat.type in ["group", "supergroup"]:
+    if chat_type in ["group", "supergroup"]:
         # store group metadata & check allowed groups
-        save_group_metadata(db_conn, bot_id, message.chat)
-        if chat.id not in get_allowed_groups(bot_id):
+        save_group_metadata(db_conn, bot_id, view.chat)
+        if not is_group_allowed(bot_id, chat_id):
+            GROUP_PREFILTER.inc("not_allowed")
             return
 
         # command detection: only true text messages start with "/"
         if incoming_text.startswith("/"):
-            commands.handle_group_command(bot, bot_id, message, db_conn)
-        else:
-            # non-command messages (including media captions) go to group text handler
-            text_handler.handle_group_text(bot, bot_id, message, db_conn)
+            GROUP_PREFILTER.inc("command")
+            track_message(chat_id, view.message_id, bot_id=bot_id)
+            commands.handle_group_command(bot, bot_id, view.message, db_conn)
+            return
+
+        # non-command messages (including media captions) go to group text handler
+        stage, phase = text_handler.group_text_prefilter(bot_id, chat_id, view.content)
+        if stage == "idle":
+            GROUP_PREFILTER.inc(stage)
+            return
+        # tracked for /clear only while a session runs
+        track_message(chat_id, view.message_id, bot_id=bot_id)
+        if stage:
+            GROUP_PREFILTER.inc(stage)
+            return
+        text_handler.handle_group_text(bot, bot_id, view.message, db_conn, phase)
 
 from telebot import TeleBot
 from typing import Dict, Optional
 from utils import db
+from utils.bot_client import BotClient
+from utils.webhooks import apply_webhook
 from config import settings
 
 class BotManager:
     """
     Holds the admin bot + all child bots.
+    The admin bot is a full TeleBot (it registers handlers); child bots are
+    slim BotClients, see utils/bot_client.py.
     """
     def __init__(self):
-        self.admin_bot: TeleBot = TeleBot(settings.ADMIN_BOT_TOKEN, parse_mode="HTML", threaded=False)
-        self.child_bots: Dict[str, TeleBot] = {}
+        self._admin_bot: Optional[TeleBot] = None
+        self.child_bots: Dict[str, BotClient] = {}
 
-        @self.admin_bot.message_handler(commands=["ping"])
-        def _ping(m):
-            self.admin_bot.reply_to(m, "pong ✅")
+    @property
+    def admin_bot(self) -> TeleBot:
+        """Created on first use, so importing this module needs no token."""
+        if self._admin_bot is None:
+            if not settings.ADMIN_BOT_TOKEN:
+                raise RuntimeError("❌ ADMIN_BOT_TOKEN missing in .env")
+            bot = TeleBot(settings.ADMIN_BOT_TOKEN, parse_mode="HTML", threaded=False)
 
-    def get_child(self, bot_id: str) -> Optional[TeleBot]:
+            @bot.message_handler(commands=["ping"])
+            def _ping(m):
+                bot.reply_to(m, "pong ✅")
+
+            self._admin_bot = bot
+        return self._admin_bot
+
+    def get_child(self, bot_id: str) -> Optional[BotClient]:
         return self.child_bots.get(bot_id)
 
-    def create_or_get_child(self, bot_id: str) -> Optional[TeleBot]:
+    def create_or_get_child(self, bot_id: str) -> Optional[BotClient]:
         if bot_id in self.child_bots:
             return self.child_bots[bot_id]
 
@@ -216,7 +257,7 @@ class BotManager:
             return None
 
         token = doc["token"]
-        bot = TeleBot(token, parse_mode="HTML", threaded=False)
+        bot = BotClient(token, parse_mode="HTML")
         self.child_bots[bot_id] = bot
         return bot
 
@@ -226,9 +267,12 @@ class BotManager:
         bot = self.create_or_get_child(bot_id)
         if not bot:
             return False
+        if settings.INGEST_MODE == "polling":
+            db.set_bot_webhook(bot_id, None)  # utils.poller picks it up on its next refresh
+            return True
         try:
-            bot.remove_webhook()
-            bot.set_webhook(url)
+            # setWebhook replaces any previous one, no need to delete it first
+            apply_webhook(bot, url)
             db.set_bot_webhook(bot_id, url)
             return True
         except Exception as e:
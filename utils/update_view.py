@@ -0,0 +1,92 @@
+# utils/update_view.py
+import json
+from telebot import types
+
+try:  # optional; faster than the stdlib parser on webhook bodies
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# Webhook bodies are parsed once into plain dicts and routed on a handful of
+# fields (chat id/type, sender, text/caption). Most group traffic is dropped
+# by the prefilter, so the telebot object graph (users, chats, entities,
+# photos, reply chains) is only built for updates that reach a handler.
+
+
+class UpdateView:
+    """Routing fields of a raw update; the telebot objects are built on first use."""
+
+    __slots__ = ("raw", "_msg", "_update", "_chat")
+
+    def __init__(self, raw: dict):
+        self.raw = raw
+        self._msg = raw.get("message") or {}
+        self._update = None
+        self._chat = None
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(_loads(data))
+
+    # --- raw fields, no object construction ---
+    @property
+    def update_id(self):
+        return self.raw.get("update_id")
+
+    @property
+    def has_message(self) -> bool:
+        return bool(self._msg)
+
+    @property
+    def has_callback_query(self) -> bool:
+        return "callback_query" in self.raw
+
+    @property
+    def message_id(self):
+        return self._msg.get("message_id")
+
+    @property
+    def chat_id(self):
+        return self._msg.get("chat", {}).get("id")
+
+    @property
+    def chat_type(self):
+        return self._msg.get("chat", {}).get("type")
+
+    @property
+    def user_id(self):
+        return self._msg.get("from", {}).get("id")
+
+    @property
+    def sender_chat_id(self):
+        return self._msg.get("sender_chat", {}).get("id")
+
+    @property
+    def text(self) -> str:
+        return self._msg.get("text") or ""
+
+    @property
+    def content(self) -> str:
+        """Text, or the caption of a media message."""
+        return self._msg.get("text") or self._msg.get("caption") or ""
+
+    # --- lazily built telebot objects ---
+    @property
+    def update(self) -> types.Update:
+        if self._update is None:
+            self._update = types.Update.de_json(self.raw)
+        return self._update
+
+    @property
+    def message(self) -> types.Message:
+        return self.update.message
+
+    @property
+    def chat(self) -> types.Chat:
+        """Just the Chat (flat, cheap), without building the Message around it."""
+        if self._update is not None:
+            return self._update.message.chat
+        if self._chat is None:
+            self._chat = types.Chat.de_json(self._msg["chat"])
+        return self._chat
@@ -0,0 +1,195 @@
+# utils/webhooks.py
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import settings
+from utils import db
+from utils.bot_client import BotClient
+from utils.metrics import WEBHOOK_PENDING
+from utils.redis_client import lazy_redis
+
+# Keeps every bot's webhook in line with the database: enabled bots point at
+# /webhook/{bot_id}, disabled ones have none, and all of them only receive
+# the update types we handle. getWebhookInfo runs concurrently across bots,
+# so a pass over hundreds of bots takes a few round trips, not hundreds.
+#
+# One worker reconciles per interval (lock:webhooks). Per-bot status, with
+# pending_update_count and Telegram's last delivery error, is kept in Redis
+# for GET /webhooks:
+#   webhooks:status          hash bot_id -> json
+#   webhooks:last_reconcile  hash with the last summary
+
+# manual_dispatch and the admin path handle nothing else
+ALLOWED_UPDATES = ["message", "callback_query"]
+
+_LOCK = "lock:webhooks"
+STATUS_KEY = "webhooks:status"
+LAST_RECONCILE_KEY = "webhooks:last_reconcile"
+
+_r = lazy_redis()
+
+_reconciler_thread = None  # (pid, thread)
+_reconciler_lock = threading.Lock()
+
+
+def max_connections() -> int:
+    """Telegram's per-bot delivery concurrency; more than our request slots would only queue."""
+    if settings.WEBHOOK_MAX_CONNECTIONS:
+        return settings.WEBHOOK_MAX_CONNECTIONS
+    slots = int(os.getenv("WEB_CONCURRENCY", "2")) * int(os.getenv("GUNICORN_THREADS", "4"))
+    return min(100, max(1, slots))
+
+
+def webhook_url(bot_id: str) -> str:
+    return f"{settings.BASE_URL.rstrip('/')}/webhook/{bot_id}"
+
+
+def apply_webhook(bot, url: str):
+    """setWebhook with our allowed_updates and max_connections."""
+    return bot.set_webhook(url, allowed_updates=ALLOWED_UPDATES, max_connections=max_connections())
+
+
+def _drift(info, expected_url):
+    """What differs between Telegram's webhook and the wanted one, [] if nothing."""
+    if expected_url is None:
+        return []
+    if not expected_url:
+        return ["url"] if info.url else []
+    drift = []
+    if info.url != expected_url:
+        drift.append("url")
+    if sorted(info.allowed_updates or []) != sorted(ALLOWED_UPDATES):
+        drift.append("allowed_updates")
+    if (info.max_connections or 40) != max_connections():
+        drift.append("max_connections")
+    return drift
+
+
+def check_bot(bot_id: str, token: str, expected_url, fix: bool = True) -> dict:
+    """
+    Compare one bot's webhook with `expected_url` ("" = should have none,
+    None = unknown, report only) and, with fix=True, correct it.
+    Never raises; errors end up in the result.
+    """
+    status = {"bot_id": bot_id, "expected_url": expected_url, "checked_at": int(time.time())}
+    bot = BotClient(token)
+    try:
+        info = bot.get_webhook_info()
+        drift = _drift(info, expected_url)
+        status.update({
+            "url": info.url,
+            "pending_update_count": info.pending_update_count or 0,
+            "last_error_date": info.last_error_date,
+            "last_error_message": info.last_error_message,
+            "drift": drift,
+            "action": "ok",
+        })
+        if drift and fix:
+            if expected_url:
+                apply_webhook(bot, expected_url)
+                status["action"] = "set"
+            else:
+                bot.remove_webhook()
+                status["action"] = "removed"
+    except Exception as e:
+        status.update({"action": "error", "error": str(e)})
+    return status
+
+
+def _targets():
+    """(bot_id, token, expected_url) for every child bot, plus the admin bot."""
+    polling = settings.INGEST_MODE == "polling"  # utils.poller: no bot may have a webhook
+    targets = []
+    if settings.ADMIN_BOT_TOKEN and (settings.BASE_URL or polling):
+        targets.append(("admin", settings.ADMIN_BOT_TOKEN, "" if polling else webhook_url("admin")))
+    for doc in db.list_bots():
+        bot_id = str(doc["_id"])
+        if polling or doc.get("status") != "enabled":
+            expected = ""
+        elif settings.BASE_URL:
+            expected = webhook_url(bot_id)
+        else:
+            expected = None  # no base URL: can't tell where it should point
+        targets.append((bot_id, doc["token"], expected))
+    return targets
+
+
+def reconcile(fix: bool = True) -> dict:
+    """One pass over all bots. Returns a summary; per-bot status goes to Redis."""
+    targets = _targets()
+    with ThreadPoolExecutor(max_workers=max(1, settings.WEBHOOK_RECONCILE_CONCURRENCY)) as pool:
+        results = list(pool.map(lambda t: check_bot(*t, fix=fix), targets))
+
+    summary = {"bots": len(results), "fixed": 0, "errors": 0, "pending_updates": 0}
+    statuses = {}
+    for status in results:
+        summary["fixed"] += status["action"] in ("set", "removed")
+        summary["errors"] += status["action"] == "error"
+        summary["pending_updates"] += status.get("pending_update_count", 0)
+        if "pending_update_count" in status:
+            WEBHOOK_PENDING.set(status["pending_update_count"], status["bot_id"])
+        statuses[status["bot_id"]] = json.dumps(status)
+
+        # keep the admin panel's view of the webhook in step
+        if status["action"] == "set" and status["bot_id"] != "admin":
+            db.set_bot_webhook(status["bot_id"], status["expected_url"])
+        elif status["action"] == "removed" and status["bot_id"] != "admin":
+            db.set_bot_webhook(status["bot_id"], None)
+    summary["finished_at"] = int(time.time())
+
+    try:
+        pipe = _r.pipeline()
+        pipe.delete(STATUS_KEY)
+        if statuses:
+            pipe.hset(STATUS_KEY, mapping=statuses)
+        pipe.hset(LAST_RECONCILE_KEY, mapping=summary)
+        pipe.execute()
+    except Exception as e:
+        print(f"[webhooks] Redis error saving status: {e}")
+    print(f"[webhooks] reconcile: {summary}")
+    return summary
+
+
+def get_status() -> dict:
+    """Last reconcile summary and per-bot webhook status (for GET /webhooks)."""
+    bots = sorted((json.loads(v) for v in _r.hvals(STATUS_KEY)),
+                  key=lambda s: s.get("pending_update_count", 0), reverse=True)
+    return {"last_reconcile": _r.hgetall(LAST_RECONCILE_KEY), "bots": bots}
+
+
+def _reconciler_loop():
+    while True:
+        try:
+            if _r.set(_LOCK, 1, nx=True, ex=settings.WEBHOOK_RECONCILE_INTERVAL):
+                reconcile()
+        except Exception as e:
+            print(f"[webhooks] reconcile error: {e}")
+        time.sleep(settings.WEBHOOK_RECONCILE_INTERVAL)
+
+
+def start_reconciler():
+    """Start the reconcile loop once per process (also after a fork)."""
+    global _reconciler_thread
+    pid = os.getpid()
+    if _reconciler_thread and _reconciler_thread[0] == pid:
+        return _reconciler_thread[1]
+    with _reconciler_lock:
+        if _reconciler_thread and _reconciler_thread[0] == pid:
+            return _reconciler_thread[1]
+        thread = threading.Thread(target=_reconciler_loop, name="webhook-reconciler", daemon=True)
+        thread.start()
+        _reconciler_thread = (pid, thread)
+    return thread
+
+
+# Deploy step / manual check:
+#     python -m utils.webhooks [--dry-run]
+def main():
+    reconcile(fix="--dry-run" not in sys.argv)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,64 @@
 # utils/wizard_state.py
-from utils.redis_client import get_redis
+from config import settings
+from utils.redis_client import lazy_redis
 
-r = get_redis()
+r = lazy_redis()
 
 # KEYS
-PENDING_ADD_TOKEN = "wizard:pending_add_token"   # hash {admin_id: chat_id}
-PENDING_RULES     = "wizard:pending_rules"       # hash {admin_id: bot_id}
-PENDING_ACTION    = "wizard:pending_action"      # hash {user_id: action}
-PENDING_MEDIA = "wizard:pending_media"  # hash {admin_id: "key:bot_id:page"}
+# Each pending step is its own key with a TTL, so an abandoned wizard
+# cleans itself up: wizard:{kind}:{user_id} -> value
+PENDING_ADD_TOKEN = "wizard:pending_add_token"   # {admin_id} -> chat_id
+PENDING_RULES     = "wizard:pending_rules"       # {admin_id} -> bot_id
+PENDING_ACTION    = "wizard:pending_action"      # {user_id} -> action
+PENDING_MEDIA = "wizard:pending_media"  # {admin_id} -> "key:bot_id:page"
+
+# Before per-key TTLs these were global hashes keyed by user id. They are
+# still read as a fallback and deleted by the lifecycle sweeper.
+LEGACY_HASHES = (PENDING_ADD_TOKEN, PENDING_RULES, PENDING_ACTION, PENDING_MEDIA)
+
+
+def _set(kind: str, user_id: int, value):
+    r.set(f"{kind}:{user_id}", value, ex=settings.WIZARD_TTL)
+
+
+def _pop(kind: str, user_id: int):
+    pipe = r.pipeline()
+    pipe.get(f"{kind}:{user_id}")
+    pipe.delete(f"{kind}:{user_id}")
+    value, _ = pipe.execute()
+    if value:
+        return value
+
+    # legacy hash entry written before the upgrade
+    value = r.hget(kind, user_id)
+    if value:
+        r.hdel(kind, user_id)
+    return value
 
 # === Add Token ===
 def set_pending_add_token(admin_id: int, chat_id: int):
-    r.hset(PENDING_ADD_TOKEN, admin_id, chat_id)
+    _set(PENDING_ADD_TOKEN, admin_id, chat_id)
 
 def pop_pending_add_token(admin_id: int):
-    chat_id = r.hget(PENDING_ADD_TOKEN, admin_id)
-    if chat_id:
-        r.hdel(PENDING_ADD_TOKEN, admin_id)
-    return chat_id
+    return _pop(PENDING_ADD_TOKEN, admin_id)
 
 # === Rules ===
 def set_pending_rules(admin_id: int, bot_id: str):
-    r.hset(PENDING_RULES, admin_id, bot_id)
+    _set(PENDING_RULES, admin_id, bot_id)
 
 def pop_pending_rules(admin_id: int):
-    bot_id = r.hget(PENDING_RULES, admin_id)
-    if bot_id:
-        r.hdel(PENDING_RULES, admin_id)
-    return bot_id
+    return _pop(PENDING_RULES, admin_id)
 
 # === Action ===
 def set_pending_action(user_id: int, action: str):
-    r.hset(PENDING_ACTION, user_id, action)
+    _set(PENDING_ACTION, user_id, action)
 
 def pop_pending_action(user_id: int):
-    action = r.hget(PENDING_ACTION, user_id)
-    if action:
-        r.hdel(PENDING_ACTION, user_id)
-    return action
+    return _pop(PENDING_ACTION, user_id)
 
 # === Media ===
 def set_pending_media(admin_id: int, action: str):
-    r.hset(PENDING_MEDIA, admin_id, action)
+    _set(PENDING_MEDIA, admin_id, action)
 
 def pop_pending_media(admin_id: int):
-    action = r.hget(PENDING_MEDIA, admin_id)
-    if action:
-        r.hdel(PENDING_MEDIA, admin_id)
-    return action
+    return _pop(PENDING_MEDIA, admin_id)